@@ -9,6 +9,9 @@ pip install -r requirements.txt
 echo "🗄️  Running database migrations..."
 python manage.py migrate --noinput
 
+echo "🔎 Rebuilding the component search index..."
+python manage.py rebuild_search_index
+
 echo "📁 Collecting static files..."
 python manage.py collectstatic --noinput --clear
 
@@ -60,6 +60,8 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    # Query count, DB time and N+1 detection per request (catalog/instrumentation.py).
+    'catalog.instrumentation.SQLProfileMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django_htmx.middleware.HtmxMiddleware',
@@ -188,4 +190,30 @@ AUTH_USER_MODEL = 'users.CustomUser'
 # tell Django where to send users after they log in or log out.
 LOGIN_REDIRECT_URL = 'home'
 LOGOUT_REDIRECT_URL = 'home'
+
+# The computed build statuses (price, PSU estimate, bottleneck) are cached per build
+# revision (builds/views.py). In-memory, so each worker process keeps its own copy.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'buildforge',
+    }
+}
+
+# SQL instrumentation (catalog/instrumentation.py): the share of requests logged as a
+# JSON line on the 'buildforge.sql' logger, and how often one statement may repeat
+# in a request before it's flagged as a likely N+1.
+SQL_PROFILE_SAMPLE_RATE = float(os.getenv('SQL_PROFILE_SAMPLE_RATE', '0.01'))
+SQL_PROFILE_REPEAT_THRESHOLD = int(os.getenv('SQL_PROFILE_REPEAT_THRESHOLD', '5'))
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'buildforge.sql': {'handlers': ['console'], 'level': 'INFO', 'propagate': False},
+    },
+}
 #____________________________________________________________________________________________________________________________
\ No newline at end of file
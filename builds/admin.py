@@ -3,10 +3,32 @@
 #__________________________________________________________________________________________________________________________ (akn)
 
 from django.contrib import admin
-from .models import Build, BuildComponent, WishlistItem
+from .models import Build, BuildComponent, WishlistItem, refresh_build_totals
 
 admin.site.register(Build)
-admin.site.register(BuildComponent)
 admin.site.register(WishlistItem)
 
-#__________________________________________________________________________________________________________________________
\ No newline at end of file
+
+@admin.register(BuildComponent)
+class BuildComponentAdmin(admin.ModelAdmin):
+    """Changing a build's parts here also updates the build's revision and totals (like the workbench does)."""
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        obj.build.bump_revision()
+        if change and 'build' in form.changed_data:
+            # The part moved to another build, so the old one lost it.
+            refresh_build_totals(Build.objects.filter(pk=form.initial['build']))
+
+    def delete_model(self, request, obj):
+        build = obj.build
+        super().delete_model(request, obj)
+        build.bump_revision()
+
+    def delete_queryset(self, request, queryset):
+        build_ids = list(queryset.values_list('build_id', flat=True).distinct())
+        super().delete_queryset(request, queryset)
+        for build in Build.objects.filter(pk__in=build_ids):
+            build.bump_revision()
+
+#__________________________________________________________________________________________________________________________
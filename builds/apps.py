@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class BuildsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'builds'
+
+    def ready(self):
+        # Connects the signal handlers in builds/signals.py.
+        from . import signals  # noqa: F401
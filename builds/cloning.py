@@ -0,0 +1,69 @@
+# builds/cloning.py
+
+#__________________________________________________________________________________________________________________________ (akn)
+
+"""
+Copying builds: one copy for the "Clone" button, or thousands at once for seeding
+starter builds (the staff batch clone page and 'manage.py clone_build').
+
+However many copies, it's one transaction and a handful of bulk INSERTs: the
+original's parts are read once, the new Build rows go in with bulk_create, then
+all their parts with another bulk_create. The copies start with the original's
+total_price / total_tdp, since they have exactly the same parts.
+
+MySQL doesn't hand back the ids of a bulk INSERT, and the parts need them. Reading
+the new rows back (by user and name, or ids after the highest one) could pick up a
+build another request commits at the same moment, so there the builds are saved one
+INSERT each, which does return the id. The parts still go in with bulk_create.
+"""
+
+from django.db import connection, transaction
+from .models import Build, BuildComponent
+
+# Rows per INSERT statement.
+BATCH_SIZE = 1000
+
+
+def clone_build(original, users, copies=1, name=None, batch_size=BATCH_SIZE):
+    """
+    Copies 'original' (a Build) 'copies' times into every account in 'users'.
+    The copies are called name (default "Copy of <original name>"), with " #2", " #3", ...
+    added when a user gets more than one. Returns the new builds (with their ids).
+    """
+    users = list({user.pk: user for user in users}.values())  # each account once
+    name = name or f"Copy of {original.name}"
+
+    new_builds = [
+        Build(
+            user=user,
+            name=name if number == 1 else f"{name} #{number}",
+            description=original.description,
+            total_price=original.total_price,
+            total_tdp=original.total_tdp,
+        )
+        for user in users
+        for number in range(1, copies + 1)
+    ]
+    if not new_builds:
+        return []
+
+    with transaction.atomic():
+        parts = list(BuildComponent.objects.filter(build=original).order_by('id').values_list('component_id', 'quantity'))
+        if connection.features.can_return_rows_from_bulk_insert:
+            Build.objects.bulk_create(new_builds, batch_size=batch_size)
+        else:
+            # MySQL: one INSERT per build, so each gets its own id (see above).
+            for build in new_builds:
+                build.save()
+        BuildComponent.objects.bulk_create(
+            (
+                BuildComponent(build_id=build.pk, component_id=component_id, quantity=quantity)
+                for build in new_builds
+                for component_id, quantity in parts
+            ),
+            batch_size=batch_size,
+        )
+    return new_builds
+
+
+#__________________________________________________________________________________________________________________________
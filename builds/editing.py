@@ -0,0 +1,143 @@
+# builds/editing.py
+
+#__________________________________________________________________________________________________________________________ (akn)
+
+"""
+Adding and removing parts on the workbench, safe against double clicks.
+
+HTMX sends a request per click, so two clicks on "+ RAM" can arrive at the same time.
+If both read "1 stick", both would write "2 sticks" (one click lost), and both could
+pass the slot check and go over the limit. So every change to a build's parts runs
+like this, in one transaction:
+
+  1. lock_build(): a conditional UPDATE that only matches the user's own build and
+     sets its revision to itself (changes nothing). Being a write, it locks the
+     build's row until commit (SQLite locks the whole database), so a second request
+     for the same build waits right there until the first one has committed.
+     (select_for_update() would do on PostgreSQL and MySQL, but SQLite ignores it.)
+  2. The build's parts are read once, and the slot rules are checked against them.
+  3. add_part() / remove_part() write the change with as few statements as possible:
+     quantities change with F() ('quantity = quantity + 1' in the database), and the
+     RAM trimmed after a motherboard swap goes in one DELETE / UPDATE.
+  4. Only if something changed: Build.bump_revision() adds 1 to the revision and
+     recomputes total_price / total_tdp in one UPDATE. A click that changes nothing
+     (no free slot, a part that's already gone) keeps the cached status.
+
+add_part() and remove_part() return the build's parts after the change, so the view
+can render the scaffold without loading them again.
+"""
+
+from django.db.models import F
+from .logic import BuildItem
+from .models import Build, BuildComponent
+
+# Types a build has at most one of: adding another replaces it.
+UNIQUE_TYPES = ['CPU', 'Motherboard', 'GPU', 'PSU', 'Case']
+# RAM slots when the build has no motherboard yet, and storage slots (as in the scaffold).
+DEFAULT_RAM_SLOTS = 4
+TOTAL_STORAGE_SLOTS = 2
+
+
+def lock_build(build_id, user):
+    """
+    Step 1 above. Call it first thing inside transaction.atomic(). Raises
+    Build.DoesNotExist if the build doesn't exist or isn't the user's. Returns a
+    Build with only the id set (all the scaffold, its template and bump_revision() need).
+    """
+    if not Build.objects.filter(pk=build_id, user=user).update(revision=F('revision')):
+        raise Build.DoesNotExist
+    return Build(pk=build_id, user=user)
+
+
+def _slot_limit(component_type, items):
+    """How many of 'component_type' (RAM or Storage) the build has room for."""
+    if component_type == 'RAM':
+        for item in items:
+            if item.component.get_type() == 'Motherboard':
+                return item.component.ram_slots
+        return DEFAULT_RAM_SLOTS
+    if component_type == 'Storage':
+        return TOTAL_STORAGE_SLOTS
+    return float('inf')
+
+
+def _trim_ram(items, ram_slots):
+    """
+    The RAM to take out when a motherboard with 'ram_slots' slots goes in: the last
+    sticks added go first. Returns (ids of the items to delete, (item, sticks to take
+    off it) or None).
+    """
+    ram_items = [item for item in items if item.component.get_type() == 'RAM']
+    sticks_to_remove = sum(item.quantity for item in ram_items) - ram_slots
+    delete_ids, reduce = [], None
+    for item in sorted(ram_items, key=lambda item: item.id, reverse=True):
+        if sticks_to_remove <= 0:
+            break  # We've removed enough.
+        if item.quantity <= sticks_to_remove:
+            sticks_to_remove -= item.quantity
+            delete_ids.append(item.id)
+        else:
+            reduce = (item, sticks_to_remove)
+            sticks_to_remove = 0
+    return delete_ids, reduce
+
+
+def add_part(build, items, component):
+    """
+    Adds one 'component' (from the catalog snapshot) to a locked build whose parts are
+    'items'. A CPU, motherboard, GPU, PSU or case replaces the one already there;
+    a new motherboard also takes out the RAM it has no slots for. RAM and storage
+    go up by one if there's a free slot, otherwise nothing changes.
+    Returns (the build's items after the change, whether anything changed).
+    """
+    component_type = component.get_type()
+    same = next((item for item in items if item.component.id == component.id), None)
+
+    if component_type in UNIQUE_TYPES:
+        if same is not None:
+            return items, False  # It's already the one in the build.
+        delete_ids = [item.id for item in items if item.component.get_type() == component_type]
+        reduce = None
+        if component_type == 'Motherboard':
+            ram_delete_ids, reduce = _trim_ram(items, component.ram_slots)
+            delete_ids += ram_delete_ids
+        if delete_ids:
+            BuildComponent.objects.filter(build=build, id__in=delete_ids).delete()
+        if reduce is not None:
+            item, sticks = reduce
+            BuildComponent.objects.filter(pk=item.id).update(quantity=F('quantity') - sticks)
+            item.quantity -= sticks
+        new_item = BuildComponent.objects.create(build=build, component_id=component.id, quantity=1)
+        items = [item for item in items if item.id not in delete_ids] + [BuildItem(new_item.id, component, 1)]
+        return items, True
+
+    # --- Stackable components (RAM, Storage) ---
+    in_build = sum(item.quantity for item in items if item.component.get_type() == component_type)
+    if in_build >= _slot_limit(component_type, items):
+        return items, False  # No free slot.
+    if same is not None:
+        BuildComponent.objects.filter(pk=same.id).update(quantity=F('quantity') + 1)
+        same.quantity += 1
+    else:
+        new_item = BuildComponent.objects.create(build=build, component_id=component.id, quantity=1)
+        items = items + [BuildItem(new_item.id, component, 1)]
+    return items, True
+
+
+def remove_part(build, items, component_id):
+    """
+    Takes one of 'component_id' out of a locked build whose parts are 'items': one
+    stick / drive less, or the whole row when it was the last one. Nothing happens
+    if the build doesn't have it. Returns (the items after the change, whether anything changed).
+    """
+    item = next((item for item in items if str(item.component.id) == str(component_id)), None)
+    if item is None:
+        return items, False  # Already gone (e.g. the second of two quick clicks).
+    if item.quantity > 1:
+        BuildComponent.objects.filter(pk=item.id).update(quantity=F('quantity') - 1)
+        item.quantity -= 1
+        return items, True
+    BuildComponent.objects.filter(pk=item.id).delete()
+    return [other for other in items if other is not item], True
+
+#__________________________________________________________________________________________________________________________
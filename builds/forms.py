@@ -3,6 +3,7 @@
 #__________ akn
 
 from django import forms
+from django.contrib.auth import get_user_model
 from .models import Build
 
 # This is a ModelForm, a special type of form that is automatically
@@ -19,4 +20,35 @@ class BuildForm(forms.ModelForm):
         widgets = {
             'name': forms.TextInput(attrs={'placeholder': 'e.g., My Dream Gaming PC'}),
             'description': forms.Textarea(attrs={'rows': 3, 'placeholder': 'A short description of your build...'}),
-        }
\ No newline at end of file
+        }
+
+# A plain Form (not a ModelForm): it picks the accounts a curated guide is copied into.
+# Used by the staff batch clone page (batch_clone_view).
+class BatchCloneForm(forms.Form):
+    MAX_COPIES = 100
+
+    usernames = forms.CharField(
+        required=False,
+        widget=forms.Textarea(attrs={'rows': 6, 'placeholder': 'One username per line (commas and spaces work too)'}),
+    )
+    all_users = forms.BooleanField(required=False, label='Every active member (staff accounts excluded)')
+    copies = forms.IntegerField(min_value=1, max_value=MAX_COPIES, initial=1, help_text='Copies per account (variants are numbered #2, #3, ...).')
+    name = forms.CharField(required=False, max_length=90, help_text='Defaults to "Copy of <guide name>".')
+
+    def clean(self):
+        cleaned_data = super().clean()
+        User = get_user_model()
+        names = list(dict.fromkeys(cleaned_data.get('usernames', '').replace(',', ' ').split()))
+
+        if cleaned_data.get('all_users'):
+            users = list(User.objects.filter(is_active=True, is_staff=False).order_by('pk'))
+        elif names:
+            users = list(User.objects.filter(username__in=names).order_by('pk'))
+            unknown = set(names) - {user.username for user in users}
+            if unknown:
+                raise forms.ValidationError(f"Unknown usernames: {', '.join(sorted(unknown))}")
+        else:
+            raise forms.ValidationError("Enter some usernames or tick 'Every active member'.")
+
+        cleaned_data['users'] = users
+        return cleaned_data
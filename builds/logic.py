@@ -2,6 +2,22 @@
 
 #__________________________________________________________________________________________________________________________ (akn)
 
+from decimal import Decimal
+
+class BuildItem:
+    """
+    One part in a build: a BuildComponent row whose component is read from the
+    in-memory catalog snapshot (catalog/snapshot.py) instead of the database.
+    It has the same .id, .component and .quantity as BuildComponent, so the
+    functions below and the scaffold templates accept either.
+    """
+    __slots__ = ('id', 'component', 'quantity')
+
+    def __init__(self, id, component, quantity):
+        self.id = id
+        self.component = component
+        self.quantity = quantity
+
 def detect_bottleneck(cpu_item, gpu_item):
     """
     Analyzes a CPU and GPU BuildComponent item pair using a tier system.
@@ -44,17 +60,16 @@ def detect_bottleneck(cpu_item, gpu_item):
     
     return (level, message)
 
-def calculate_psu_wattage(components_in_build):
+# We add a small base value to account for things that don't have a TDP,
+# like motherboard chipsets, fans, and SSDs. 50W is a safe estimate.
+BASE_POWER_OTHERS = 50
+
+def estimate_load_watts(components_in_build):
     """
-    Calculates a recommended PSU wattage by summing the actual TDP values
-    of all components in the build from the database.
+    The estimated power draw of the build: the actual TDP values of all its
+    components (times their quantity) plus BASE_POWER_OTHERS.
     """
-    total_tdp = 0
-    
-    # We can add a small base value to account for things that don't have a TDP,
-    # like motherboard chipsets, fans, and SSDs. 50W is a safe estimate.
-    base_power_others = 50
-    total_tdp += base_power_others
+    total_tdp = BASE_POWER_OTHERS
 
     # Loop through every single item in the build.
     for item in components_in_build:
@@ -66,6 +81,17 @@ def calculate_psu_wattage(components_in_build):
         if component.tdp is not None and component.tdp > 0:
             # Add the component's TDP multiplied by its quantity to the total.
             total_tdp += (component.tdp * item.quantity)
+    return total_tdp
+
+def calculate_psu_wattage(components_in_build, total_tdp=None):
+    """
+    Calculates a recommended PSU wattage by summing the actual TDP values
+    of all components in the build from the database.
+    Pass total_tdp if estimate_load_watts() was already called.
+    """
+    if total_tdp is None:
+        total_tdp = estimate_load_watts(components_in_build)
+    base_power_others = BASE_POWER_OTHERS
 
     # If the total is still just our base value, it means no components with TDP were found.
     if total_tdp <= base_power_others:
@@ -85,4 +111,16 @@ def calculate_psu_wattage(components_in_build):
     # If the build is extremely high-power, recommend the highest standard size.
     return f"Recommended PSU: >{standard_psu_sizes[-1]}W (High-power build, Estimated Load: {total_tdp}W)"
 
+def calculate_total_price(components_in_build):
+    """
+    The total price of the build's parts (price x quantity), from items that are
+    already loaded. Same result as Build.calculate_total_price(), without its query.
+    Parts without a price count as 0.
+    """
+    total = Decimal('0.00')
+    for item in components_in_build:
+        if item.component.price is not None:
+            total += item.component.price * item.quantity
+    return total
+
 #__________________________________________________________________________________________________________________________ 
\ No newline at end of file
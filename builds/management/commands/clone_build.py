@@ -0,0 +1,48 @@
+# builds/management/commands/clone_build.py
+
+#__________________________________________________________________________________________________________________________ (akn)
+
+import time
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from builds.cloning import BATCH_SIZE, clone_build
+from builds.models import Build
+
+
+class Command(BaseCommand):
+    help = 'Copies a build (e.g. a curated guide) into many accounts at once, to seed starter builds.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('build_id', type=int, help='The build to copy.')
+        parser.add_argument('--users', nargs='+', default=[], metavar='USERNAME', help='The accounts to copy it into.')
+        parser.add_argument('--all-users', action='store_true', help='Copy it into every active member (staff accounts excluded).')
+        parser.add_argument('--copies', type=int, default=1, help='Copies per account (variants are numbered #2, #3, ...). Default: 1.')
+        parser.add_argument('--name', default=None, help='Name of the copies (default: "Copy of <build name>").')
+        parser.add_argument('--batch-size', type=int, default=BATCH_SIZE, help=f'Rows per INSERT (default: {BATCH_SIZE}).')
+
+    def handle(self, *args, **kwargs):
+        try:
+            original = Build.objects.get(pk=kwargs['build_id'])
+        except Build.DoesNotExist:
+            raise CommandError(f"There is no build with id {kwargs['build_id']}.")
+        if kwargs['copies'] < 1:
+            raise CommandError("--copies must be at least 1.")
+
+        User = get_user_model()
+        if kwargs['all_users']:
+            users = list(User.objects.filter(is_active=True, is_staff=False).order_by('pk'))
+        elif kwargs['users']:
+            users = list(User.objects.filter(username__in=kwargs['users']).order_by('pk'))
+            unknown = set(kwargs['users']) - {user.username for user in users}
+            if unknown:
+                raise CommandError(f"Unknown usernames: {', '.join(sorted(unknown))}")
+        else:
+            raise CommandError("Give --users or --all-users.")
+
+        start = time.perf_counter()
+        new_builds = clone_build(original, users, copies=kwargs['copies'], name=kwargs['name'], batch_size=kwargs['batch_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {len(new_builds):,} copies of '{original.name}' in {len(users):,} accounts in {time.perf_counter() - start:.2f}s."
+        ))
+
+#__________________________________________________________________________________________________________________________
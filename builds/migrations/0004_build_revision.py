@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-18 03:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('builds', '0003_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='build',
+            name='revision',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
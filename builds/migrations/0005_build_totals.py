@@ -0,0 +1,40 @@
+# Generated by Django 6.0 on 2026-10-18 03:55
+
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import DecimalField, F, IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def fill_totals(apps, schema_editor):
+    # The same UPDATE as builds.models.refresh_build_totals(), on the historical models.
+    Build = apps.get_model('builds', 'Build')
+    BuildComponent = apps.get_model('builds', 'BuildComponent')
+    parts = BuildComponent.objects.filter(build=OuterRef('pk')).order_by().values('build')
+    price = parts.annotate(total=Sum(F('component__price') * F('quantity'), output_field=DecimalField())).values('total')
+    tdp = parts.annotate(total=Sum(F('component__tdp') * F('quantity'), output_field=IntegerField())).values('total')
+    Build.objects.update(
+        total_price=Coalesce(Subquery(price), Value(Decimal('0')), output_field=DecimalField()),
+        total_tdp=Coalesce(Subquery(tdp), Value(0), output_field=IntegerField()),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('builds', '0004_build_revision'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='build',
+            name='total_price',
+            field=models.DecimalField(db_index=True, decimal_places=2, default=0, editable=False, max_digits=12),
+        ),
+        migrations.AddField(
+            model_name='build',
+            name='total_tdp',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fill_totals, migrations.RunPython.noop),
+    ]
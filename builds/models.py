@@ -5,7 +5,9 @@
 from django.db import models
 # This allows us to easily reference our CustomUser model from settings.py
 from django.conf import settings
-from django.db.models import Sum, F, DecimalField
+from decimal import Decimal
+from django.db.models import Sum, F, DecimalField, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
 
 # This model represents a single PC build created by a user.
 class Build(models.Model):
@@ -18,6 +20,14 @@ class Build(models.Model):
     name = models.CharField(max_length=100)
     description = models.TextField(blank=True, null=True)
     date_created = models.DateTimeField(auto_now_add=True) # Automatically set when created
+    # Goes up by one every time the build's parts (or name/description) change.
+    # The computed status (price, PSU estimate, bottleneck) is cached per revision.
+    revision = models.PositiveIntegerField(default=0, editable=False)
+    # Denormalized totals of the build's parts (price x quantity, TDP x quantity), so the
+    # guides page can sort and filter builds by price with a plain indexed column.
+    # Kept up to date by refresh_build_totals() (see its docstring for when it runs).
+    total_price = models.DecimalField(max_digits=12, decimal_places=2, default=0, editable=False, db_index=True)
+    total_tdp = models.PositiveIntegerField(default=0, editable=False)
 
     # This creates the many-to-many relationship between Build and Component.
     # We use the 'through' parameter to specify a custom intermediate table.
@@ -46,12 +56,50 @@ class Build(models.Model):
         # The aggregate function returns a dictionary, e.g., {'total_price': 1250.50}.
         # If the build is empty, the result will be None, so we return 0.00 instead.
         return total or 0.00
+
+    def bump_revision(self):
+        """
+        Marks the build as changed: adds 1 to the revision and recomputes total_price and
+        total_tdp, all in ONE UPDATE. Call it in the same transaction as the change to the
+        build's parts. The +1 happens inside the database (F()), so two requests changing
+        the build at the same moment can't both write the same number.
+        """
+        Build.objects.filter(pk=self.pk).update(revision=F('revision') + 1, **build_totals())
+        # Keeps this object in step without reading the row back (close enough for a
+        # cache key: another request's bump only makes the key newer, never reused).
+        self.revision += 1
     # ========================
 
     def __str__(self):
         return f"'{self.name}' by {self.user.username}"
 
 
+def build_totals():
+    """
+    The UPDATE values that recompute total_price / total_tdp from the build's parts:
+    correlated subqueries, so the database does the sums for every updated build.
+    """
+    parts = BuildComponent.objects.filter(build=OuterRef('pk')).order_by().values('build')
+    price = parts.annotate(total=Sum(F('component__price') * F('quantity'), output_field=DecimalField())).values('total')
+    tdp = parts.annotate(total=Sum(F('component__tdp') * F('quantity'), output_field=IntegerField())).values('total')
+    return {
+        'total_price': Coalesce(Subquery(price), Value(Decimal('0')), output_field=DecimalField()),
+        'total_tdp': Coalesce(Subquery(tdp), Value(0), output_field=IntegerField()),
+    }
+
+
+def refresh_build_totals(builds):
+    """
+    Recomputes total_price / total_tdp for a Build queryset in one UPDATE. Runs:
+      * through Build.bump_revision(), whenever a view changes a build's parts,
+      * for the builds using a component whose price or TDP may have changed
+        (a component saved or deleted, a catalog import: see builds/signals.py),
+      * for the BuildComponent rows changed in the admin (builds/admin.py).
+    Returns the number of builds updated.
+    """
+    return builds.update(**build_totals())
+
+
 # This is the "linking table" or "intermediate model".
 # It connects a Build to a Component and adds the 'quantity' field.
 class BuildComponent(models.Model):
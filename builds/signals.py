@@ -0,0 +1,92 @@
+# builds/signals.py
+
+#__________________________________________________________________________________________________________________________ (akn)
+
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from catalog.models import Component, CPU, GPU, Motherboard, RAM, Storage, PSU, Case
+from catalog.signals import components_updated
+from .models import Build, refresh_build_totals
+
+
+def _refresh_builds_using(component_ids):
+    refresh_build_totals(Build.objects.filter(buildcomponent__component_id__in=component_ids))
+
+
+def _saves_totals(raw, update_fields):
+    """Whether a save can change a build's totals: not a fixture load, and price or TDP is written."""
+    return not raw and (update_fields is None or {'price', 'tdp'} & set(update_fields))
+
+
+@receiver(pre_save, sender=Component)
+@receiver(pre_save, sender=CPU)
+@receiver(pre_save, sender=GPU)
+@receiver(pre_save, sender=Motherboard)
+@receiver(pre_save, sender=RAM)
+@receiver(pre_save, sender=Storage)
+@receiver(pre_save, sender=PSU)
+@receiver(pre_save, sender=Case)
+def remember_price_and_tdp(sender, instance, raw, update_fields, **kwargs):
+    """
+    Most saves (an admin fixing a name or specs) leave the price and TDP alone, and
+    then no build needs new totals. So we note the stored values first...
+    """
+    if instance.pk is not None and _saves_totals(raw, update_fields):
+        instance._price_and_tdp = Component.objects.filter(pk=instance.pk).values_list('price', 'tdp').first()
+
+
+@receiver(post_save, sender=Component)
+@receiver(post_save, sender=CPU)
+@receiver(post_save, sender=GPU)
+@receiver(post_save, sender=Motherboard)
+@receiver(post_save, sender=RAM)
+@receiver(post_save, sender=Storage)
+@receiver(post_save, sender=PSU)
+@receiver(post_save, sender=Case)
+def component_saved(sender, instance, created, raw, update_fields, **kwargs):
+    """...and if either changed, the builds using the component get new totals."""
+    before = instance.__dict__.pop('_price_and_tdp', None)
+    if created or not _saves_totals(raw, update_fields):
+        return  # A new component isn't in any build yet; a loaddata row may be in a half-loaded database.
+    if before == (instance.price, instance.tdp):
+        return
+    _refresh_builds_using([instance.pk])
+
+
+@receiver(pre_delete, sender=Component)
+@receiver(pre_delete, sender=CPU)
+@receiver(pre_delete, sender=GPU)
+@receiver(pre_delete, sender=Motherboard)
+@receiver(pre_delete, sender=RAM)
+@receiver(pre_delete, sender=Storage)
+@receiver(pre_delete, sender=PSU)
+@receiver(pre_delete, sender=Case)
+def remember_builds_of_deleted_component(sender, instance, **kwargs):
+    """
+    Deleting a component also deletes it from every build (CASCADE), and after that we
+    can't tell which builds those were. So we write them down before the delete...
+    """
+    instance._build_ids = list(Build.objects.filter(buildcomponent__component_id=instance.pk).values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=Component)
+@receiver(post_delete, sender=CPU)
+@receiver(post_delete, sender=GPU)
+@receiver(post_delete, sender=Motherboard)
+@receiver(post_delete, sender=RAM)
+@receiver(post_delete, sender=Storage)
+@receiver(post_delete, sender=PSU)
+@receiver(post_delete, sender=Case)
+def component_deleted(sender, instance, **kwargs):
+    """...and recompute their totals after it (still in the delete's transaction)."""
+    build_ids = getattr(instance, '_build_ids', None)
+    if build_ids:
+        refresh_build_totals(Build.objects.filter(pk__in=build_ids))
+
+
+@receiver(components_updated)
+def components_bulk_updated(sender, component_ids, **kwargs):
+    """The importer updated these components with bulk_update (no save() signals)."""
+    _refresh_builds_using(component_ids)
+
+#__________________________________________________________________________________________________________________________
@@ -1,3 +1,464 @@
-from django.test import TestCase
+import threading
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.core.cache import cache
+from django.db import connection
+from django.db.models.signals import post_save
+from django.test import Client, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from catalog.importing import ComponentImporter
+from catalog.models import CPU, GPU, Motherboard, RAM
+from catalog.snapshot import get_snapshot
+from catalog.testing import LARGE, QueryBudgetTestCase
+from .cloning import clone_build
+from .models import Build, BuildComponent, refresh_build_totals
+from .views import _load_build
+
+
+def make_user(username, **fields):
+    return get_user_model().objects.create_user(username, password='x', **fields)
+
+
+def make_cpu(name='Ryzen 5 7600', price=22000):
+    return CPU.objects.create(name=name, manufacturer='AMD', price=price, tdp=65, core_count=6, clock_speed='3.80', socket='AM5')
+
+
+def make_motherboard(name='B650 Tomahawk', price=24000, ram_slots=4):
+    return Motherboard.objects.create(name=name, manufacturer='MSI', price=price, socket='AM5', form_factor='ATX', ram_slots=ram_slots)
+
+
+def make_ram(name='Vengeance 16GB DDR5', price=6000):
+    return RAM.objects.create(name=name, manufacturer='Corsair', price=price, capacity_gb=16, speed_mhz=6000)
+
+
+def make_gpu(name='RTX 4060', price=38000):
+    return GPU.objects.create(name=name, manufacturer='NVIDIA', price=price, tdp=115, vram_gb=8, gpu_clock_speed=1830)
+
+
+def make_build(user, parts, name='Gaming build', description=''):
+    """A build with 'parts' ([(component, quantity)]) and its stored totals."""
+    build = Build.objects.create(user=user, name=name, description=description)
+    BuildComponent.objects.bulk_create([BuildComponent(build=build, component=component, quantity=quantity) for component, quantity in parts])
+    refresh_build_totals(Build.objects.filter(pk=build.pk))
+    build.refresh_from_db()
+    return build
+
+
+@override_settings(SQL_PROFILE_SAMPLE_RATE=0)
+class BuildTestCase(TestCase):
+    """A logged-in member with one build: CPU, motherboard (4 RAM slots), one stick of RAM, GPU."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = make_user('owner')
+        cls.cpu, cls.motherboard, cls.ram, cls.gpu = make_cpu(), make_motherboard(), make_ram(), make_gpu()
+        cls.build = make_build(cls.owner, [(cls.cpu, 1), (cls.motherboard, 1), (cls.ram, 1), (cls.gpu, 1)])
+
+    def setUp(self):
+        # Cached build statuses would outlive the rolled-back test data.
+        cache.clear()
+        self.client.force_login(self.owner)
+
+
+class BuildsQueryBudgets:
+    """
+    The most queries each builds view may make (see catalog/testing.py).
+    Views that change a build's parts count 2 extra: their transaction is a
+    SAVEPOINT / RELEASE pair inside the test's own transaction.
+    """
+
+    def test_home(self):
+        self.assertQueryBudget(3, 'get', reverse('home'))
+        self.assertQueryBudget(3, 'get', reverse('home'), {'q': 'build'})
+        self.assertQueryBudget(3, 'post', reverse('home'), {'name': 'New build', 'description': ''}, status=302)
+
+    def test_workbench_and_share(self):
+        self.assertQueryBudget(5, 'get', reverse('builds:workbench', args=[self.data.build.pk]))
+        self.assertQueryBudget(5, 'get', reverse('builds:share_build', args=[self.data.build.pk]))
+
+    def test_guides(self):
+        self.assertQueryBudget(3, 'get', reverse('builds:guides'))
+        self.assertQueryBudget(1, 'get', reverse('builds:guides'), {'q': 'guide'}, htmx=True)
+        self.assertQueryBudget(1, 'get', reverse('builds:guides'), {'q': 'guide 30k-60k'}, htmx=True)
+
+    def test_clone(self):
+        self.assertQueryBudget(8, 'post', reverse('builds:clone_build', args=[self.data.build.pk]), status=302)
+
+    def test_add_component(self):
+        url = reverse('builds:add_component', args=[self.data.build.pk])
+        self.assertQueryBudget(10, 'post', url, {'component_id': self.data.gpu.pk}, htmx=True)
+        self.assertQueryBudget(10, 'post', url, {'component_id': self.data.motherboard.pk}, htmx=True)
+        self.assertQueryBudget(10, 'post', url, {'component_id': self.data.ram.pk}, htmx=True)
+
+    def test_remove_component(self):
+        url = reverse('builds:remove_component', args=[self.data.build.pk])
+        self.assertQueryBudget(9, 'post', url, {'component_id': self.data.cpu.pk}, htmx=True)
+
+    def test_status(self):
+        self.assertQueryBudget(4, 'get', reverse('builds:update_status', args=[self.data.build.pk]), htmx=True)
+
+    def test_search_components(self):
+        url = reverse('builds:search_components', args=[self.data.build.pk])
+        self.assertQueryBudget(6, 'get', url, {'q': 'ryzen'}, htmx=True)
+        self.assertQueryBudget(5, 'get', url, htmx=True)
+
+    def test_edit_in_place(self):
+        build_id = self.data.build.pk
+        self.assertQueryBudget(3, 'get', reverse('builds:get_edit_form', args=[build_id]), htmx=True)
+        self.assertQueryBudget(3, 'get', reverse('builds:get_view_card', args=[build_id]), htmx=True)
+        self.assertQueryBudget(5, 'post', reverse('builds:save_build_changes', args=[build_id]), {'name': 'Renamed', 'description': 'x'}, htmx=True)
+
+    def test_delete(self):
+        self.assertQueryBudget(5, 'post', reverse('builds:delete_build', args=[self.data.build.pk]), htmx=True)
+
+    def test_wishlist(self):
+        self.assertQueryBudget(5, 'get', reverse('builds:wishlist'))
+        self.assertQueryBudget(7, 'post', reverse('builds:add_to_wishlist'), {'component_id': self.data.gpu.pk}, htmx=True)
+        self.assertQueryBudget(4, 'post', reverse('builds:remove_from_wishlist'), {'component_id': self.data.wished.pk}, htmx=True)
+
+
+class SmallBuildsQueryBudgetTests(BuildsQueryBudgets, QueryBudgetTestCase):
+    pass
+
+
+class LargeBuildsQueryBudgetTests(BuildsQueryBudgets, QueryBudgetTestCase):
+    ITEMS = LARGE
+
+
+class BuildLoadingTests(BuildTestCase):
+    """_load_build works out the whole workbench from one query for the build's parts."""
+
+    def test_one_query_for_everything(self):
+        snapshot = get_snapshot()
+        with self.assertNumQueries(1):
+            loaded = _load_build(self.build, snapshot)
+        self.assertEqual(loaded['total_price'], self.build.calculate_total_price())
+        self.assertEqual(loaded['scaffold']['CPU'].component.pk, self.cpu.pk)
+        self.assertIn(self.motherboard.pk, loaded['exclude_ids'])
+        self.assertTrue(loaded['psu_recommendation'].startswith('Recommended PSU'))
+
+
+class BuildStatusCacheTests(BuildTestCase):
+    """The computed status is cached per build revision; changing the build bumps the revision."""
+
+    def setUp(self):
+        super().setUp()
+        self.status_url = reverse('builds:update_status', args=[self.build.pk])
+
+    def test_unchanged_build_does_not_load_its_parts_again(self):
+        self.client.get(self.status_url)
+        with self.assertNumQueries(4):  # session, user, build, catalog version
+            response = self.client.get(self.status_url)
+        self.assertContains(response, 'Recommended PSU')
+
+    def test_adding_a_part_bumps_the_revision_and_the_status(self):
+        before = self.client.get(self.status_url).context['total_price']
+        self.client.post(reverse('builds:add_component', args=[self.build.pk]), {'component_id': self.ram.pk})
+
+        self.build.refresh_from_db()
+        self.assertEqual(self.build.revision, 1)
+        self.assertEqual(self.client.get(self.status_url).context['total_price'], before + self.ram.price)
+
+    def test_edit_bumps_the_revision(self):
+        self.client.post(reverse('builds:save_build_changes', args=[self.build.pk]), {'name': 'Renamed', 'description': ''})
+        self.build.refresh_from_db()
+        self.assertEqual(self.build.revision, 1)
+
+
+class BuildTotalsTests(BuildTestCase):
+    """Build.total_price / total_tdp follow every change to the parts and to the components' prices."""
+
+    def assertTotalsCurrent(self, build):
+        build.refresh_from_db()
+        self.assertEqual(build.total_price, build.calculate_total_price())
+        expected_tdp = sum((item.component.tdp or 0) * item.quantity for item in build.buildcomponent_set.select_related('component'))
+        self.assertEqual(build.total_tdp, expected_tdp)
+
+    def test_add_and_remove_keep_the_totals(self):
+        self.assertEqual(self.build.total_price, 90000)
+        self.client.post(reverse('builds:add_component', args=[self.build.pk]), {'component_id': self.ram.pk})
+        self.assertTotalsCurrent(self.build)
+        self.client.post(reverse('builds:remove_component', args=[self.build.pk]), {'component_id': self.cpu.pk})
+        self.assertTotalsCurrent(self.build)
+        self.assertEqual(self.build.total_price, 74000)
+
+    def test_clone_copies_the_totals(self):
+        self.client.post(reverse('builds:clone_build', args=[self.build.pk]))
+        clone = Build.objects.latest('pk')
+        self.assertEqual(clone.total_price, self.build.total_price)
+        self.assertTotalsCurrent(clone)
+
+    def test_component_price_change_updates_every_build_using_it(self):
+        other = make_build(self.owner, [(self.cpu, 1)], name='CPU only')
+        self.cpu.price += 100
+        self.cpu.tdp += 10
+        self.cpu.save()
+        self.assertTotalsCurrent(self.build)
+        self.assertTotalsCurrent(other)
+
+    def test_saves_that_keep_price_and_tdp_leave_the_builds_alone(self):
+        with mock.patch('builds.signals.refresh_build_totals') as refresh:
+            self.cpu.name = 'Ryzen 5 7600X'
+            self.cpu.save()
+            self.cpu.price += 100
+            self.cpu.save(update_fields=['name'])
+            self.cpu.save_base(raw=True)  # what loaddata does
+        refresh.assert_not_called()
+
+    def test_import_updates_the_totals(self):
+        ComponentImporter(CPU).run([{'name': self.cpu.name, 'manufacturer': self.cpu.manufacturer, 'price': str(self.cpu.price + 250)}])
+        self.assertTotalsCurrent(self.build)
+        self.assertEqual(self.build.total_price, 90250)
+
+    def test_deleting_a_component_updates_the_totals(self):
+        self.gpu.delete()
+        self.assertTotalsCurrent(self.build)
+
+
+@override_settings(SQL_PROFILE_SAMPLE_RATE=0)
+class GuidesSearchTests(TestCase):
+    """The guides page: staff builds, cheapest first, searched by text and total price."""
+
+    @classmethod
+    def setUpTestData(cls):
+        curator = make_user('curator', is_staff=True)
+        cpu, motherboard, ram, gpu = make_cpu(), make_motherboard(), make_ram(), make_gpu()
+        make_build(curator, [(cpu, 1), (motherboard, 1), (gpu, 1)], name='Streaming rig', description='Curated')  # 84,000
+        make_build(curator, [(cpu, 1), (ram, 1)], name='Budget guide')  # 28,000
+        make_build(curator, [(cpu, 1), (gpu, 1)], name='Gaming guide')  # 60,000
+        make_build(make_user('member'), [(cpu, 1)], name='Member guide')  # not staff: never listed
+
+    def guides(self, query=None):
+        response = self.client.get(reverse('builds:guides'), {'q': query} if query else {})
+        return [build.name for build in response.context['guide_builds']]
+
+    def test_sorted_by_the_stored_total(self):
+        self.assertEqual(self.guides(), ['Budget guide', 'Gaming guide', 'Streaming rig'])
+
+    def test_price_range_and_text(self):
+        self.assertEqual(self.guides('guide 25k-65k'), ['Budget guide', 'Gaming guide'])
+        self.assertEqual(self.guides('over 50000'), ['Gaming guide', 'Streaming rig'])
+        self.assertEqual(self.guides('<28000'), [])
+        # A number on its own is text (no guide has it in its name), not a substring of the price.
+        self.assertEqual(self.guides('28000'), [])
+
+
+@override_settings(SQL_PROFILE_SAMPLE_RATE=0)
+class ComponentSearchTests(TestCase):
+    def test_price_only_search_is_cheapest_first(self):
+        user = make_user('builder')
+        build = Build.objects.create(user=user, name='Search build')
+        for name, price in [('Athlon 3000G', 15000), ('Core i3-12100', 9000), ('Ryzen 5 5600', 11000), ('Ryzen 9 7950X', 60000)]:
+            make_cpu(name, price)
+        self.client.force_login(user)
+
+        response = self.client.get(reverse('builds:search_components', args=[build.pk]), {'q': '<20000'})
+        self.assertEqual([c.price for c in response.context['all_components']], [9000, 11000, 15000])
+
+
+class BatchCloneTests(BuildTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.curator = make_user('curator', is_staff=True)
+        cls.guide = make_build(cls.curator, [(cls.cpu, 1), (cls.ram, 2), (cls.gpu, 1)], name='Starter guide')
+        cls.members = [make_user(f'member{number}') for number in range(3)]
+
+    def setUp(self):
+        super().setUp()
+        self.url = reverse('builds:batch_clone', args=[self.guide.pk])
+
+    def test_clone_into_many_accounts_with_a_fixed_number_of_queries(self):
+        # Read the parts, insert the builds, insert the parts (+ the test's SAVEPOINT / RELEASE).
+        with self.assertNumQueries(5):
+            new_builds = clone_build(self.guide, self.members, copies=2)
+
+        self.assertEqual(len(new_builds), 6)
+        self.assertEqual(
+            [build.name for build in Build.objects.filter(user=self.members[0]).order_by('pk')],
+            ['Copy of Starter guide', 'Copy of Starter guide #2'],
+        )
+        for build in Build.objects.filter(pk__in=[build.pk for build in new_builds]):
+            self.assertEqual(list(build.buildcomponent_set.order_by('id').values_list('component_id', 'quantity')), [
+                (self.cpu.pk, 1), (self.ram.pk, 2), (self.gpu.pk, 1),
+            ])
+            self.assertEqual(build.total_price, self.guide.total_price)
+
+    def test_without_returned_ids_only_the_new_rows_are_used(self):
+        # A build of the same user and name from before the clone, even one dated later.
+        earlier = make_build(self.members[0], [], name='Copy of Starter guide')
+        Build.objects.filter(pk=earlier.pk).update(date_created=timezone.now() + timedelta(hours=1))
+
+        # What MySQL does: bulk_create() doesn't hand back the ids.
+        with mock.patch.object(type(connection.features), 'can_return_rows_from_bulk_insert', False):
+            new_builds = clone_build(self.guide, self.members)
+
+        self.assertNotIn(earlier.pk, [build.pk for build in new_builds])
+        self.assertFalse(earlier.buildcomponent_set.exists())
+        self.assertEqual(BuildComponent.objects.filter(build__in=new_builds).count(), 3 * 3)
+
+    def test_without_returned_ids_a_clone_committed_meanwhile_is_left_alone(self):
+        # A second clone for the same member (a double click) gets its build in while
+        # this one is halfway through its INSERTs.
+        others = []
+
+        def second_clone(sender, instance, created, **kwargs):
+            if created and not others and instance.user == self.members[0]:
+                others.append(None)  # Only once (the create below comes through here too).
+                others[0] = Build.objects.create(user=self.members[0], name='Copy of Starter guide')
+
+        post_save.connect(second_clone, sender=Build)
+        try:
+            with mock.patch.object(type(connection.features), 'can_return_rows_from_bulk_insert', False):
+                new_builds = clone_build(self.guide, self.members)
+        finally:
+            post_save.disconnect(second_clone, sender=Build)
+
+        self.assertEqual(len(others), 1)
+        self.assertNotIn(others[0].pk, [build.pk for build in new_builds])
+        self.assertFalse(others[0].buildcomponent_set.exists())
+        for build in new_builds:
+            self.assertEqual(build.buildcomponent_set.count(), 3)
+
+    def test_staff_page(self):
+        self.assertEqual(self.client.get(self.url).status_code, 302)  # members are sent to the login page
+
+        self.client.force_login(self.curator)
+        usernames = '\n'.join(member.username for member in self.members)
+        response = self.client.post(self.url, {'usernames': usernames, 'copies': 1, 'name': 'Starter build'})
+        self.assertContains(response, 'Created 3 builds in 3 accounts')
+        self.assertEqual(Build.objects.filter(name='Starter build').count(), 3)
+
+        response = self.client.post(self.url, {'usernames': 'nobody', 'copies': 1})
+        self.assertContains(response, 'Unknown usernames: nobody')
+
+    def test_command(self):
+        call_command('clone_build', self.guide.pk, '--users', self.members[0].username, '--copies', '3', stdout=StringIO())
+        self.assertEqual(Build.objects.filter(user=self.members[0], name__startswith='Copy of').count(), 3)
+        with self.assertRaises(CommandError):
+            call_command('clone_build', self.guide.pk, stdout=StringIO())
+
+
+class WorkbenchEditingTests(BuildTestCase):
+    """The slot rules of add / remove (builds/editing.py)."""
+
+    def ram_sticks(self):
+        return sum(BuildComponent.objects.filter(build=self.build, component__kind='RAM').values_list('quantity', flat=True))
+
+    def test_ram_stops_at_the_motherboard_slots(self):
+        url = reverse('builds:add_component', args=[self.build.pk])
+        for _ in range(6):
+            self.client.post(url, {'component_id': self.ram.pk})
+        self.assertEqual(self.ram_sticks(), 4)
+        # Only the 3 clicks that added a stick made a new revision.
+        self.build.refresh_from_db()
+        self.assertEqual(self.build.revision, 3)
+
+    def test_removing_a_part_that_is_gone_changes_nothing(self):
+        url = reverse('builds:remove_component', args=[self.build.pk])
+        self.client.post(url, {'component_id': self.gpu.pk})
+        self.client.post(url, {'component_id': self.gpu.pk})
+        self.build.refresh_from_db()
+        self.assertEqual(self.build.revision, 1)
+
+    def test_smaller_motherboard_takes_out_the_last_sticks(self):
+        BuildComponent.objects.filter(build=self.build, component=self.ram).update(quantity=2)
+        newer_ram = make_ram('Fury Beast 16GB DDR5')
+        BuildComponent.objects.create(build=self.build, component=newer_ram, quantity=2)  # 4 sticks
+        small_board = make_motherboard('B650I Aorus', ram_slots=2)
+        self.client.post(reverse('builds:add_component', args=[self.build.pk]), {'component_id': small_board.pk})
+
+        self.assertEqual(self.ram_sticks(), 2)
+        self.assertFalse(BuildComponent.objects.filter(build=self.build, component=newer_ram).exists())
+        self.assertEqual(BuildComponent.objects.get(build=self.build, component__kind='Motherboard').component_id, small_board.pk)
+        self.build.refresh_from_db()
+        self.assertEqual(self.build.total_price, self.build.calculate_total_price())
+
+    def test_someone_elses_build_is_a_404(self):
+        guide = make_build(make_user('curator', is_staff=True), [(self.cpu, 1)])
+        response = self.client.post(reverse('builds:add_component', args=[guide.pk]), {'component_id': self.ram.pk})
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(Build.objects.get(pk=guide.pk).revision, 0)
+
+
+@override_settings(SQL_PROFILE_SAMPLE_RATE=0)
+class ConcurrentEditingTests(TransactionTestCase):
+    """
+    Many clients clicking add / remove on the same build at the same moment, each in
+    its own thread and database connection: no click may be lost or go over the slots.
+    """
+    CLIENTS = 8
+
+    def setUp(self):
+        if connection.vendor == 'sqlite' and connection.is_in_memory_db():
+            # Threads can't share an in-memory test database (give it a TEST NAME to run this).
+            self.skipTest('needs a test database on disk')
+        cache.clear()
+        self.owner = make_user('owner')
+        self.ram = make_ram()
+        # Two sticks of another RAM already in the 4 slots, so self.ram has 2 free slots.
+        self.build = make_build(self.owner, [(make_cpu(), 1), (make_motherboard(), 1), (make_ram('Fury Beast 16GB DDR5'), 2)])
+        self.free_slots = 2
+
+    def hammer(self, url_name, component_id, clicks):
+        """Every client posts 'clicks' times, all starting together. Returns the query counts."""
+        url = reverse(url_name, args=[self.build.pk])
+        get_snapshot()  # loaded once per process, as on a running server
+        clients = []
+        for _ in range(self.CLIENTS):
+            client = Client()
+            client.force_login(self.owner)
+            clients.append(client)
+        start = threading.Barrier(self.CLIENTS)
+        query_counts, errors = [], []
+
+        def click(client):
+            try:
+                start.wait()
+                for _ in range(clicks):
+                    with CaptureQueriesContext(connection) as captured:
+                        response = client.post(url, {'component_id': component_id}, HTTP_HX_REQUEST='true')
+                    if response.status_code != 200:
+                        errors.append(response.status_code)
+                    query_counts.append(len(captured))
+            except Exception as error:
+                errors.append(error)
+            finally:
+                connection.close()  # each thread has its own connection
+
+        threads = [threading.Thread(target=click, args=(client,)) for client in clients]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        return query_counts
+
+    def test_many_clients_adding_and_removing_ram(self):
+        ram = self.ram
+        counts = self.hammer('builds:add_component', ram.pk, clicks=3)
+        # Never more sticks than slots, whatever order the clicks were applied in.
+        self.assertEqual(BuildComponent.objects.get(build=self.build, component=ram).quantity, self.free_slots)
+        # Every click that added a stick bumped the revision once (none was lost);
+        # the clicks that found no free slot changed nothing.
+        self.build.refresh_from_db()
+        self.assertEqual(self.build.revision, self.free_slots)
+        self.assertEqual(self.build.total_price, self.build.calculate_total_price())
+        # session, user, catalog version, BEGIN, lock, parts, insert or update, totals, COMMIT
+        self.assertLessEqual(max(counts), 9)
+
+        counts = self.hammer('builds:remove_component', ram.pk, clicks=1)
+        self.assertFalse(BuildComponent.objects.filter(build=self.build, component=ram).exists())
+        self.assertEqual(BuildComponent.objects.filter(build=self.build, component__kind='RAM').count(), 1)
+        self.build.refresh_from_db()
+        self.assertEqual(self.build.revision, self.free_slots * 2)
+        self.assertEqual(self.build.total_price, self.build.calculate_total_price())
+        self.assertLessEqual(max(counts), 9)
@@ -20,6 +20,8 @@ urlpatterns = [
     path('guides/', views.guides_view, name='guides'),
 
     path('clone/<int:build_id>/', views.clone_build_view, name='clone_build'),
+    # Staff only: the same build cloned into many accounts at once.
+    path('clone/<int:build_id>/batch/', views.batch_clone_view, name='batch_clone'),
 
     # This URL will handle the HTMX POST request.
     path('<int:build_id>/add-component/', views.add_component_to_build, name='add_component'),
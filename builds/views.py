@@ -3,17 +3,26 @@
 #_________________________________________________________________________________________________________________________ (akn)
 
 from django.shortcuts import render, redirect
+from django.urls import reverse
+from django.utils.http import urlencode
 from django.contrib.auth.decorators import login_required
+from django.contrib.admin.views.decorators import staff_member_required
 from django.http import Http404, HttpResponse, HttpResponseForbidden
 from .models import Build, BuildComponent, WishlistItem
 from catalog.models import Component
+from catalog.search import search_queryset
+from catalog.query import parse_search_query
+from catalog.pagination import keyset_page
+from catalog.snapshot import get_snapshot
 from django.shortcuts import get_object_or_404
-from .logic import detect_bottleneck, calculate_psu_wattage
-from django.db.models import Q, Sum, F, DecimalField, CharField
-from django.db import models
-from .forms import BuildForm
-from django.db.models.functions import Cast
+from .logic import BuildItem, detect_bottleneck, calculate_psu_wattage, calculate_total_price, estimate_load_watts
+from django.db.models import Q, Prefetch
+from django.db import transaction
+from .forms import BatchCloneForm, BuildForm
+from .cloning import clone_build
+from .editing import add_part, lock_build, remove_part
 from django.utils import timezone
+from django.core.cache import cache
 
 # This is the view for our new homepage.
 def home_view(request):
@@ -76,10 +85,35 @@ def home_view(request):
 # redirect them to the login page.
 # builds/views.py -> workbench_view
 
-def _get_build_scaffold(build):
+def _get_build_items(build, snapshot=None):
+    """
+    Loads the parts of a build with ONE small query (ids and quantities only).
+    The component details come from the in-memory catalog snapshot (catalog/snapshot.py),
+    so the scaffold, the bottleneck check and the PSU calculator never touch the ORM.
+    """
+    snapshot = snapshot or get_snapshot()
+    items = []
+    rows = BuildComponent.objects.filter(build=build).order_by('id').values_list('id', 'component_id', 'quantity')
+    for item_id, component_id, quantity in rows:
+        component = snapshot.get(component_id)
+        if component is not None:
+            items.append(BuildItem(item_id, component, quantity))
+    return items
+
+
+def _lock_build_or_404(build_id, user):
+    """lock_build() (builds/editing.py) with a 404 for someone else's or a missing build."""
+    try:
+        return lock_build(build_id, user)
+    except Build.DoesNotExist:
+        raise Http404("Build not found")
+
+
+def _get_build_scaffold(build, components_in_build=None):
     """
     A helper function to build the complete scaffold dictionary for a given build.
     This avoids repeating this complex logic in multiple views.
+    Pass the build's items if the view already loaded them.
     """
     scaffold = {
         'CPU': None, 'Motherboard': None, 'GPU': None,
@@ -89,10 +123,8 @@ def _get_build_scaffold(build):
     # Define the number of storage slots you want to show in the UI
     TOTAL_STORAGE_SLOTS = 2
 
-    components_in_build = BuildComponent.objects.filter(build=build).select_related(
-        'component__cpu', 'component__gpu', 'component__motherboard', 
-        'component__ram', 'component__storage', 'component__psu', 'component__case'
-    )
+    if components_in_build is None:
+        components_in_build = _get_build_items(build)
     motherboard = None
 
     for item in components_in_build:
@@ -101,7 +133,7 @@ def _get_build_scaffold(build):
         if component_type in ['CPU', 'Motherboard', 'GPU', 'PSU', 'Case']:
             scaffold[component_type] = item
             if component_type == 'Motherboard':
-                motherboard = item.component.motherboard
+                motherboard = item.component
         elif component_type == 'RAM':
             for _ in range(item.quantity):
                 scaffold['RAM'].append(item)
@@ -129,79 +161,111 @@ def _get_build_scaffold(build):
         
     return scaffold
 
+
+# How long a computed build status stays in the cache. Stale entries are never
+# served (the key changes with the build and the catalog); this just frees memory.
+STATUS_CACHE_SECONDS = 60 * 60
+
+
+def _status_cache_key(build, snapshot):
+    """
+    The build's id and revision, plus the catalog version: a price or TDP change
+    in the catalog changes the status of every build that uses the component.
+    (date_created too, in case the database hands a deleted build's id to a new one.)
+    """
+    return f"build-status:{build.pk}:{build.date_created.timestamp()}:{build.revision}:{snapshot.version[1]}"
+
+
+def _get_build_status(build, snapshot, components_in_build=None):
+    """
+    The computed status of a build: total price, estimated load, PSU recommendation
+    and bottleneck check. Cached per build revision, so looking at an unchanged build
+    again doesn't load its parts at all. Pass the items if the view already loaded them.
+    """
+    key = _status_cache_key(build, snapshot)
+    status = cache.get(key)
+    if status is None:
+        if components_in_build is None:
+            components_in_build = _get_build_items(build, snapshot)
+        scaffold = _get_build_scaffold(build, components_in_build)
+        # The scaffold already has the CPU and GPU items in their slots.
+        bottleneck_level, bottleneck_message = detect_bottleneck(scaffold['CPU'], scaffold['GPU'])
+        load_watts = estimate_load_watts(components_in_build)
+        status = {
+            'bottleneck_level': bottleneck_level,
+            'bottleneck_message': bottleneck_message,
+            'load_watts': load_watts,
+            'psu_recommendation': calculate_psu_wattage(components_in_build, load_watts),
+            # Summed from the loaded items instead of build.calculate_total_price()'s extra query.
+            'total_price': calculate_total_price(components_in_build),
+        }
+        cache.set(key, status, STATUS_CACHE_SECONDS)
+    return status
+
+
+def _load_build(build, snapshot=None):
+    """
+    Everything the workbench and share pages show about a build, worked out from ONE
+    load of its parts (_get_build_items): the scaffold, the ids to hide from the parts
+    picker, and the status (_get_build_status, from the cache when it's there).
+    Returns a dict the views put straight into their template context.
+    """
+    snapshot = snapshot or get_snapshot()
+    components_in_build = _get_build_items(build, snapshot)
+    return {
+        'scaffold': _get_build_scaffold(build, components_in_build),
+        'exclude_ids': _unique_component_ids(components_in_build),
+        **_get_build_status(build, snapshot, components_in_build),
+    }
+
 # builds/views.py -> workbench_view
 
 @login_required
 def workbench_view(request, build_id):
     build = get_object_or_404(Build, pk=build_id, user=request.user)
-    
-    # Call the helper function to get the scaffold
-    scaffold = _get_build_scaffold(build)
 
-    # --- Determine Available Components ---
-    components_in_build = BuildComponent.objects.filter(build=build)
-    unique_types_in_build = ['CPU', 'Motherboard', 'GPU', 'PSU', 'Case']
-    unique_component_ids_to_exclude = []
-    for item in components_in_build:
-        if item.component.get_type() in unique_types_in_build:
-            unique_component_ids_to_exclude.append(item.component.id)
-    all_components = Component.objects.exclude(id__in=unique_component_ids_to_exclude).order_by('name')
-
-    # --- Perform Calculations ---
-    cpu_item = scaffold['CPU']
-    gpu_item = scaffold['GPU']
-    
-    # Pass these complete items to the updated function.
-    bottleneck_level, bottleneck_message = detect_bottleneck(cpu_item, gpu_item)
-    # The PSU calculator already uses the correct approach, so it stays the same.
-    psu_recommendation = calculate_psu_wattage(components_in_build)
+    # The build's parts are loaded once; the scaffold, the status and the price all come from them.
+    snapshot = get_snapshot()
+    loaded = _load_build(build, snapshot)
 
-    total_price = build.calculate_total_price()
+    # --- Determine Available Components ---
+    # Only the first page goes into the parts picker; it loads more as the user scrolls.
+    # The snapshot is already sorted by name, so this needs no query.
+    all_components, next_cursor = snapshot.page('name', exclude=loaded.pop('exclude_ids'))
+    next_page_url = None
+    if next_cursor:
+        next_page_url = reverse('builds:search_components', args=[build.id]) + '?' + urlencode({'cursor': next_cursor})
 
     context = {
         'build': build,
-        'scaffold': scaffold,
         'all_components': all_components,
-        'bottleneck_level': bottleneck_level,
-        'bottleneck_message': bottleneck_message,
-        'psu_recommendation': psu_recommendation,
-        'total_price': total_price,
+        'next_page_url': next_page_url,
+        **loaded,  # scaffold, bottleneck_level/message, psu_recommendation, total_price
     }
 
     return render(request, 'builds/workbench.html', context)
 
+def _unique_component_ids(components_in_build):
+    """Ids of the one-per-build parts (CPU, Motherboard, ...) already in the build, to hide from the picker."""
+    unique_types_in_build = ['CPU', 'Motherboard', 'GPU', 'PSU', 'Case']
+    return {item.component.id for item in components_in_build if item.component.get_type() in unique_types_in_build}
+
 # This is the new view for the public share page.
 # Notice there is NO @login_required decorator. This page is accessible to everyone.
 def share_build_view(request, build_id):
     # We use get_object_or_404 to fetch the build. If a build with this ID
     # doesn't exist, it will automatically show a "Page Not Found" error.
     # CRUCIALLY, we are NOT checking if build.user == request.user.
-    build = get_object_or_404(Build, pk=build_id)
-
-    # We use the same powerful _get_build_scaffold helper function.
-    # This is a great example of code reuse (DRY principle).
-    scaffold = _get_build_scaffold(build)
-    
-    # We also need to fetch all the components to pass to the PSU calculator.
-    components_in_build = BuildComponent.objects.filter(build=build)
+    # select_related: the page shows build.user.username.
+    build = get_object_or_404(Build.objects.select_related('user'), pk=build_id)
 
-    # --- Perform the same calculations as the workbench ---
-    # This ensures the public view shows the same intelligence.
-    cpu_item = scaffold['CPU']
-    gpu_item = scaffold['GPU']
-    bottleneck_level, bottleneck_message = detect_bottleneck(cpu_item, gpu_item)
-    psu_recommendation = calculate_psu_wattage(components_in_build)
-    total_price = build.calculate_total_price()
+    # We use the same _load_build helper as the workbench (DRY principle),
+    # so the public view shows the same intelligence.
+    loaded = _load_build(build)
+    loaded.pop('exclude_ids')  # no parts picker on the share page
 
     # We package up all the data into a context dictionary.
-    context = {
-        'build': build,
-        'scaffold': scaffold,
-        'bottleneck_level': bottleneck_level,
-        'bottleneck_message': bottleneck_message,
-        'psu_recommendation': psu_recommendation,
-        'total_price': total_price,
-    }
+    context = {'build': build, **loaded}
 
     # We will render a NEW template called 'share_build.html'.
     return render(request, 'builds/share_build.html', context)
@@ -209,30 +273,22 @@ def share_build_view(request, build_id):
 # This is the new view for the public guides page.
 # It does not require a login.
 def guides_view(request):
-    # Step 1: Annotate to create the 'total_price' field.
-    all_guides = Build.objects.filter(user__is_staff=True).annotate(
-        total_price=Sum(
-            F('components__price') * F('buildcomponent__quantity'),
-            output_field=DecimalField()
+    # Step 1: The staff builds. total_price is a column on Build (kept up to date
+    # whenever the parts or their prices change), so there's nothing to add up here.
+    all_guides = Build.objects.filter(user__is_staff=True)
+
+    # Step 2: Apply the search box query (catalog/query.py): price constraints such as
+    # '<50000' or '30k-60k' become plain comparisons on the indexed total_price column,
+    # and the rest of the query is searched for in the name and description.
+    search_query = parse_search_query(request.GET.get('q', ''))
+    all_guides = search_query.filter_price(all_guides, 'total_price')
+    if search_query.text:
+        all_guides = all_guides.filter(
+            Q(name__icontains=search_query.text) | Q(description__icontains=search_query.text)
         )
-    )
 
-    # Step 2: Apply a single, universal filter if a search query exists.
-    search_query = request.GET.get('q', None)
-    if search_query:
-        # We need to tell Cast what kind of text field to use.
-        # This is the robust way to do it.
-        all_guides = all_guides.annotate(
-            total_price_str=Cast('total_price', output_field=CharField())
-        ).filter(
-            Q(name__icontains=search_query) |
-            Q(description__icontains=search_query) |
-            # Now we filter on the new annotated string field.
-            Q(total_price_str__icontains=search_query)
-        )
-
-    # Step 3: Order the final, filtered queryset.
-    guide_builds = all_guides.order_by('total_price')
+    # Step 3: Order the final, filtered queryset (by the indexed total_price column).
+    guide_builds = all_guides.order_by('total_price', 'pk')
 
     context = {
         'guide_builds': guide_builds,
@@ -252,33 +308,40 @@ def clone_build_view(request, build_id):
         # Step 1: Get the original build we want to clone.
         original_build = get_object_or_404(Build, pk=build_id)
 
-        # Step 2: Create a brand new Build instance from scratch.
-        # This is more explicit and safer than copying the object.
-        new_build = Build.objects.create(
-            user=request.user, # Assign to the current logged-in user
-            name=f"Copy of {original_build.name}",
-            description=original_build.description
-        )
-        # The date_created is handled automatically by the model.
-
-        # Step 3: Get all the component entries from the original build.
-        original_components = original_build.buildcomponent_set.all()
-
-        # Step 4: Loop through the original components and create a new one for each.
-        # This is the most reliable way to ensure correct creation.
-        for item in original_components:
-            BuildComponent.objects.create(
-                build=new_build,          # Link to our new build
-                component=item.component, # Link to the SAME component
-                quantity=item.quantity    # Copy the quantity
-            )
+        # Step 2: Copy it, with all its parts, into the current user's account.
+        # clone_build (builds/cloning.py) does it in one transaction with bulk INSERTs;
+        # the same function seeds thousands of copies for the staff batch clone.
+        [new_build] = clone_build(original_build, [request.user])
 
-        # Step 5: Redirect the user to their new workbench.
+        # Step 3: Redirect the user to their new workbench.
         return redirect('builds:workbench', build_id=new_build.id)
 
     # If someone tries to access this URL with a GET request, just send them home.
     return redirect('home')
 
+# Staff only: copies a build (usually a curated guide) into many accounts at once,
+# e.g. to seed starter builds for a batch of new members.
+@staff_member_required
+def batch_clone_view(request, build_id):
+    original_build = get_object_or_404(Build, pk=build_id)
+    cloned = None
+    if request.method == 'POST':
+        form = BatchCloneForm(request.POST)
+        if form.is_valid():
+            new_builds = clone_build(
+                original_build,
+                form.cleaned_data['users'],
+                copies=form.cleaned_data['copies'],
+                name=form.cleaned_data['name'],
+            )
+            cloned = {'builds': len(new_builds), 'accounts': len(form.cleaned_data['users'])}
+            form = BatchCloneForm()
+    else:
+        form = BatchCloneForm()
+
+    context = {'build': original_build, 'form': form, 'cloned': cloned}
+    return render(request, 'builds/batch_clone.html', context)
+
 @login_required
 def delete_build_view(request, build_id):
     # This action must be a POST request for security.
@@ -302,100 +365,31 @@ def delete_build_view(request, build_id):
 @login_required
 def add_component_to_build(request, build_id):
     if request.method == 'POST':
-        build = get_object_or_404(Build, pk=build_id, user=request.user)
         component_id = request.POST.get('component_id')
-        component_to_add = get_object_or_404(Component, pk=component_id)
-
-        component_type = component_to_add.get_type()
-        
-        # --- Logic for Unique, Swappable Components ---
-        if component_type in ['CPU', 'Motherboard', 'GPU', 'PSU', 'Case']:
-            # Find if a component of the same type already exists.
-            # This is a much more direct and safer way to query.
-            existing_component_item = BuildComponent.objects.filter(
-                build=build, 
-                component__in=Component.objects.filter(**{f'{component_type.lower()}__isnull': False})
-            ).first()
-
-            # If one exists, delete it.
-            if existing_component_item:
-                existing_component_item.delete()
-            
-            # Create the new one.
-            BuildComponent.objects.create(build=build, component=component_to_add, quantity=1)
-
-            if component_type == 'Motherboard':
-                # Get the new motherboard's slot count.
-                new_ram_slot_limit = component_to_add.motherboard.ram_slots
-
-                # Get all RAM items currently in the build.
-                ram_items_in_build = BuildComponent.objects.filter(
-                    build=build,
-                    component__ram__isnull=False
-                )
-
-                # Calculate the total number of RAM sticks (sum of quantities).
-                total_ram_sticks = ram_items_in_build.aggregate(
-                    total=models.Sum('quantity')
-                )['total'] or 0
-
-                # If we have more sticks than the new limit, we must remove them.
-                if total_ram_sticks > new_ram_slot_limit:
-                    sticks_to_remove = total_ram_sticks - new_ram_slot_limit
-                    
-                    # We remove sticks one by one, starting from the last ones added
-                    # (or by any consistent order).
-                    for ram_item in ram_items_in_build.order_by('-id'):
-                        if sticks_to_remove <= 0:
-                            break # We've removed enough.
-                        
-                        if ram_item.quantity <= sticks_to_remove:
-                            # If we need to remove more sticks than this item has, delete it entirely.
-                            sticks_to_remove -= ram_item.quantity
-                            ram_item.delete()
-                        else:
-                            # If this item has more sticks than we need to remove, just decrease quantity.
-                            ram_item.quantity -= sticks_to_remove
-                            ram_item.save()
-                            sticks_to_remove = 0
-
-        # --- Logic for Stackable Components (RAM, Storage) ---
-        else:
-            # Check if we are at the slot limit for this type.
-            limit = float('inf')  # Default to no limit
-            
-            # Get the current count of items of this type.
-            current_items_count = BuildComponent.objects.filter(
-                build=build,
-                component__in=Component.objects.filter(**{f'{component_type.lower()}__isnull': False})
-            ).aggregate(total_quantity=models.Sum('quantity'))['total_quantity'] or 0
-
-            if component_type == 'RAM':
-                motherboard_item = BuildComponent.objects.filter(build=build, component__motherboard__isnull=False).first()
-                limit = motherboard_item.component.motherboard.ram_slots if motherboard_item else 4
-            elif component_type == 'Storage':
-                TOTAL_STORAGE_SLOTS = 2 # As defined in your scaffold logic
-                limit = TOTAL_STORAGE_SLOTS
-
-            # Only add the component if we are not at the limit.
-            if current_items_count < limit:
-                # Try to get the exact same component to increment its quantity.
-                build_component, created = BuildComponent.objects.get_or_create(
-                    build=build,
-                    component=component_to_add,
-                    defaults={'quantity': 1}
-                )
-                if not created:
-                    build_component.quantity += 1
-                    build_component.save()
+        # The type and specs we need for the slot rules come from the catalog snapshot.
+        snapshot = get_snapshot()
+        component_to_add = snapshot.get(component_id)
+        if component_to_add is None:
+            raise Http404("Component not found")
+
+        # Lock the build, check the slot rules against its parts and write the change,
+        # all in one transaction, so quick double clicks are applied one after the
+        # other instead of overwriting each other (see builds/editing.py).
+        with transaction.atomic():
+            build = _lock_build_or_404(build_id, request.user)
+            components_in_build, changed = add_part(build, _get_build_items(build, snapshot), component_to_add)
+            if changed:
+                build.bump_revision()
         
         # --- This part remains the same ---
         # After any modification, re-render the scaffold and send it back.
-        scaffold = _get_build_scaffold(build)
+        # (add_part() returned the parts after the change, so they aren't loaded again.)
+        scaffold = _get_build_scaffold(build, components_in_build)
         context = {'scaffold': scaffold, 'build': build}
         
-        html = render(request, 'builds/partials/scaffold_list.html', context)
-        response = HttpResponse(html)
+        # render() already returns the response. (Wrapping it in another HttpResponse closed it
+        # early, which fired request_finished in the middle of the request and dropped the DB connection.)
+        response = render(request, 'builds/partials/scaffold_list.html', context)
         response['HX-Trigger'] = 'componentAdded'
         return response
 
@@ -406,60 +400,34 @@ def update_build_status(request, build_id):
     build = get_object_or_404(Build, pk=build_id, user=request.user)
     
     # === SIMPLIFIED LOGIC ===
-    # 1. Get the perfectly prepared scaffold.
-    scaffold = _get_build_scaffold(build)
-    
-    # 2. Get all components for the PSU calculation.
-    components_in_build = BuildComponent.objects.filter(build=build).select_related('component')
-
-    # 3. Extract the CPU and GPU directly from the scaffold.
-    # The .component is the base Component, .component.cpu is the specific CPU child.
-    cpu_item = scaffold['CPU']
-    gpu_item = scaffold['GPU']
-
-    # Pass these complete items to our robust detect_bottleneck function.
-    bottleneck_level, bottleneck_message = detect_bottleneck(cpu_item, gpu_item)
-    # The PSU calculator was already correct, so it stays the same.
-    psu_recommendation = calculate_psu_wattage(components_in_build)
-
-    total_price = build.calculate_total_price()
-
-    context = {
-        'bottleneck_level': bottleneck_level,
-        'bottleneck_message': bottleneck_message,
-        'psu_recommendation': psu_recommendation,
-        'total_price': total_price,
-    }
+    # HTMX asks for this after every add/remove. If the build hasn't changed since the
+    # last time, the status comes straight from the cache without loading the parts.
+    context = _get_build_status(build, get_snapshot())
     
     return render(request, 'builds/partials/system_status.html', context)
 
 @login_required
 def remove_component_from_build(request, build_id):
     if request.method == 'POST':
-        build = get_object_or_404(Build, pk=build_id, user=request.user)
         component_id_to_remove = request.POST.get('component_id')
-        
-        try:
-            item_to_remove = BuildComponent.objects.get(
-                build=build, 
-                component_id=component_id_to_remove
-            )
-            
-            if item_to_remove.quantity > 1:
-                item_to_remove.quantity -= 1
-                item_to_remove.save()
-            else:
-                item_to_remove.delete()
-        except BuildComponent.DoesNotExist:
-            pass # Ignore if it's already gone
+        snapshot = get_snapshot()
+
+        # Same as adding: lock the build, then change the quantity in the database (F()).
+        # Removing something that's already gone (the second of two clicks) does nothing.
+        with transaction.atomic():
+            build = _lock_build_or_404(build_id, request.user)
+            components_in_build, changed = remove_part(build, _get_build_items(build, snapshot), component_id_to_remove)
+            if changed:
+                build.bump_revision()
 
         # === THE SIMPLIFIED PART ===
         # After removing, just call the master helper function.
-        scaffold = _get_build_scaffold(build)
+        scaffold = _get_build_scaffold(build, components_in_build)
         context = {'scaffold': scaffold, 'build': build} # Pass build for the remove URL
         
-        html = render(request, 'builds/partials/scaffold_list.html', context)
-        response = HttpResponse(html)
+        # render() already returns the response. (Wrapping it in another HttpResponse closed it
+        # early, which fired request_finished in the middle of the request and dropped the DB connection.)
+        response = render(request, 'builds/partials/scaffold_list.html', context)
         response['HX-Trigger'] = 'componentRemoved'
         return response
 
@@ -474,31 +442,34 @@ def search_components(request, build_id):
     # We still need the build to know which components to exclude.
     build = get_object_or_404(Build, pk=build_id, user=request.user)
     
-    components_in_build = BuildComponent.objects.filter(build=build)
-    
     # Get the IDs of components that are of a "unique" type (CPU, Mobo, etc.)
     # so we can exclude them from the search results if they are already in the build.
-    unique_types_in_build = ['CPU', 'Motherboard', 'GPU', 'PSU', 'Case']
-    unique_component_ids_to_exclude = []
-    for item in components_in_build:
-        if item.component.get_type() in unique_types_in_build:
-            unique_component_ids_to_exclude.append(item.component.id)
-
-    # Start with all components, excluding the unique ones already in the build.
-    available_components = Component.objects.exclude(id__in=unique_component_ids_to_exclude)
-
-    # If a search term was provided, filter the queryset.
-    if search_term:
-        # Q objects are used for complex queries. This line means:
-        # "WHERE name CONTAINS search_term OR manufacturer CONTAINS search_term"
-        # The 'i' in 'icontains' makes the search case-insensitive.
-        available_components = available_components.filter(
-            Q(name__icontains=search_term) | Q(manufacturer__icontains=search_term)
-        )
+    snapshot = get_snapshot()
+    unique_component_ids_to_exclude = _unique_component_ids(_get_build_items(build, snapshot))
+
+    # One page at a time. The 'cursor' parameter asks for the page after the previous one.
+    # The search box understands price constraints like '<20000' (catalog/query.py).
+    search_query = parse_search_query(search_term)
+    if search_query:
+        available_components = search_query.filter_price(Component.objects.exclude(id__in=unique_component_ids_to_exclude))
+        if search_query.text:
+            # Filter through the search index (catalog/search.py) and show the best matches first.
+            available_components = search_queryset(available_components, search_query.text, rank=True)
+            page, next_cursor = keyset_page(available_components, 'relevance', request.GET.get('cursor'))
+        else:
+            # Only a price constraint: cheapest first.
+            page, next_cursor = keyset_page(available_components, 'price_asc', request.GET.get('cursor'))
+    else:
+        # Without a search it is the same name-sorted list as the workbench, from the snapshot.
+        page, next_cursor = snapshot.page('name', request.GET.get('cursor'), exclude=unique_component_ids_to_exclude)
+    next_page_url = None
+    if next_cursor:
+        next_page_url = request.path + '?' + urlencode({'q': search_term, 'cursor': next_cursor})
 
     context = {
         'build': build,
-        'all_components': available_components.order_by('name') # Pass the filtered list
+        'all_components': page, # Pass the filtered list
+        'next_page_url': next_page_url,
     }
 
     # Render and return the partial template containing ONLY the list.
@@ -521,6 +492,7 @@ def save_build_changes(request, build_id):
         form = BuildForm(request.POST, instance=build)
         if form.is_valid():
             form.save() # Save the changes to the database
+            build.bump_revision()
             # After saving, return the "view" partial with the updated data
             context = {'build': build, 'request': request} # Pass request for the absolute URL
             return render(request, 'builds/partials/build_card_view.html', context)
@@ -537,7 +509,9 @@ def get_view_card(request, build_id):
 
 @login_required
 def wishlist_view(request):
-    wishlist_items = WishlistItem.objects.filter(user=request.user).select_related('component')
+    wishlist_items = WishlistItem.objects.filter(user=request.user).prefetch_related(
+        Prefetch('component', queryset=Component.objects.polymorphic())
+    )
     context = {
         'wishlist_items': wishlist_items
     }
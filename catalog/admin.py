@@ -3,7 +3,7 @@
 #__________________________________________________________________________________________________________________________ (akn)
 
 from django.contrib import admin
-from .models import Component, CPU, GPU, Motherboard, RAM, Storage, PSU, Case, Review
+from .models import Component, CPU, GPU, Motherboard, RAM, Storage, PSU, Case, Review, QuarantinedRow
 
 # The simplest way to register a model.
 admin.site.register(Component)
@@ -16,4 +16,12 @@ admin.site.register(PSU)
 admin.site.register(Case)
 admin.site.register(Review)
 
+
+@admin.register(QuarantinedRow)
+class QuarantinedRowAdmin(admin.ModelAdmin):
+    # Rejected import rows; fix the cleaners, then run 'manage.py reimport_quarantine'.
+    list_display = ('kind', 'source', 'row_number', 'error', 'attempts', 'last_attempt_at')
+    list_filter = ('kind', 'source')
+    search_fields = ('error',)
+
 #__________________________________________________________________________________________________________________________ 
\ No newline at end of file
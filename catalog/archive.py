@@ -0,0 +1,180 @@
+# catalog/archive.py
+
+#__________________________________________________________________________________________________________________________ (akn)
+
+"""
+Catalog snapshot files ('manage.py snapshot_catalog' / 'manage.py restore_catalog').
+
+catalog_data.json is a Django fixture: one indented JSON object per row per table
+(a CPU is two objects, its catalog_component row and its catalog_cpu row), and
+loaddata reads it back one object and one save() at a time, with the search index
+rebuilt by a signal after every component.
+
+A snapshot file instead stores the catalog COLUMN BY COLUMN:
+
+    {"format": "buildforge-catalog", "version": 1,
+     "tables": {"CPU": {"columns": ["id", "kind", "name", ..., "socket", "core_count"],
+                        "rows": 55,
+                        "data": [[1, 2, ...], ["CPU", "CPU", ...], ...]},   <- one list per column
+                "GPU": {...}, ..., "search_terms": {...}}}
+
+gzipped. One table per component kind holds the parent columns and the kind's own
+columns together; repeated values in a column (kinds, manufacturers, sockets)
+compress very well. Restoring is one json.loads and, per table, one multi-row
+INSERT per database table.
+
+The reviews aren't in a snapshot (they belong to users, not to the catalog), so
+neither is the rating summary kept from them (rating_avg / rating_count /
+rating_histogram): restored components start with no ratings, and a summary
+column in an older file is ignored.
+
+The version number changes whenever the layout does. Columns are matched by name,
+so a snapshot still restores after a field is added (it gets its default) or
+removed (the column is skipped).
+
+Tests can use it too: restore_snapshot(read_snapshot(path)) in setUpTestData()
+fills a test database with a real-sized catalog in a fraction of a second.
+"""
+
+import gzip
+import json
+from decimal import Decimal
+from django.core.management.color import no_style
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, models, transaction
+from .models import CatalogVersion, Component, ComponentSearchTerm, KIND_MODEL_MAP
+
+FORMAT = 'buildforge-catalog'
+VERSION = 1
+SEARCH_TERMS = 'search_terms'
+PLAIN = 'Component'  # components without a kind (no row in any child table)
+INSERT_BATCH_SIZE = 5000
+
+# Component's rating summary, worked out from the reviews, which a snapshot doesn't hold.
+RATING_COLUMNS = {'rating_avg', 'rating_count', 'rating_histogram'}
+# The columns of Component, in table order (id, kind, name, ...).
+BASE_COLUMNS = [field.attname for field in Component._meta.concrete_fields if field.attname not in RATING_COLUMNS]
+
+
+class SnapshotError(ValueError):
+    """The file isn't a catalog snapshot, or is from a newer version of this code."""
+
+
+def kind_columns(ModelClass):
+    """All columns of one kind: Component's, then the kind's own (without the link to Component)."""
+    return BASE_COLUMNS + [field.attname for field in ModelClass._meta.local_concrete_fields if not field.primary_key]
+
+
+# ==============================================================================
+# WRITING A SNAPSHOT
+# ==============================================================================
+def _table(columns, rows):
+    # zip(*rows) turns the rows into columns; an empty table still gets its columns.
+    return {'columns': columns, 'rows': len(rows), 'data': [list(column) for column in zip(*rows)] or [[] for _ in columns]}
+
+
+def write_snapshot(path):
+    """Writes the whole catalog (every kind, plus the search index) to 'path'. Returns {table: rows}."""
+    tables = {}
+    for kind, ModelClass in KIND_MODEL_MAP.items():
+        columns = kind_columns(ModelClass)
+        tables[kind] = _table(columns, list(ModelClass.objects.order_by('pk').values_list(*columns)))
+    plain = list(Component.objects.filter(kind='').order_by('pk').values_list(*BASE_COLUMNS))
+    if plain:
+        tables[PLAIN] = _table(BASE_COLUMNS, plain)
+    search_columns = ['component_id', 'term', 'weight']
+    tables[SEARCH_TERMS] = _table(search_columns, list(ComponentSearchTerm.objects.order_by('component_id', 'term').values_list(*search_columns)))
+
+    document = {'format': FORMAT, 'version': VERSION, 'tables': tables}
+    with gzip.open(path, 'wt', encoding='utf-8', compresslevel=9) as f:
+        # Decimals (prices, clock speeds) are written as strings, like dumpdata does.
+        json.dump(document, f, cls=DjangoJSONEncoder, separators=(',', ':'), ensure_ascii=False)
+    return {name: table['rows'] for name, table in tables.items()}
+
+
+def read_snapshot(path):
+    """Reads and checks a snapshot file. Raises SnapshotError."""
+    try:
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            document = json.load(f)
+    except (OSError, ValueError) as e:
+        raise SnapshotError(f"{path} is not a catalog snapshot: {e}")
+    if not isinstance(document, dict) or document.get('format') != FORMAT:
+        raise SnapshotError(f"{path} is not a catalog snapshot.")
+    if document.get('version') != VERSION:
+        raise SnapshotError(f"{path} is snapshot version {document.get('version')}; this code reads version {VERSION}.")
+    return document
+
+
+# ==============================================================================
+# RESTORING A SNAPSHOT
+# ==============================================================================
+def _column_values(field, values):
+    """Turns one column from the file into database values."""
+    if isinstance(field, models.DecimalField):
+        values = [Decimal(value) if value is not None else None for value in values]
+    return [field.get_db_prep_save(value, connection) for value in values]
+
+
+def _insert_table(model, fields, table):
+    """One multi-row INSERT of model's own table, from the snapshot columns that belong to it."""
+    stored = {column: data for column, data in zip(table['columns'], table['data']) if column not in RATING_COLUMNS}
+    rows = table['rows']
+    columns = []
+    for field in fields:
+        if field.attname in stored:
+            columns.append(_column_values(field, stored[field.attname]))
+        else:
+            # A field added after the snapshot was taken: everyone gets the default.
+            columns.append([field.get_db_prep_save(field.get_default(), connection)] * rows)
+
+    quote = connection.ops.quote_name
+    sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+        quote(model._meta.db_table),
+        ', '.join(quote(field.column) for field in fields),
+        ', '.join(['%s'] * len(fields)),
+    )
+    all_rows = list(zip(*columns))
+    with connection.cursor() as cursor:
+        for start in range(0, len(all_rows), INSERT_BATCH_SIZE):
+            cursor.executemany(sql, all_rows[start:start + INSERT_BATCH_SIZE])
+
+
+def restore_snapshot(document):
+    """
+    Fills the (empty) catalog tables from a snapshot from read_snapshot(), in one
+    transaction. Returns {table: rows}.
+    """
+    tables = document['tables']
+    counts = {}
+    with transaction.atomic():
+        for kind, ModelClass in KIND_MODEL_MAP.items():
+            table = tables.get(kind)
+            if not table or not table['rows']:
+                continue
+            # The kind's rows in catalog_component first, then in its own table (catalog_cpu, ...).
+            _insert_table(Component, Component._meta.local_concrete_fields, table)
+            _insert_table(ModelClass, ModelClass._meta.local_concrete_fields, dict(table, columns=[
+                'component_ptr_id' if column == 'id' else column for column in table['columns']
+            ]))
+            counts[kind] = table['rows']
+
+        plain = tables.get(PLAIN)
+        if plain and plain['rows']:
+            _insert_table(Component, Component._meta.local_concrete_fields, plain)
+            counts[PLAIN] = plain['rows']
+
+        search_terms = tables.get(SEARCH_TERMS)
+        if search_terms and search_terms['rows']:
+            fields = [field for field in ComponentSearchTerm._meta.local_concrete_fields if not field.primary_key]
+            _insert_table(ComponentSearchTerm, fields, search_terms)
+            counts[SEARCH_TERMS] = search_terms['rows']
+
+        # The components came with their ids, so move the id sequences past them (PostgreSQL, Oracle).
+        with connection.cursor() as cursor:
+            for sql in connection.ops.sequence_reset_sql(no_style(), [Component, ComponentSearchTerm]):
+                cursor.execute(sql)
+        CatalogVersion.bump()
+    return counts
+
+#__________________________________________________________________________________________________________________________
@@ -0,0 +1,192 @@
+# catalog/benchmarks.py
+
+#__________________________________________________________________________________________________________________________ (akn)
+
+"""
+View benchmarks ('manage.py benchmark_views').
+
+Drives the real views through the Django test client (URL routing, middleware,
+templates and all) on a synthetic dataset from catalog/synthetic.py and records,
+per view:
+
+  * latency percentiles (p50 / p90 / p95 / p99 / max, in milliseconds),
+  * the number of SQL queries one request makes,
+  * the size of the rendered response in bytes.
+
+The results are compared with a stored baseline (benchmark_baseline.json). A view
+regresses when it makes MORE queries than the baseline, renders noticeably more
+bytes, or its p50/p95 latency grows past the tolerance. Query counts and bytes
+don't depend on the machine; latencies do, so keep the baseline from the machine
+the benchmark runs on (--update-baseline).
+"""
+
+import json
+import platform
+import statistics
+import time
+from collections import namedtuple
+import django
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.db.models import Count
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from builds.models import Build, WishlistItem
+from .models import Component, GPU
+
+PERCENTILES = (50, 90, 95, 99)
+LATENCY_TOLERANCE = 0.25  # 25% slower than the baseline is a regression...
+LATENCY_SLACK_MS = 2.0    # ...unless it's only a couple of milliseconds (timer noise on fast views)
+BYTES_TOLERANCE = 0.10
+
+# One benchmarked view. 'path' and 'data' take the Fixtures below and return the URL / the POST data.
+ViewBenchmark = namedtuple('ViewBenchmark', 'name method path data user')
+
+
+class BenchmarkError(Exception):
+    """A benchmarked view didn't answer with 200 OK, or the dataset has nothing to benchmark."""
+
+
+# ==============================================================================
+# 1. THE VIEWS
+# ==============================================================================
+VIEWS = [
+    ViewBenchmark('catalog_chooser_view', 'get', lambda f: reverse('catalog:chooser'), None, None),
+    ViewBenchmark('component_list_view', 'get', lambda f: reverse('catalog:component_list', args=['cpu']), None, None),
+    ViewBenchmark('component_detail_view', 'get', lambda f: reverse('catalog:component_detail', args=[f.component_id]), None, None),
+    ViewBenchmark('workbench_view', 'get', lambda f: reverse('builds:workbench', args=[f.build_id]), None, 'owner'),
+    ViewBenchmark('search_components', 'get', lambda f: reverse('builds:search_components', args=[f.build_id]) + '?q=ryzen', None, 'owner'),
+    ViewBenchmark('add_component_to_build', 'post', lambda f: reverse('builds:add_component', args=[f.build_id]), lambda f: {'component_id': f.gpu_id}, 'owner'),
+    ViewBenchmark('update_build_status', 'get', lambda f: reverse('builds:update_status', args=[f.build_id]), None, 'owner'),
+    ViewBenchmark('guides_view', 'get', lambda f: reverse('builds:guides'), None, None),
+    ViewBenchmark('share_build_view', 'get', lambda f: reverse('builds:share_build', args=[f.build_id]), None, None),
+    ViewBenchmark('marketplace_list_view', 'get', lambda f: reverse('marketplace:list'), None, None),
+    ViewBenchmark('wishlist_view', 'get', lambda f: reverse('builds:wishlist'), None, 'wisher'),
+]
+
+Fixtures = namedtuple('Fixtures', 'build_id owner component_id gpu_id wisher')
+
+
+def pick_fixtures():
+    """
+    The objects the views are pointed at, chosen the same way on every run: the build
+    with the most parts, the most reviewed component, the user with the longest wishlist.
+    """
+    build = Build.objects.annotate(parts=Count('buildcomponent')).order_by('-parts', 'pk').select_related('user').first()
+    component = Component.objects.order_by('-rating_count', 'pk').first()
+    gpu = GPU.objects.order_by('pk').first()
+    wisher = WishlistItem.objects.values('user').annotate(items=Count('id')).order_by('-items', 'user').first()
+    if build is None or component is None or gpu is None or wisher is None:
+        raise BenchmarkError("The database needs builds, components (with a GPU) and wishlist items. Run generate_dataset first.")
+    return Fixtures(build.pk, build.user, component.pk, gpu.pk, get_user_model().objects.get(pk=wisher['user']))
+
+
+# ==============================================================================
+# 2. MEASURING
+# ==============================================================================
+def percentile(sorted_values, percent):
+    """Nearest-rank percentile of an already sorted list."""
+    rank = max(1, -(-len(sorted_values) * percent // 100))  # ceil without floats
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def measure(view, fixtures, client, iterations, warmup):
+    """Runs one view warmup + iterations times. Returns its metrics dict."""
+    path = view.path(fixtures)
+    data = view.data(fixtures) if view.data else None
+    send = getattr(client, view.method)
+
+    timings = []
+    queries = []
+    sizes = []
+    for number in range(warmup + iterations):
+        with CaptureQueriesContext(connection) as captured:
+            start = time.perf_counter()
+            response = send(path, data) if data is not None else send(path)
+            elapsed = (time.perf_counter() - start) * 1000
+        if response.status_code != 200:
+            raise BenchmarkError(f"{view.name}: {view.method.upper()} {path} answered {response.status_code}.")
+        if number < warmup:
+            continue  # warms the catalog snapshot, template loaders, ...
+        timings.append(elapsed)
+        queries.append(len(captured.captured_queries))
+        sizes.append(len(response.content))
+
+    timings.sort()
+    metrics = {f'p{percent}_ms': round(percentile(timings, percent), 3) for percent in PERCENTILES}
+    metrics.update({
+        'mean_ms': round(statistics.fmean(timings), 3),
+        'max_ms': round(timings[-1], 3),
+        # A view should make the same queries every time; report the worst request.
+        'queries': max(queries),
+        'bytes': max(sizes),
+        'iterations': iterations,
+    })
+    return metrics
+
+
+def run_benchmarks(iterations=20, warmup=3, only=None, progress=None):
+    """Measures every view in VIEWS (or the ones named in 'only'). Returns the results document."""
+    fixtures = pick_fixtures()
+    clients = {None: Client(), 'owner': Client(), 'wisher': Client()}
+    clients['owner'].force_login(fixtures.owner)
+    clients['wisher'].force_login(fixtures.wisher)
+
+    results = {}
+    for view in VIEWS:
+        if only and view.name not in only:
+            continue
+        results[view.name] = measure(view, fixtures, clients[view.user], iterations, warmup)
+        if progress:
+            progress(view.name, results[view.name])
+
+    return {
+        'meta': {
+            'created': timezone.now().isoformat(timespec='seconds'),
+            'database': connection.vendor,
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'components': Component.objects.count(),
+            'builds': Build.objects.count(),
+        },
+        'views': results,
+    }
+
+
+# ==============================================================================
+# 3. BASELINES
+# ==============================================================================
+def compare(results, baseline, latency_tolerance=LATENCY_TOLERANCE, bytes_tolerance=BYTES_TOLERANCE):
+    """
+    Returns a list of regression messages (empty = no regressions). Views that aren't
+    in the baseline (new benchmarks) are skipped.
+    """
+    regressions = []
+    for name, metrics in results['views'].items():
+        old = baseline.get('views', {}).get(name)
+        if old is None:
+            continue
+        if metrics['queries'] > old['queries']:
+            regressions.append(f"{name}: {metrics['queries']} queries (baseline {old['queries']})")
+        if metrics['bytes'] > old['bytes'] * (1 + bytes_tolerance):
+            regressions.append(f"{name}: {metrics['bytes']:,} bytes (baseline {old['bytes']:,})")
+        for key in ('p50_ms', 'p95_ms'):
+            limit = max(old[key] * (1 + latency_tolerance), old[key] + LATENCY_SLACK_MS)
+            if metrics[key] > limit:
+                regressions.append(f"{name}: {key} {metrics[key]:.1f} (baseline {old[key]:.1f}, limit {limit:.1f})")
+    return regressions
+
+
+def read_results(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def write_results(results, path):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2, sort_keys=True)
+        f.write('\n')
+
+#__________________________________________________________________________________________________________________________
@@ -0,0 +1,204 @@
+# catalog/cleaning.py
+
+#__________________________________________________________________________________________________________________________ (akn)
+
+"""
+Cleaning helpers that turn messy vendor feed values ('1TB', '3.70 GHz - 4.20 GHz', 'N/A')
+into values our model fields accept. They live here, away from the import command,
+so migrations can reuse them too.
+
+The clean_*() functions clean one value. The clean_*_column() functions further
+down give exactly the same results for a whole list of values at once (see
+"COLUMN CLEANING" below); the importer uses those.
+"""
+
+import re
+import numpy as np
+
+# --- Data Cleaning Helper Functions (FINAL, ROBUST VERSION) ---
+
+def clean_form_factor(value):
+    """Translates common case form factors to motherboard form factors."""
+    if not isinstance(value, str): return None
+    value = value.strip().lower()
+    if 'mid tower' in value or 'full tower' in value:
+        return 'ATX'
+    if 'mini tower' in value:
+        return 'Micro-ATX'
+    # Add more specific mappings if needed, e.g., Mini-ITX
+    return None # Return None if no match, to not save invalid data
+
+def clean_efficiency_rating(value):
+    """Standardizes PSU efficiency ratings to match model choices."""
+    if not isinstance(value, str) or 'N/A' in value:
+        return None
+    value = value.lower()
+    if 'titanium' in value: return 'Titanium'
+    if 'platinum' in value: return 'Platinum'
+    if 'gold' in value: return 'Gold'
+    if 'silver' in value: return 'Silver'
+    if 'bronze' in value: return 'Bronze'
+    if '80' in value: return '80+' # Catches '80 Plus' and '80+'
+    return None
+
+def clean_capacity_gb(value):
+    """Converts strings like '1TB' or '512GB' to an integer in GB."""
+    if isinstance(value, int): return value
+    if not isinstance(value, str): return None
+    
+    value = value.upper().strip()
+    # Find all numbers (including decimals) in the string
+    numbers = re.findall(r"[\d\.]+", value)
+    if not numbers: return None
+
+    try:
+        number = float(numbers[0])
+        if 'TB' in value:
+            return int(number * 1000)
+        elif 'GB' in value:
+            return int(number)
+    except (ValueError, IndexError):
+        return None
+    return None
+
+def clean_integer(value):
+    """Converts a value to an integer, handling 'N/A' and other non-numerics."""
+    if isinstance(value, int): return value
+    if not isinstance(value, str): return None
+    
+    # Find all digits in the string
+    numbers = re.findall(r"\d+", value)
+    if not numbers: return None
+
+    try:
+        return int(numbers[0])
+    except (ValueError, IndexError):
+        return None
+    return None
+
+def clean_decimal(value):
+    """Converts a value to a decimal, handling ranges and non-numerics."""
+    if isinstance(value, (int, float)): return value
+    if not isinstance(value, str): return None
+        
+    # Find all floating point or integer numbers
+    numbers = re.findall(r"[\d\.]+", value)
+    if not numbers: return None
+    
+    try:
+        # Always take the first number found in a range like "3.70 GHz - 4.20 GHz"
+        return float(numbers[0])
+    except (ValueError, IndexError):
+        return None
+    return None
+
+
+
+# ==============================================================================
+# COLUMN CLEANING
+# A feed repeats the same few strings over and over ('8GB', '16GB', 'N/A', ...),
+# so the column versions clean every DISTINCT string once and map the results back
+# onto the column. The distinct strings are handled together: precompiled patterns
+# pick out the first number, and NumPy does the upper-casing, the TB/GB check and
+# the unit conversion for all of them in one go.
+#
+# The results (and their types: int stays int, float stays float) are identical
+# to calling the scalar helper on every value.
+# ==============================================================================
+_NUMBER = re.compile(r"[\d\.]+")  # same pattern as clean_capacity_gb() / clean_decimal()
+_DIGITS = re.compile(r"\d+")  # same pattern as clean_integer()
+
+
+def _clean_distinct_strings(values, clean_strings, passthrough=()):
+    """
+    Runs clean_strings(list of distinct strings) -> list of results once and maps the
+    results back onto 'values'. Values of the 'passthrough' types are kept as they
+    are (like the scalar helpers do with ints); anything else that isn't a string is None.
+    """
+    try:
+        distinct = dict.fromkeys(values)
+    except TypeError:  # something unhashable, like a list
+        distinct = {}
+    if distinct and all(value is None or isinstance(value, str) for value in distinct):
+        # The usual case: only strings and blanks, so the mapping back can be a plain lookup.
+        strings = [value for value in distinct if value is not None]
+        results = dict(zip(strings, clean_strings(strings)))
+        results[None] = None
+        return list(map(results.__getitem__, values))
+
+    # Mixed types. Strings still go through clean_strings() once each, the rest one by one
+    # (not through the dict above: 1, 1.0 and True are the same key there).
+    distinct = list(dict.fromkeys(value for value in values if isinstance(value, str)))
+    results = dict(zip(distinct, clean_strings(distinct))) if distinct else {}
+    return [
+        results[value] if isinstance(value, str) else (value if isinstance(value, passthrough) else None)
+        for value in values
+    ]
+
+
+def _first_numbers(strings, pattern, convert):
+    """The first match of 'pattern' in each string, converted; None where there is none or it doesn't convert."""
+    numbers = []
+    for string in strings:
+        match = pattern.search(string)
+        try:
+            numbers.append(convert(match.group()) if match else None)
+        except ValueError:
+            numbers.append(None)
+    return numbers
+
+
+def _capacity_gb_of(strings):
+    try:
+        upper = np.strings.upper(np.array(strings, dtype=np.dtypes.StringDType()))
+    except UnicodeEncodeError:
+        # NumPy strings are UTF-8, which can't hold a lone surrogate ('\ud800' in the JSON).
+        return [clean_capacity_gb(string) for string in strings]
+    terabytes = np.strings.find(upper, 'TB') >= 0
+    gigabytes = np.strings.find(upper, 'GB') >= 0
+
+    numbers = _first_numbers(upper.tolist(), _NUMBER, float)
+    found = np.array([number is not None for number in numbers])
+    gb = np.array([number if number is not None else 0.0 for number in numbers], dtype=np.float64)
+    gb = np.where(terabytes, gb * 1000, gb)
+    keep = found & (terabytes | gigabytes)
+    return [int(value) if ok else None for value, ok in zip(gb.tolist(), keep.tolist())]
+
+
+def clean_capacity_gb_column(values):
+    """clean_capacity_gb() for a whole list of values."""
+    return _clean_distinct_strings(values, _capacity_gb_of, passthrough=int)
+
+
+def clean_integer_column(values):
+    """clean_integer() for a whole list of values."""
+    return _clean_distinct_strings(values, lambda strings: _first_numbers(strings, _DIGITS, int), passthrough=int)
+
+
+def clean_decimal_column(values):
+    """clean_decimal() for a whole list of values. Ranges like '3.70 GHz - 4.20 GHz' give the first number."""
+    return _clean_distinct_strings(values, lambda strings: _first_numbers(strings, _NUMBER, float), passthrough=(int, float))
+
+
+def _distinct_strings_column(clean):
+    """Column version of a helper that returns None for anything that isn't a string."""
+    return lambda values: _clean_distinct_strings(values, lambda strings: [clean(string) for string in strings])
+
+
+COLUMN_CLEANERS = {
+    clean_capacity_gb: clean_capacity_gb_column,
+    clean_integer: clean_integer_column,
+    clean_decimal: clean_decimal_column,
+    clean_form_factor: _distinct_strings_column(clean_form_factor),
+    clean_efficiency_rating: _distinct_strings_column(clean_efficiency_rating),
+}
+
+
+def clean_column(clean, values):
+    """Applies the scalar helper 'clean' to a list of values, using its column version if there is one."""
+    column_cleaner = COLUMN_CLEANERS.get(clean)
+    if column_cleaner is None:
+        return [clean(value) for value in values]
+    return column_cleaner(values)
+
+#__________________________________________________________________________________________________________________________
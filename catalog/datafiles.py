@@ -0,0 +1,152 @@
+# catalog/datafiles.py
+
+#__________________________________________________________________________________________________________________________ (akn)
+
+"""
+Streaming data files for moving the whole site's data between databases
+('manage.py export_data' and 'manage.py load_data').
+
+The old export ran 'manage.py dumpdata <app> --indent 2' in a subprocess per app:
+a full Django start-up each time, and dumpdata builds the whole fixture in memory
+before writing it. Here everything runs in one process and streams:
+
+  * EXPORT: each model is read in primary key order, chunk_size rows at a time
+    (WHERE pk > last ORDER BY pk LIMIT n, so memory stays bounded on every backend,
+    also MySQL, which can't stream a plain .iterator()), and written as JSON Lines
+    (one object per line, same layout as dumpdata) through gzip.
+  * LOAD: the file is read line by line and the objects are written batch_size at a
+    time with one multi-row INSERT per batch, instead of one save() per object like
+    loaddata.
+
+One file per app: users_data.jsonl.gz, catalog_data.jsonl.gz, ...
+"""
+
+import gzip
+from itertools import islice
+from django.apps import apps
+from django.core import serializers
+from django.core.management.color import no_style
+from django.db import DEFAULT_DB_ALIAS, connections, router, transaction
+
+# In dependency order: builds and marketplace point at users and catalog.
+DEFAULT_APPS = ['users', 'catalog', 'builds', 'marketplace']
+DEFAULT_CHUNK_SIZE = 2000
+
+
+def data_file_name(app_label):
+    return f'{app_label}_data.jsonl.gz'
+
+
+# ==============================================================================
+# EXPORT
+# ==============================================================================
+def exported_models(app_label, using=DEFAULT_DB_ALIAS):
+    """The models dumpdata would export for an app (no proxies, only ones stored in this database)."""
+    return [
+        model for model in apps.get_app_config(app_label).get_models()
+        if not model._meta.proxy and router.allow_migrate_model(using, model)
+    ]
+
+
+def iter_chunks(model, chunk_size, using=DEFAULT_DB_ALIAS):
+    """Yields all rows of a model as lists of at most chunk_size objects, in primary key order."""
+    queryset = model._base_manager.using(using).order_by('pk')
+    last_pk = None
+    while True:
+        chunk = list((queryset if last_pk is None else queryset.filter(pk__gt=last_pk))[:chunk_size])
+        if not chunk:
+            return
+        yield chunk
+        last_pk = chunk[-1].pk
+
+
+def export_app(app_label, path, chunk_size=DEFAULT_CHUNK_SIZE, using=DEFAULT_DB_ALIAS):
+    """Writes one app's data to a gzip JSON Lines file. Returns {model label: rows}."""
+    counts = {}
+    with gzip.open(path, 'wt', encoding='utf-8', compresslevel=6) as stream:
+        for model in exported_models(app_label, using):
+            counts[model._meta.label] = 0
+            for chunk in iter_chunks(model, chunk_size, using):
+                serializers.serialize('jsonl', chunk, stream=stream)
+                counts[model._meta.label] += len(chunk)
+    return counts
+
+
+# ==============================================================================
+# LOAD
+# ==============================================================================
+def _insert(model, objects, using):
+    """
+    One multi-row INSERT of the model's own table (for CPU: catalog_cpu only; the
+    catalog_component row is its own line in the file, like in dumpdata). Rows that
+    already exist (e.g. made by a migration) are updated instead.
+    """
+    fields = model._meta.local_concrete_fields
+    connection = connections[using]
+
+    existing = set(model._base_manager.using(using).filter(pk__in=[obj.pk for obj in objects]).values_list('pk', flat=True))
+    new = [obj for obj in objects if obj.pk not in existing]
+    if new:
+        quote = connection.ops.quote_name
+        sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+            quote(model._meta.db_table),
+            ', '.join(quote(field.column) for field in fields),
+            ', '.join(['%s'] * len(fields)),
+        )
+        # The stored values as they are: no pre_save(), so auto_now dates keep their exported value.
+        rows = [[field.get_db_prep_save(getattr(obj, field.attname), connection) for field in fields] for obj in new]
+        with connection.cursor() as cursor:
+            cursor.executemany(sql, rows)
+    update_fields = [field.name for field in fields if not field.primary_key]
+    if existing and update_fields:
+        model._base_manager.using(using).bulk_update(
+            [obj for obj in objects if obj.pk in existing],
+            update_fields,
+        )
+
+
+def _flush(model, batch, using):
+    _insert(model, [deserialized.object for deserialized in batch], using)
+    for deserialized in batch:
+        # Many-to-many links (e.g. a user's groups) go in after the row itself.
+        for accessor_name, related in (deserialized.m2m_data or {}).items():
+            getattr(deserialized.object, accessor_name).set(related)
+
+
+def load_file(path, batch_size=DEFAULT_CHUNK_SIZE, using=DEFAULT_DB_ALIAS):
+    """
+    Loads a file written by export_app(). Everything goes in one transaction with
+    foreign key checks deferred to the end, like loaddata. Returns {model label: rows}.
+    """
+    connection = connections[using]
+    counts = {}
+    loaded_models = set()
+    with gzip.open(path, 'rt', encoding='utf-8') as stream, transaction.atomic(using=using):
+        with connection.constraint_checks_disabled():
+            objects = serializers.deserialize('jsonl', stream, using=using, ignorenonexistent=True)
+            while True:
+                chunk = list(islice(objects, batch_size))
+                if not chunk:
+                    break
+                # The file is grouped by model: write each run of same-model objects together.
+                run = [chunk[0]]
+                for deserialized in chunk[1:] + [None]:
+                    if deserialized is not None and type(deserialized.object) is type(run[0].object):
+                        run.append(deserialized)
+                        continue
+                    model = type(run[0].object)
+                    _flush(model, run, using)
+                    loaded_models.add(model)
+                    counts[model._meta.label] = counts.get(model._meta.label, 0) + len(run)
+                    run = [deserialized]
+
+        connection.check_constraints(table_names=[model._meta.db_table for model in loaded_models])
+        # Rows came with their ids, so move the id sequences past them (PostgreSQL, Oracle).
+        sequence_sql = connection.ops.sequence_reset_sql(no_style(), list(loaded_models))
+        if sequence_sql:
+            with connection.cursor() as cursor:
+                for sql in sequence_sql:
+                    cursor.execute(sql)
+    return counts
+
+#__________________________________________________________________________________________________________________________
@@ -0,0 +1,189 @@
+# catalog/facets.py
+
+#__________________________________________________________________________________________________________________________ (akn)
+
+"""
+Facet counts for the catalog sidebar ("Manufacturer: AMD (12), Intel (9)", ...).
+
+Counting with SQL would need one GROUP BY per facet on every keystroke. Instead we
+keep, per component type, a precomputed BITMAP for every facet value: a big
+integer where bit N is set if the Nth component has that value. Then:
+  * the components matching the current search/ranges become one bitmap too,
+  * "how many AMD CPUs match?" is (amd_bitmap & matching_bitmap).bit_count().
+
+The bitmaps are built from the in-memory catalog snapshot (catalog/snapshot.py),
+so they cost no queries, and are rebuilt whenever the catalog version changes.
+
+Counts follow the usual shop behaviour: ticking values inside one facet means
+"any of these" (AMD or Intel), different facets are combined with "and", and each
+facet's counts ignore its own selection so the other options stay visible.
+"""
+
+from django.db.models import Q
+from .snapshot import get_snapshot
+
+PRICE_BAND = 'price_band'
+
+# (value used in the URL, label, lowest price included, price the band stops before)
+PRICE_BANDS = [
+    ('0-5k', 'Under ৳5,000', None, 5000),
+    ('5k-10k', '৳5,000 - ৳10,000', 5000, 10000),
+    ('10k-20k', '৳10,000 - ৳20,000', 10000, 20000),
+    ('20k-50k', '৳20,000 - ৳50,000', 20000, 50000),
+    ('50k+', '৳50,000 and above', 50000, None),
+]
+
+
+def price_band_for(price):
+    """Returns the PRICE_BANDS value a price falls into, or None when there is no price."""
+    if price is None:
+        return None
+    for value, _label, low, high in PRICE_BANDS:
+        if (low is None or price >= low) and (high is None or price < high):
+            return value
+    return None
+
+
+def _bitmap(positions, size):
+    """Turns a list of bit positions into one integer bitmap in a single pass."""
+    bits = bytearray((size + 7) // 8)
+    for position in positions:
+        bits[position >> 3] |= 1 << (position & 7)
+    return int.from_bytes(bits, 'little')
+
+
+class FacetIndex:
+    """The facet bitmaps for one component type (CPU, GPU, ...), built from a catalog snapshot."""
+
+    def __init__(self, ModelClass, snapshot):
+        self.model = ModelClass
+        # The version, not the snapshot itself: a snapshot with fresh ratings has the
+        # same components, so the bitmaps still fit it.
+        self.version = snapshot.version
+        self.facets = ModelClass.FACETS
+
+        positions = {facet: {} for facet in self.facets}
+        self.positions = {}  # component id -> bit position
+        for position, record in enumerate(snapshot.of_kind(ModelClass.KIND)):
+            self.positions[record.id] = position
+            for facet in self.facets:
+                value = price_band_for(record.price) if facet == PRICE_BAND else getattr(record, facet)
+                if value not in (None, ''):
+                    positions[facet].setdefault(value, []).append(position)
+
+        self.size = len(self.positions)
+        self.everything = (1 << self.size) - 1
+        self.bitmaps = {
+            facet: {value: _bitmap(value_positions, self.size) for value, value_positions in values.items()}
+            for facet, values in positions.items()
+        }
+
+    def mask_for(self, ids):
+        """The bitmap of the given component ids (ids we don't know about are skipped)."""
+        return _bitmap([self.positions[pk] for pk in ids if pk in self.positions], self.size)
+
+    def counts(self, matching, selected):
+        """
+        Returns {facet: {value: count}} for the components in the 'matching' bitmap,
+        with 'selected' ({facet: [values]}) applied to every facet except its own.
+        """
+        chosen = {}
+        for facet, values in selected.items():
+            mask = 0
+            for value in values:
+                mask |= self.bitmaps[facet].get(value, 0)
+            chosen[facet] = mask
+
+        counts = {}
+        for facet in self.facets:
+            mask = matching
+            for other, other_mask in chosen.items():
+                if other != facet:
+                    mask &= other_mask
+            counts[facet] = {value: (bitmap & mask).bit_count() for value, bitmap in self.bitmaps[facet].items()}
+        return counts
+
+
+# One FacetIndex per component kind, rebuilt when the catalog version changes.
+_indexes = {}
+
+
+def get_index(ModelClass):
+    """Returns the FacetIndex for a component type, building it from the current catalog snapshot if needed."""
+    snapshot = get_snapshot()
+    index = _indexes.get(ModelClass.KIND)
+    if index is None or index.version != snapshot.version:
+        index = FacetIndex(ModelClass, snapshot)
+        _indexes[ModelClass.KIND] = index
+    return index
+
+
+def selected_facets(request, index):
+    """Reads the ticked facet values from the query string, e.g. ?manufacturer=AMD&manufacturer=Intel."""
+    bitmaps = index.bitmaps
+    selected = {}
+    for facet in index.facets:
+        # Only values we know about, so nothing odd ends up in the SQL.
+        values = [value for value in request.GET.getlist(facet) if value in bitmaps[facet]]
+        if values:
+            selected[facet] = values
+    return selected
+
+
+def apply_facets(queryset, selected):
+    """Filters a queryset down to the ticked facet values."""
+    for facet, values in selected.items():
+        if facet == PRICE_BAND:
+            bands = Q()
+            for value, _label, low, high in PRICE_BANDS:
+                if value in values:
+                    band = Q()
+                    if low is not None:
+                        band &= Q(price__gte=low)
+                    if high is not None:
+                        band &= Q(price__lt=high)
+                    bands |= band
+            queryset = queryset.filter(bands)
+        else:
+            queryset = queryset.filter(**{f'{facet}__in': values})
+    return queryset
+
+
+def facet_groups(index, queryset, selected):
+    """
+    Builds the sidebar for a component type: a list of
+    {'name', 'label', 'options': [{'value', 'label', 'count', 'selected'}]}.
+    'queryset' is the list BEFORE the facet selections (search and ranges only).
+    """
+    ModelClass = index.model
+    if queryset.query.has_filters():
+        # One query for the matching ids; the counting itself happens on the bitmaps.
+        matching = index.mask_for(queryset.values_list('pk', flat=True))
+    else:
+        matching = index.everything
+    counts = index.counts(matching, selected)
+
+    groups = []
+    for facet in ModelClass.FACETS:
+        if facet == PRICE_BAND:
+            label = 'Price'
+            choices = [(value, band_label) for value, band_label, _low, _high in PRICE_BANDS]
+        else:
+            field = ModelClass._meta.get_field(facet)
+            label = field.verbose_name.title()
+            display = dict(field.flatchoices)
+            # Keep the order of the field's choices; free-text values go alphabetically.
+            choices = [(value, display[value]) for value in display if value in counts[facet]]
+            choices += sorted(((value, value) for value in counts[facet] if value not in display), key=lambda choice: choice[1].lower())
+
+        chosen = selected.get(facet, [])
+        options = [
+            {'value': value, 'label': option_label, 'count': counts[facet].get(value, 0), 'selected': value in chosen}
+            for value, option_label in choices
+            if value in counts[facet]
+        ]
+        if options:
+            groups.append({'name': facet, 'label': label, 'options': options})
+    return groups
+
+#__________________________________________________________________________________________________________________________
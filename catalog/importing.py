@@ -0,0 +1,589 @@
+# catalog/importing.py
+
+#__________________________________________________________________________________________________________________________ (akn)
+
+"""
+The bulk import pipeline behind 'manage.py import_data'.
+
+  1. READ:  records are streamed from a JSON array or JSON Lines file one at a time,
+            so the whole file never has to be in memory.
+  2. CLEAN: records go through the cleaners in catalog/cleaning.py a batch at a time,
+            one column (field) at a time, and are converted to the model's field
+            types. Values the database would refuse (too long, too many digits, out
+            of range) are caught here too. Bad rows are saved to the quarantine
+            table (QuarantinedRow) with the reason, and skipped.
+  3. WRITE: clean records are collected into batches. Each batch is one transaction
+            with a handful of bulk queries:
+              * new components: one INSERT into catalog_component and one into the
+                child table (bulk_create can't do multi-table models by itself);
+                on MySQL, which doesn't return the ids of a multi-row INSERT, one
+                INSERT per component into catalog_component,
+              * existing components: bulk_update, which updates both tables.
+
+Existing components are found through a name -> (id, digest) map loaded once at
+the start, so there are no per-row SELECTs. The digest is a SHA-256 of the cleaned
+record, stored in Component.source_digest: feeds are re-imported daily and most
+rows haven't changed, so a record whose digest matches the stored one is counted
+as unchanged and not written at all.
+
+Bulk queries skip the model signals, so each batch re-indexes its components for
+search, and the catalog version is bumped once at the end (and only if something
+was actually written).
+
+READ and CLEAN don't touch the database, so 'manage.py import_catalog' runs them for
+many files at once in worker processes and funnels the cleaned batches to this
+process, which does all the WRITEs (see import_files() at the bottom).
+"""
+
+import hashlib
+import json
+import multiprocessing
+import re
+import time
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from decimal import Decimal, InvalidOperation
+from itertools import islice
+from pathlib import Path
+from queue import Empty
+from django.core.exceptions import ValidationError
+from django.core.validators import DecimalValidator, MaxLengthValidator, MaxValueValidator, MinValueValidator
+from django.db import DatabaseError, connection, connections, models, transaction
+from .cleaning import clean_column, clean_form_factor, clean_efficiency_rating, clean_capacity_gb, clean_integer, clean_decimal
+from .models import CatalogVersion, Component, KIND_MODEL_MAP, QuarantinedRow
+from .search import index_components
+from .signals import components_updated
+
+DEFAULT_BATCH_SIZE = 500
+REPORTED_REJECTIONS = 20  # rejected rows the commands print; the rest are only in the quarantine table
+
+# Per kind: field -> cleaner that turns the scraped text into a value.
+FIELD_CLEANERS = {
+    'CPU': {'clock_speed': clean_decimal, 'core_count': clean_integer},
+    'GPU': {'vram_gb': clean_capacity_gb, 'gpu_clock_speed': clean_integer},
+    'Motherboard': {},
+    'RAM': {'capacity_gb': clean_capacity_gb, 'speed_mhz': clean_integer},
+    'Storage': {'capacity_gb': clean_capacity_gb},
+    'PSU': {'wattage': clean_integer, 'efficiency_rating': clean_efficiency_rating},
+    'Case': {'form_factor': clean_form_factor, 'max_gpu_length': clean_integer},
+}
+
+
+# ==============================================================================
+# 1. READ
+# ==============================================================================
+_decoder = json.JSONDecoder()
+
+
+def iter_json_records(path, chunk_size=1 << 16):
+    """
+    Yields the records of a JSON array file ([{...}, {...}]) or a JSON Lines file
+    (one object per line) one by one, reading the file in chunks.
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        buffer = f.read(chunk_size).lstrip()
+        if not buffer.startswith('['):
+            f.seek(0)
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+            return
+
+        position = 1
+        while True:
+            # Skip the whitespace and commas between records, reading more when we run out.
+            while position < len(buffer) and buffer[position] in ' \t\r\n,':
+                position += 1
+            if position == len(buffer):
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    raise json.JSONDecodeError("The JSON array is not closed", buffer, position)
+                buffer, position = chunk, 0
+                continue
+            if buffer[position] == ']':
+                return
+
+            try:
+                record, position = _decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                # The record continues in the next chunk.
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    raise
+                buffer, position = buffer[position:] + chunk, 0
+                continue
+            yield record
+
+            # Drop the text we are done with so the buffer stays about one chunk long.
+            if position > chunk_size:
+                buffer, position = buffer[position:], 0
+
+
+# ==============================================================================
+# 2. CLEAN / 3. WRITE
+# ==============================================================================
+class ImportRowError(ValueError):
+    """A record that can't be imported (missing name, a value of the wrong type, ...)."""
+
+
+# A rejected record: its name (if it had one), why, its position in the file (1 = first)
+# and the record as it was in the feed.
+Rejection = namedtuple('Rejection', ['name', 'message', 'row', 'payload'])
+
+
+def describe_rejection(rejection):
+    """One line for the command output, e.g. "row 12 ('RX 7600'): Record has no name."."""
+    label = f"row {rejection.row}" if rejection.row else "row"
+    if rejection.name:
+        label += f" ({rejection.name!r})"
+    return f"{label}: {rejection.message}"
+
+
+def database_check(field):
+    """
+    A validator for what the database itself would refuse for this field (a string
+    that's too long, a number with too many digits or out of range), or None. Checking
+    this while cleaning means one bad row can't make a whole batch fail.
+    """
+    if isinstance(field, models.CharField) and field.max_length:
+        return MaxLengthValidator(field.max_length)
+
+    if isinstance(field, models.DecimalField):
+        validate = DecimalValidator(field.max_digits, field.decimal_places)
+        step = Decimal(1).scaleb(-field.decimal_places)
+
+        def check_decimal(value):
+            # The database rounds to decimal_places, so only too many digits before the point is an error.
+            try:
+                rounded = value.quantize(step)
+            except InvalidOperation:
+                raise ValidationError("Number is too large.")
+            validate(rounded)
+        return check_decimal
+
+    if isinstance(field, models.IntegerField):
+        low, high = connection.ops.integer_field_range(field.get_internal_type())
+        validators = [MinValueValidator(low)] if low is not None else []
+        validators += [MaxValueValidator(high)] if high is not None else []
+
+        def check_integer(value):
+            for validator in validators:
+                validator(value)
+        return check_integer if validators else None
+    return None
+
+
+class ImportStats:
+    """What an import did, for the command's summary line."""
+
+    def __init__(self):
+        self.created = 0
+        self.updated = 0
+        self.unchanged = 0  # same digest as the stored row, so not written
+        self.errors = []  # a Rejection for every rejected row
+        self.seconds = 0.0
+        # Time spent in each stage. With import_catalog, parse and clean are added up
+        # over all the worker processes, so together they can be more than 'seconds'.
+        self.parse_seconds = 0.0
+        self.clean_seconds = 0.0
+        self.write_seconds = 0.0
+
+    def merge(self, other):
+        """Adds another ImportStats' counts and stage times to this one (not its 'seconds')."""
+        self.created += other.created
+        self.updated += other.updated
+        self.unchanged += other.unchanged
+        self.errors += other.errors
+        self.parse_seconds += other.parse_seconds
+        self.clean_seconds += other.clean_seconds
+        self.write_seconds += other.write_seconds
+
+    @property
+    def rows(self):
+        return self.created + self.updated + self.unchanged + len(self.errors)
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.seconds if self.seconds else 0.0
+
+
+class ComponentImporter:
+    """
+    Imports records of one component type. Usage:
+
+        importer = ComponentImporter(CPU, batch_size=500)
+        stats = importer.run(iter_json_records('cpus.json'))
+
+    Like the old update_or_create(name=...) loop, a record updates the component
+    of the same type with the same name, or creates it. If a name appears twice,
+    the later record wins. Records identical to what was last imported are skipped.
+    """
+
+    def __init__(self, ModelClass, batch_size=DEFAULT_BATCH_SIZE, progress=None, source='', quarantine=True):
+        self.model = ModelClass
+        self.kind = ModelClass.KIND
+        self.batch_size = batch_size
+        self.progress = progress  # optional callable(stats), called after every batch
+        self.source = source  # the file name saved with quarantined rows
+        self.quarantine = quarantine  # False: rejected rows are only reported, not saved
+        self.cleaners = FIELD_CLEANERS.get(self.kind, {})
+
+        # Worked out once instead of once per row.
+        self.parent_fields = [f for f in Component._meta.concrete_fields if f.editable and not f.primary_key]
+        self.child_fields = [f for f in ModelClass._meta.local_concrete_fields if not f.primary_key]
+        self.fields = {f.name: f for f in self.parent_fields + self.child_fields}
+        self.checks = {name: check for name, f in self.fields.items() if (check := database_check(f))}
+        # source_digest isn't editable (so it's never read from a record) but we do write it.
+        self.parent_names = {f.name for f in self.parent_fields} | {'source_digest'}
+        # Fields a NEW component can't do without (NOT NULL and no default).
+        self.required = [name for name, f in self.fields.items() if not f.null and f.get_default() is None]
+
+        self.ids = {}  # name -> id of the existing components of this type
+        self.digests = {}  # name -> source_digest of the existing components
+
+    def load_existing(self):
+        # Newest first, so for duplicate names the oldest (lowest id) wins, like .get() would.
+        for name, pk, digest in self.model.objects.order_by('-pk').values_list('name', 'pk', 'source_digest'):
+            self.ids[name] = pk
+            self.digests[name] = digest
+
+    @staticmethod
+    def digest(values):
+        """
+        SHA-256 of a cleaned record. It's taken after cleaning, so '8GB' and '8 GB'
+        give the same digest; keys are sorted so the field order in the feed doesn't matter.
+        """
+        text = json.dumps(values, sort_keys=True, separators=(',', ':'), default=str)
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+    def clean_columns(self, chunk):
+        """
+        Runs the cleaners over a list of raw records column by column (all the vram_gb
+        values in one call, ...). Returns one {field: cleaned value} dict per record.
+        """
+        cleaned = [{} for _ in chunk]
+        for field_name, cleaner in self.cleaners.items():
+            positions = [i for i, entry in enumerate(chunk) if isinstance(entry, dict) and field_name in entry]
+            if positions:
+                column = clean_column(cleaner, [chunk[i][field_name] for i in positions])
+                for i, value in zip(positions, column):
+                    cleaned[i][field_name] = value
+        return cleaned
+
+    def clean(self, entry, cleaned=None):
+        """
+        Returns (name, {field: value}) for one raw record. Raises ImportRowError.
+        'cleaned' holds values clean_columns() already ran through the cleaners.
+        """
+        name = entry.get('name') if isinstance(entry, dict) else None
+        if not name:
+            raise ImportRowError("Record has no name.")
+
+        values = {}
+        for field_name, raw_value in entry.items():
+            field = self.fields.get(field_name)
+            if field is None:
+                continue  # Not one of our fields (e.g. a product URL from the scraper).
+            cleaner = self.cleaners.get(field_name)
+            if cleaned is not None and field_name in cleaned:
+                value = cleaned[field_name]
+            else:
+                value = cleaner(raw_value) if cleaner else raw_value
+            if value == '' and not isinstance(field, models.CharField):
+                value = None
+            if value is not None:
+                try:
+                    value = field.to_python(value)
+                    if field_name in self.checks:
+                        self.checks[field_name](value)
+                except ValidationError as e:
+                    raise ImportRowError(f"{field_name}={raw_value!r}: {' '.join(e.messages)}")
+            if value is None and not field.null:
+                raise ImportRowError(f"{field_name}={raw_value!r} is not a valid value.")
+            values[field_name] = value
+
+        return name, values
+
+    def clean_batches(self, records, stats):
+        """
+        Reads and cleans 'records' batch_size at a time. Yields lists of
+        (row number, name, values, digest, raw record); rejected rows go to stats.errors.
+        Doesn't touch the database, so import_catalog can run it in a worker process.
+        """
+        records = iter(records)
+        row = 0
+        while True:
+            started = time.perf_counter()
+            chunk = list(islice(records, self.batch_size))
+            parsed = time.perf_counter()
+            stats.parse_seconds += parsed - started
+            if not chunk:
+                return
+
+            rows = []
+            for entry, cleaned in zip(chunk, self.clean_columns(chunk)):
+                row += 1
+                try:
+                    name, values = self.clean(entry, cleaned)
+                except ImportRowError as e:
+                    stats.errors.append(Rejection(entry.get('name') if isinstance(entry, dict) else None, str(e), row, entry))
+                    continue
+                rows.append((row, name, values, self.digest(values), entry))
+            stats.clean_seconds += time.perf_counter() - parsed
+            yield rows
+
+    def write_rows(self, rows, stats):
+        """Writes one list of cleaned rows from clean_batches(), skipping the unchanged ones."""
+        batch = {}
+        origins = {}  # name -> (row number, raw record), for rejecting a row the database refuses
+        for row, name, values, digest, entry in rows:
+            if self.digests.get(name) == digest:
+                stats.unchanged += 1
+                continue
+            if name not in self.ids:
+                missing = [field_name for field_name in self.required if field_name not in values]
+                if missing:
+                    stats.errors.append(Rejection(name, f"New component is missing: {', '.join(missing)}.", row, entry))
+                    continue
+            batch[name] = dict(values, source_digest=digest)
+            origins[name] = (row, entry)
+
+        if batch:
+            started = time.perf_counter()
+            self._write(batch, stats, origins)
+            stats.write_seconds += time.perf_counter() - started
+
+    def run(self, records):
+        """Cleans and writes all records. Returns an ImportStats."""
+        stats = ImportStats()
+        start = time.perf_counter()
+        self.load_existing()
+
+        saved = 0  # rejections already in the quarantine table
+        for rows in self.clean_batches(records, stats):
+            self.write_rows(rows, stats)
+            if self.quarantine and len(stats.errors) > saved:
+                self.save_rejections(stats.errors[saved:], self.source)
+                saved = len(stats.errors)
+            stats.seconds = time.perf_counter() - start
+            if self.progress:
+                self.progress(stats)
+
+        if stats.created or stats.updated:
+            # One bump for the whole import instead of one per row.
+            CatalogVersion.bump()
+        stats.seconds = time.perf_counter() - start
+        return stats
+
+    def save_rejections(self, rejections, source):
+        """Saves rejected rows to the quarantine table, for 'manage.py reimport_quarantine'."""
+        QuarantinedRow.objects.bulk_create(
+            [
+                QuarantinedRow(kind=self.kind, source=str(source)[:500], row_number=rejection.row, payload=rejection.payload, error=rejection.message)
+                for rejection in rejections
+            ],
+            batch_size=self.batch_size,
+        )
+
+    def _write(self, batch, stats, origins):
+        """
+        Writes one batch in one transaction. Rows the database would refuse are already
+        rejected while cleaning, so this normally just works. If it still fails, the batch
+        is split in half and each half retried: a bad row is found in a few transactions
+        instead of falling back to one transaction per row.
+        """
+        try:
+            self._write_batch(batch, stats)
+        except DatabaseError as e:
+            names = list(batch)
+            if len(names) == 1:
+                row, entry = origins[names[0]]
+                stats.errors.append(Rejection(names[0], str(e), row, entry))
+                return
+            middle = len(names) // 2
+            for half in (names[:middle], names[middle:]):
+                self._write({name: batch[name] for name in half}, stats, origins)
+
+    def _write_batch(self, batch, stats):
+        new = {name: values for name, values in batch.items() if name not in self.ids}
+        existing = {self.ids[name]: values for name, values in batch.items() if name in self.ids}
+
+        with transaction.atomic():
+            created_ids = self._create(new) if new else {}
+            if existing:
+                self._update(existing)
+                components_updated.send(sender=self.model, component_ids=list(existing))
+            index_components(Component.objects.polymorphic().filter(pk__in=[*created_ids.values(), *existing]))
+
+        # Only remember the new ids and digests once the transaction went through.
+        self.ids.update(created_ids)
+        self.digests.update((name, values['source_digest']) for name, values in batch.items())
+        stats.created += len(created_ids)
+        stats.updated += len(existing)
+
+    def _create(self, new):
+        """Inserts new components into both tables. Returns {name: new id}."""
+        parents = [
+            Component(kind=self.kind, **{k: v for k, v in values.items() if k in self.parent_names})
+            for values in new.values()
+        ]
+        if connection.features.can_return_rows_from_bulk_insert:
+            Component.objects.bulk_create(parents)
+        else:
+            # MySQL doesn't hand back the new ids. Looking them up by name afterwards
+            # could find a same-named component someone else adds meanwhile, so the
+            # parents go in one at a time, each INSERT returning its own id.
+            self._insert_parent_rows(parents)
+        created_ids = {parent.name: parent.pk for parent in parents}
+
+        children = [
+            self.model(component_ptr_id=created_ids[name], **{k: v for k, v in values.items() if k not in self.parent_names})
+            for name, values in new.items()
+        ]
+        self._insert_child_rows(children)
+        return created_ids
+
+    def _insert_parent_rows(self, parents):
+        """One INSERT per row into catalog_component, setting each parent's pk from the id the database gave it."""
+        meta = Component._meta
+        fields = [field for field in meta.local_concrete_fields if field is not meta.pk]
+        quote = connection.ops.quote_name
+        sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+            quote(meta.db_table),
+            ', '.join(quote(field.column) for field in fields),
+            ', '.join(['%s'] * len(fields)),
+        )
+        with connection.cursor() as cursor:
+            for parent in parents:
+                cursor.execute(sql, [field.get_db_prep_save(field.pre_save(parent, add=True), connection) for field in fields])
+                parent.pk = connection.ops.last_insert_id(cursor, meta.db_table, meta.pk.column)
+
+    def _insert_child_rows(self, children):
+        """One multi-row INSERT into the child table (e.g. catalog_cpu) for components whose parent row exists."""
+        fields = self.model._meta.local_concrete_fields  # the link to the parent plus the type's own fields
+        quote = connection.ops.quote_name
+        sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+            quote(self.model._meta.db_table),
+            ', '.join(quote(field.column) for field in fields),
+            ', '.join(['%s'] * len(fields)),
+        )
+        rows = [[field.get_db_prep_save(field.pre_save(child, add=True), connection) for field in fields] for child in children]
+        with connection.cursor() as cursor:
+            cursor.executemany(sql, rows)
+
+    def _update(self, existing):
+        """bulk_update, grouped by which fields the records have, so missing fields are left alone."""
+        groups = {}
+        for pk, values in existing.items():
+            groups.setdefault(tuple(sorted(values)), []).append(self.model(id=pk, component_ptr_id=pk, **values))
+        for field_names, objs in groups.items():
+            if field_names:
+                self.model.objects.bulk_update(objs, list(field_names), batch_size=self.batch_size)
+
+
+# ==============================================================================
+# 4. MANY FILES AT ONCE (manage.py import_catalog)
+# Worker processes parse and clean whole files and send the cleaned batches over a
+# queue; this process is the only one that writes to the database.
+# ==============================================================================
+def kind_for_path(path):
+    """Works out the component type from a file name: 'CPU.json', 'gpu.jsonl', 'psu_2026-10-18.json'."""
+    match = re.match(r'[A-Za-z]+', Path(path).name)
+    return Component.normalize_kind(match.group(0) if match else '')
+
+
+def _clean_file(kind, path, batch_size, send):
+    """
+    Parses and cleans one file, calling send(('rows', kind, path, rows)) per batch and
+    send(('done', kind, path, stats, failure)) at the end. 'failure' is None, or the
+    message if the file couldn't be read (the batches sent before that still count).
+    """
+    stats = ImportStats()
+    importer = ComponentImporter(KIND_MODEL_MAP[kind], batch_size=batch_size)
+    failure = None
+    try:
+        for rows in importer.clean_batches(iter_json_records(path), stats):
+            send(('rows', kind, path, rows))
+    except (OSError, ValueError) as e:  # json.JSONDecodeError is a ValueError
+        failure = str(e)
+    send(('done', kind, path, stats, failure))
+
+
+_results = None  # in a worker process: the queue to the writer
+
+
+def _start_worker(queue):
+    global _results
+    _results = queue
+
+
+def _clean_file_in_worker(kind, path, batch_size):
+    _clean_file(kind, path, batch_size, _results.put)
+
+
+def import_files(files, workers=1, batch_size=DEFAULT_BATCH_SIZE, progress=None):
+    """
+    Imports a list of (kind, path) files. With workers > 1, parsing and cleaning run in
+    that many processes while this process writes. Returns ({kind: ImportStats}, {path: failure}).
+    'progress' is an optional callable(kind, path, stats) called when a file is finished.
+    """
+    importers = {}
+    totals = {}
+    failures = {}
+
+    def stats_for(kind):
+        if kind not in importers:
+            importers[kind] = ComponentImporter(KIND_MODEL_MAP[kind], batch_size=batch_size)
+            importers[kind].load_existing()
+            totals[kind] = ImportStats()
+        return totals[kind]
+
+    def handle(message):
+        if message[0] == 'rows':
+            _, kind, path, rows = message
+            stats = stats_for(kind)
+            rejected = len(stats.errors)
+            importers[kind].write_rows(rows, stats)
+            importers[kind].save_rejections(stats.errors[rejected:], path)
+        else:
+            _, kind, path, file_stats, failure = message
+            stats_for(kind).merge(file_stats)  # parse/clean times and rejected rows
+            importers[kind].save_rejections(file_stats.errors, path)
+            if failure:
+                failures[path] = failure
+            if progress:
+                progress(kind, path, file_stats)
+
+    # Forking is cheap and the workers inherit the loaded Django setup. Where fork
+    # isn't available (Windows) everything runs in this process instead.
+    if workers > 1 and len(files) > 1 and 'fork' in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context('fork')
+        # Bounded, so workers wait for the writer instead of piling batches up in memory.
+        queue = context.Queue(maxsize=workers * 4)
+        # The workers are copies of this process and must not share its database connections.
+        connections.close_all()
+        with ProcessPoolExecutor(workers, mp_context=context, initializer=_start_worker, initargs=(queue,)) as pool:
+            futures = [pool.submit(_clean_file_in_worker, kind, str(path), batch_size) for kind, path in files]
+            remaining = len(files)
+            while remaining:
+                try:
+                    message = queue.get(timeout=1)
+                except Empty:
+                    # A worker that crashed never sends 'done', so don't wait for it forever.
+                    for future in futures:
+                        if future.done() and future.exception():
+                            raise future.exception()
+                    continue
+                handle(message)
+                if message[0] == 'done':
+                    remaining -= 1
+    else:
+        for kind, path in files:
+            _clean_file(kind, str(path), batch_size, handle)
+
+    if any(stats.created or stats.updated for stats in totals.values()):
+        # One bump for the whole catalog.
+        CatalogVersion.bump()
+    return totals, failures
+
+#__________________________________________________________________________________________________________________________
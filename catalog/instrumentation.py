@@ -0,0 +1,243 @@
+# catalog/instrumentation.py
+
+#__________________________________________________________________________________________________________________________ (akn)
+
+"""
+Per-request SQL instrumentation (SQLProfileMiddleware).
+
+Every query the request makes goes through a database execute wrapper (Django's
+hook for this; it works with DEBUG off, unlike connection.queries). Per request we
+keep:
+
+  * the number of queries and the total time spent in the database,
+  * the slowest statements (SQL text only, never the parameters),
+  * the SHAPE of every statement: the SQL with numbers, strings and IN (...) lists
+    blanked out. The same shape run SQL_PROFILE_REPEAT_THRESHOLD times or more in one request
+    is almost always a loop doing one query per item (an "N+1"), so it's flagged,
+    with the view and the line of our code that ran it.
+
+It comes out three ways:
+
+  1. a Server-Timing header on every response (db time, query count, N+1 count),
+     which browsers show in the dev tools' Network > Timing tab;
+  2. a JSON log line on the 'buildforge.sql' logger for a sample of requests
+     (SQL_PROFILE_SAMPLE_RATE), at WARNING level if it found an N+1;
+  3. the staff page /catalog/sql-profile/, made from the last RECENT_REQUESTS
+     requests this process served (each worker process keeps its own).
+"""
+
+import json
+import logging
+import os
+import random
+import re
+import threading
+import time
+import traceback
+from collections import deque
+from contextlib import ExitStack
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger('buildforge.sql')
+
+# SQL_PROFILE_SAMPLE_RATE and SQL_PROFILE_REPEAT_THRESHOLD are read from the settings
+# on every request (so override_settings works); these are the defaults.
+SAMPLE_RATE = 0.01
+REPEAT_THRESHOLD = 5
+SLOWEST = 5  # statements kept per request
+RECENT_REQUESTS = 500
+SQL_PREVIEW = 300  # characters of SQL kept for the slowest statements
+
+# Blanked out to get a statement's shape.
+IN_LIST_RE = re.compile(r"\(\s*(?:%s|\?)(?:\s*,\s*(?:%s|\?))*\s*\)")
+STRING_RE = re.compile(r"'(?:[^']|'')*'")
+NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+SPACE_RE = re.compile(r"\s+")
+
+
+def statement_shape(sql):
+    """'... WHERE id IN (%s, %s, %s) LIMIT 21' -> '... WHERE id IN (...) LIMIT ?'"""
+    shape = STRING_RE.sub('?', sql)
+    shape = NUMBER_RE.sub('?', shape)
+    shape = IN_LIST_RE.sub('(...)', shape)
+    return SPACE_RE.sub(' ', shape).strip()
+
+
+def _calling_line():
+    """'builds/views.py:123 in workbench_view': the innermost frame of our own code (not Django's, not this file's)."""
+    base = str(settings.BASE_DIR)
+    for frame in reversed(traceback.extract_stack()[:-2]):
+        filename = frame.filename
+        if filename.startswith(base) and 'site-packages' not in filename and not filename.endswith('instrumentation.py'):
+            return f"{os.path.relpath(filename, base)}:{frame.lineno} in {frame.name}"
+    return None
+
+
+# ==============================================================================
+# 1. ONE REQUEST
+# ==============================================================================
+class QueryProfile:
+    """The execute wrapper. Collects everything about the queries of one request."""
+
+    def __init__(self, repeat_threshold=REPEAT_THRESHOLD):
+        self.repeat_threshold = repeat_threshold
+        self.count = 0
+        self.db_ms = 0.0
+        self.slowest = []  # (ms, sql preview), at most SLOWEST, slowest first
+        self.shapes = {}   # shape -> [count, total ms, calling line]
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = (time.perf_counter() - start) * 1000
+            self.count += 1
+            self.db_ms += elapsed
+
+            if len(self.slowest) < SLOWEST or elapsed > self.slowest[-1][0]:
+                self.slowest.append((elapsed, sql[:SQL_PREVIEW]))
+                self.slowest.sort(key=lambda item: -item[0])
+                del self.slowest[SLOWEST:]
+
+            shape = statement_shape(sql)
+            seen = self.shapes.setdefault(shape, [0, 0.0, None])
+            seen[0] += 1
+            seen[1] += elapsed
+            if seen[0] == self.repeat_threshold:
+                # Walking the stack is slow, so only once per suspicious shape.
+                seen[2] = _calling_line()
+
+    def repeated(self):
+        """The likely N+1s: [{'shape', 'count', 'ms', 'caller'}], most repeated first."""
+        return sorted(
+            (
+                {'shape': shape, 'count': count, 'ms': round(ms, 3), 'caller': caller}
+                for shape, (count, ms, caller) in self.shapes.items() if count >= self.repeat_threshold
+            ),
+            key=lambda item: -item['count'],
+        )
+
+
+def view_name(request):
+    """'builds:workbench' (or the view function's dotted path if the URL has no name)."""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unresolved'
+    return match.view_name or match._func_path
+
+
+def server_timing(profile, total_ms, repeated):
+    """The Server-Timing header value: durations and counts only, no SQL."""
+    parts = [
+        f'db;dur={profile.db_ms:.1f};desc="{profile.count} queries"',
+        f'app;dur={total_ms - profile.db_ms:.1f}',
+    ]
+    if repeated:
+        parts.append(f'nplus1;desc="{len(repeated)} repeated statements"')
+    return ', '.join(parts)
+
+
+# ==============================================================================
+# 2. THE MIDDLEWARE
+# ==============================================================================
+class SQLProfileMiddleware:
+    """
+    Goes near the top of MIDDLEWARE, so the session and user lookups of the
+    middleware below it are counted too.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        profile = QueryProfile(getattr(settings, 'SQL_PROFILE_REPEAT_THRESHOLD', REPEAT_THRESHOLD))
+        start = time.perf_counter()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(profile))
+            response = self.get_response(request)
+        total_ms = (time.perf_counter() - start) * 1000
+
+        repeated = profile.repeated()
+        response['Server-Timing'] = server_timing(profile, total_ms, repeated)
+
+        record = {
+            'view': view_name(request),
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'total_ms': round(total_ms, 3),
+            'db_ms': round(profile.db_ms, 3),
+            'queries': profile.count,
+            'slowest': [{'ms': round(ms, 3), 'sql': sql} for ms, sql in profile.slowest],
+            'repeated': repeated,
+        }
+        recent.add(record)
+        if random.random() < getattr(settings, 'SQL_PROFILE_SAMPLE_RATE', SAMPLE_RATE):
+            logger.log(logging.WARNING if repeated else logging.INFO, json.dumps(record))
+        return response
+
+
+# ==============================================================================
+# 3. RECENT REQUESTS (FOR THE STAFF PAGE)
+# ==============================================================================
+class RecentRequests:
+    """The last RECENT_REQUESTS request records of this process."""
+
+    def __init__(self, size=RECENT_REQUESTS):
+        self._records = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def add(self, record):
+        with self._lock:
+            self._records.append(record)
+
+    def clear(self):
+        with self._lock:
+            self._records.clear()
+
+    def records(self):
+        with self._lock:
+            return list(self._records)
+
+    def summary(self):
+        """
+        Returns (views, repeated, slowest):
+          views    - per view: requests, average / max queries, average db and total ms, slowest first
+          repeated - per (view, shape): how many requests repeated it, the most repeats, and where from
+          slowest  - the slowest statements seen
+        """
+        views = {}
+        repeated = {}
+        slowest = []
+        for record in self.records():
+            view = views.setdefault(record['view'], {'view': record['view'], 'requests': 0, 'queries': 0, 'max_queries': 0, 'db_ms': 0.0, 'total_ms': 0.0})
+            view['requests'] += 1
+            view['queries'] += record['queries']
+            view['max_queries'] = max(view['max_queries'], record['queries'])
+            view['db_ms'] += record['db_ms']
+            view['total_ms'] += record['total_ms']
+            for item in record['repeated']:
+                seen = repeated.setdefault((record['view'], item['shape']), {
+                    'view': record['view'], 'shape': item['shape'], 'requests': 0, 'max_count': 0, 'caller': item['caller'],
+                })
+                seen['requests'] += 1
+                seen['max_count'] = max(seen['max_count'], item['count'])
+            slowest.extend(dict(statement, view=record['view']) for statement in record['slowest'])
+
+        for view in views.values():
+            view['avg_queries'] = view.pop('queries') / view['requests']
+            view['avg_db_ms'] = view.pop('db_ms') / view['requests']
+            view['avg_total_ms'] = view.pop('total_ms') / view['requests']
+        return (
+            sorted(views.values(), key=lambda view: -view['avg_total_ms']),
+            sorted(repeated.values(), key=lambda item: (-item['requests'], -item['max_count'])),
+            sorted(slowest, key=lambda statement: -statement['ms'])[:20],
+        )
+
+
+recent = RecentRequests()
+
+#__________________________________________________________________________________________________________________________
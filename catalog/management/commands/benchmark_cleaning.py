@@ -0,0 +1,69 @@
+# catalog/management/commands/benchmark_cleaning.py
+
+#__________________________________________________________________________________________________________________________ (akn)
+
+import random
+import statistics
+import time
+from django.core.management.base import BaseCommand
+from catalog.cleaning import (
+    clean_capacity_gb, clean_capacity_gb_column, clean_decimal, clean_decimal_column, clean_integer, clean_integer_column,
+)
+
+
+# Synthetic feed values in the shapes the scrapers give us.
+def capacity_value(rng):
+    return rng.choice([f"{rng.choice([4, 8, 16, 32, 64, 128, 256, 512])}GB", f"{rng.choice([1, 2, 4])} TB", f"2 x {rng.choice([8, 16])}GB", 'N/A'])
+
+
+def integer_value(rng):
+    return rng.choice([f"{rng.randint(2, 64)} Cores", f"{rng.randint(1000, 8000)} MHz", f"{rng.randint(300, 1600)}W", 'N/A', rng.randint(1, 99)])
+
+
+def decimal_value(rng):
+    low = rng.randint(150, 450) / 100
+    return rng.choice([f"{low:.2f} GHz - {low + rng.randint(20, 150) / 100:.2f} GHz", f"{low:.2f} GHz", 'N/A'])
+
+
+COLUMNS = [
+    ('capacity (TB/GB)', capacity_value, clean_capacity_gb, clean_capacity_gb_column),
+    ('integer', integer_value, clean_integer, clean_integer_column),
+    ('decimal (ranges)', decimal_value, clean_decimal, clean_decimal_column),
+]
+
+
+class Command(BaseCommand):
+    help = 'Times the scalar clean_*() helpers against the column cleaners on a synthetic column, and checks they agree.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', type=int, default=1_000_000, help='Values in the synthetic column.')
+        parser.add_argument('--repeat', type=int, default=3, help='How many times each cleaner is timed.')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **kwargs):
+        size = kwargs['size']
+        rng = random.Random(kwargs['seed'])
+
+        self.stdout.write(f"{'column':<20}{'scalar ms':>12}{'column ms':>12}{'speedup':>10}{'distinct':>10}")
+        for label, make_value, clean, clean_column in COLUMNS:
+            values = [make_value(rng) for _ in range(size)]
+            scalar_ms, expected = self._time(kwargs['repeat'], lambda: [clean(value) for value in values])
+            column_ms, result = self._time(kwargs['repeat'], lambda: clean_column(values))
+            if result != expected:
+                self.stderr.write(self.style.ERROR(f"{label}: the column cleaner gave different results!"))
+            distinct = len(set(map(repr, values)))
+            self.stdout.write(f"{label:<20}{scalar_ms:>12.0f}{column_ms:>12.0f}{scalar_ms / column_ms:>9.1f}x{distinct:>10}")
+
+        self.stdout.write(self.style.SUCCESS("Benchmark finished."))
+
+    def _time(self, repeat, run):
+        """Returns (median milliseconds, the result of the last run)."""
+        timings = []
+        result = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = run()
+            timings.append((time.perf_counter() - start) * 1000)
+        return statistics.median(timings), result
+
+#__________________________________________________________________________________________________________________________
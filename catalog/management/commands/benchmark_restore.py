@@ -0,0 +1,70 @@
+# catalog/management/commands/benchmark_restore.py
+
+#__________________________________________________________________________________________________________________________ (akn)
+
+import os
+import tempfile
+import time
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from catalog.archive import read_snapshot, restore_snapshot, write_snapshot
+from catalog.models import Component, ComponentSearchTerm
+
+
+class Command(BaseCommand):
+    help = (
+        'Times "loaddata catalog_data.json" against restoring the same catalog from a snapshot file. '
+        'Everything runs inside a transaction that is rolled back, so the database is left as it was.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('fixture', nargs='?', default='catalog_data.json', help='The catalog fixture to compare with.')
+
+    def handle(self, *args, **kwargs):
+        fixture = kwargs['fixture']
+        handle, snapshot_path = tempfile.mkstemp(suffix='.json.gz')
+        os.close(handle)
+
+        try:
+            with transaction.atomic():
+                Component.objects.all().delete()
+
+                start = time.perf_counter()
+                call_command('loaddata', fixture, verbosity=0)
+                loaddata_seconds = time.perf_counter() - start
+                loaded = self._catalog_rows()
+
+                write_snapshot(snapshot_path)
+                Component.objects.all().delete()
+
+                start = time.perf_counter()
+                restore_snapshot(read_snapshot(snapshot_path))
+                restore_seconds = time.perf_counter() - start
+                restored = self._catalog_rows()
+
+                transaction.set_rollback(True)
+        finally:
+            snapshot_size = os.path.getsize(snapshot_path)
+            os.remove(snapshot_path)
+
+        if restored != loaded:
+            self.stderr.write(self.style.ERROR("The restored catalog is different from the loaded fixture!"))
+        self.stdout.write(f"{'':<28}{'seconds':>10}{'file bytes':>14}")
+        self.stdout.write(f"{'loaddata ' + os.path.basename(fixture):<28}{loaddata_seconds:>10.3f}{os.path.getsize(fixture):>14,}")
+        self.stdout.write(f"{'restore_catalog':<28}{restore_seconds:>10.3f}{snapshot_size:>14,}")
+        self.stdout.write(self.style.SUCCESS(
+            f"restore_catalog is {loaddata_seconds / restore_seconds:.0f}x faster for {len(loaded[0]):,} components. "
+            "Changes rolled back."
+        ))
+
+    def _catalog_rows(self):
+        """Every component (with its kind's own fields) and search term, to compare the two loads."""
+        components = [
+            (component.get_type(), component.pk, sorted(component.get_specs().items()), component.name, component.price)
+            for component in Component.objects.polymorphic().order_by('pk')
+        ]
+        terms = list(ComponentSearchTerm.objects.order_by('component_id', 'term').values_list('component_id', 'term', 'weight'))
+        return components, terms
+
+#__________________________________________________________________________________________________________________________
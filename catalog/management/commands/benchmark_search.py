@@ -0,0 +1,82 @@
+# catalog/management/commands/benchmark_search.py
+
+#__________________________________________________________________________________________________________________________ (akn)
+
+import random
+import statistics
+import time
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+from catalog.models import Component
+from catalog.search import index_components, search_queryset
+
+
+MANUFACTURERS = ['AMD', 'Intel', 'NVIDIA', 'ASUS', 'MSI', 'Gigabyte', 'Corsair', 'G.Skill', 'Samsung', 'Seagate', 'Cooler Master', 'be quiet!']
+PRODUCT_WORDS = ['Ryzen', 'Core', 'GeForce', 'Radeon', 'Vengeance', 'Trident', 'Barracuda', 'Evo', 'Tomahawk', 'Strix', 'Gaming', 'Pro', 'Plus', 'Ultra', 'Aorus', 'Phantom', 'Dark', 'Power']
+QUERIES = ['ryzen', 'rtx 4070', 'corsair veng', 'msi tomahawk', 'samsung evo 1tb', 'g', 'dark power 13', 'zzzz']
+
+
+class Command(BaseCommand):
+    help = (
+        'Compares the search index against the old icontains search on a synthetic catalog. '
+        'Everything runs inside a transaction that is rolled back, so no data is kept.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--size', type=int, default=100_000, help='Number of synthetic components to create.')
+        parser.add_argument('--repeat', type=int, default=5, help='How many times each query is timed.')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **kwargs):
+        size = kwargs['size']
+        repeat = kwargs['repeat']
+        rng = random.Random(kwargs['seed'])
+
+        with transaction.atomic():
+            self.stdout.write(f"Creating {size:,} synthetic components...")
+            start = time.perf_counter()
+            components = Component.objects.bulk_create(
+                [
+                    Component(
+                        name=f"{rng.choice(PRODUCT_WORDS)} {rng.choice(PRODUCT_WORDS)} {rng.choice(['RTX', 'RX', 'X', 'K', ''])}{rng.randint(100, 9999)} {rng.choice(['', '16GB', '32GB', '1TB', '2TB'])}".strip(),
+                        manufacturer=rng.choice(MANUFACTURERS),
+                        price=rng.randint(2000, 300000),
+                    )
+                    for _ in range(size)
+                ],
+                batch_size=2000,
+            )
+            # Some databases (MySQL) don't return primary keys from bulk_create.
+            if components and components[0].pk is None:
+                components = Component.objects.order_by('-pk')[:size]
+            index_components(components, batch_size=5000)
+            self.stdout.write(f"  done in {time.perf_counter() - start:.1f}s\n")
+
+            self.stdout.write(f"{'query':<20}{'icontains ms':>14}{'index ms':>12}{'matches':>10}")
+            for query in QUERIES:
+                old_ms, old_count = self._time(repeat, lambda: self._icontains(query))
+                new_ms, new_count = self._time(repeat, lambda: search_queryset(Component.objects.all(), query))
+                self.stdout.write(f"{query:<20}{old_ms:>14.2f}{new_ms:>12.2f}{new_count:>10} (icontains: {old_count})")
+
+            transaction.set_rollback(True)
+
+        self.stdout.write(self.style.SUCCESS("Benchmark finished. Synthetic data rolled back."))
+
+    def _icontains(self, query):
+        """The search the views used before the index."""
+        return Component.objects.filter(Q(name__icontains=query) | Q(manufacturer__icontains=query))
+
+    def _time(self, repeat, make_queryset):
+        """Returns (median milliseconds, number of rows) for fetching the first page (48 rows) of results."""
+        timings = []
+        count = 0
+        for _ in range(repeat):
+            start = time.perf_counter()
+            queryset = make_queryset().order_by('name')
+            list(queryset[:48])
+            count = queryset.count()
+            timings.append((time.perf_counter() - start) * 1000)
+        return statistics.median(timings), count
+
+#__________________________________________________________________________________________________________________________
@@ -0,0 +1,82 @@
+# catalog/management/commands/benchmark_views.py
+
+#__________________________________________________________________________________________________________________________ (akn)
+
+import os
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from catalog.benchmarks import (
+    BYTES_TOLERANCE, LATENCY_TOLERANCE, VIEWS, BenchmarkError, compare, read_results, run_benchmarks, write_results,
+)
+from catalog.synthetic import DatasetGenerator, DEFAULT_COUNTS
+
+DEFAULT_BASELINE = os.path.join(settings.BASE_DIR, 'benchmark_baseline.json')
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmarks the main views through the test client on a generated dataset: latency percentiles, '
+        'queries and response bytes per view. Writes the results as JSON and fails if a view regressed '
+        'past the baseline. Everything runs inside a transaction that is rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=float, default=1.0, help='Size of the generated dataset (see generate_dataset).')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--existing', action='store_true', help="Benchmark the data already in the database instead of generating a dataset.")
+        parser.add_argument('--iterations', type=int, default=20, help='Timed requests per view.')
+        parser.add_argument('--warmup', type=int, default=3, help='Untimed requests per view first.')
+        parser.add_argument('--view', action='append', choices=[view.name for view in VIEWS], help='Only benchmark this view (repeatable).')
+        parser.add_argument('--output', default='benchmark_results.json', help='Where to write the results.')
+        parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='The stored results to compare with.')
+        parser.add_argument('--update-baseline', action='store_true', help='Save these results as the new baseline instead of comparing.')
+        parser.add_argument('--latency-tolerance', type=float, default=LATENCY_TOLERANCE, help='Allowed p50/p95 slowdown (0.25 = 25%%).')
+        parser.add_argument('--bytes-tolerance', type=float, default=BYTES_TOLERANCE, help='Allowed growth of the response size.')
+
+    def handle(self, *args, **kwargs):
+        with transaction.atomic():
+            if not kwargs['existing']:
+                counts = {name: int(default * kwargs['scale']) for name, default in DEFAULT_COUNTS.items()}
+                self.stdout.write(f"Generating a dataset (scale {kwargs['scale']:g})...")
+                DatasetGenerator(seed=kwargs['seed'], **counts).run()
+
+            self.stdout.write(f"{'view':<26}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'queries':>9}{'bytes':>11}")
+
+            def progress(name, metrics):
+                self.stdout.write(
+                    f"{name:<26}{metrics['p50_ms']:>9.1f}{metrics['p95_ms']:>9.1f}{metrics['p99_ms']:>9.1f}"
+                    f"{metrics['queries']:>9}{metrics['bytes']:>11,}"
+                )
+
+            try:
+                results = run_benchmarks(kwargs['iterations'], kwargs['warmup'], kwargs['view'], progress)
+            except BenchmarkError as e:
+                raise CommandError(str(e))
+            results['meta'].update({'scale': None if kwargs['existing'] else kwargs['scale'], 'seed': kwargs['seed']})
+            transaction.set_rollback(True)
+
+        write_results(results, kwargs['output'])
+        self.stdout.write(f"Results written to {kwargs['output']}.")
+
+        if kwargs['update_baseline']:
+            write_results(results, kwargs['baseline'])
+            self.stdout.write(self.style.SUCCESS(f"Baseline saved to {kwargs['baseline']}."))
+            return
+        if not os.path.exists(kwargs['baseline']):
+            self.stdout.write(self.style.WARNING(f"No baseline at {kwargs['baseline']}; run with --update-baseline to store one."))
+            return
+
+        baseline = read_results(kwargs['baseline'])
+        if baseline['meta'].get('scale') != results['meta']['scale']:
+            self.stdout.write(self.style.WARNING(
+                f"The baseline was measured at scale {baseline['meta'].get('scale')}, these results at scale {results['meta']['scale']}."
+            ))
+        regressions = compare(results, baseline, kwargs['latency_tolerance'], kwargs['bytes_tolerance'])
+        if regressions:
+            for message in regressions:
+                self.stderr.write(self.style.ERROR(f"  {message}"))
+            raise CommandError(f"{len(regressions)} regression(s) against {kwargs['baseline']}.")
+        self.stdout.write(self.style.SUCCESS("No regressions against the baseline."))
+
+#__________________________________________________________________________________________________________________________
@@ -0,0 +1,61 @@
+# catalog/management/commands/export_data.py
+
+#__________________________________________________________________________________________________________________________ (akn)
+
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from django.core.management.base import BaseCommand
+from django.db import connections
+from catalog.datafiles import DEFAULT_APPS, DEFAULT_CHUNK_SIZE, data_file_name, export_app
+
+
+class Command(BaseCommand):
+    help = (
+        'Exports the data of the site\'s apps to gzip JSON Lines files (users_data.jsonl.gz, ...) '
+        'in one process, streaming a chunk of rows at a time. Load them with "manage.py load_data".'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('apps', nargs='*', default=DEFAULT_APPS, help=f"Apps to export (default: {' '.join(DEFAULT_APPS)}).")
+        parser.add_argument('--output-dir', default='.', help='Where to write the files.')
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help='Rows read from the database at a time.')
+        parser.add_argument(
+            '--parallel', action='store_true',
+            help='Export the apps at the same time, one thread and database connection each. '
+                 'Each app is then read at a slightly different moment.',
+        )
+
+    def handle(self, *args, **kwargs):
+        output_dir = kwargs['output_dir']
+        os.makedirs(output_dir, exist_ok=True)
+        start = time.perf_counter()
+
+        def export(app_label):
+            path = os.path.join(output_dir, data_file_name(app_label))
+            started = time.perf_counter()
+            counts = export_app(app_label, path, chunk_size=kwargs['chunk_size'])
+            return app_label, path, counts, time.perf_counter() - started
+
+        def export_in_thread(app_label):
+            try:
+                return export(app_label)
+            finally:
+                connections.close_all()  # this thread's connections only
+
+        if kwargs['parallel'] and len(kwargs['apps']) > 1:
+            with ThreadPoolExecutor(len(kwargs['apps'])) as pool:
+                results = list(pool.map(export_in_thread, kwargs['apps']))
+        else:
+            results = [export(app_label) for app_label in kwargs['apps']]
+
+        for app_label, path, counts, seconds in results:
+            rows = sum(counts.values())
+            self.stdout.write(f"  {app_label}: {rows:,} rows -> {path} ({os.path.getsize(path):,} bytes, {seconds:.2f}s)")
+            if kwargs['verbosity'] >= 2:
+                for label, count in counts.items():
+                    self.stdout.write(f"      {label}: {count:,}")
+
+        self.stdout.write(self.style.SUCCESS(f"Export complete in {time.perf_counter() - start:.2f}s."))
+
+#__________________________________________________________________________________________________________________________
@@ -0,0 +1,40 @@
+# catalog/management/commands/generate_dataset.py
+
+#__________________________________________________________________________________________________________________________ (akn)
+
+import time
+from django.core.management.base import BaseCommand
+from catalog.synthetic import DEFAULT_COUNTS, SYNTHETIC_PASSWORD, DatasetGenerator
+
+
+class Command(BaseCommand):
+    help = (
+        'Bulk-creates a synthetic dataset (components of all seven kinds, users, builds with their parts, reviews, '
+        'wishlist items, listings and comments) for load and performance testing. The same seed gives the same data. '
+        'Rows are added to what is already in the database; nothing is deleted.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scale', type=float, default=1.0, help='Multiplies every default size below (e.g. --scale 15 gives ~1M build parts).')
+        parser.add_argument('--seed', type=int, default=42)
+        for name, default in DEFAULT_COUNTS.items():
+            parser.add_argument(f"--{name.replace('_', '-')}", type=int, help=f'How many to create (default: {default:,} x scale).')
+
+    def handle(self, *args, **kwargs):
+        counts = {
+            name: kwargs[name] if kwargs[name] is not None else int(default * kwargs['scale'])
+            for name, default in DEFAULT_COUNTS.items()
+        }
+        start = time.perf_counter()
+        generator = DatasetGenerator(seed=kwargs['seed'], progress=lambda message: self.stdout.write(f"  {message}"), **counts)
+        written = generator.run()
+
+        seconds = time.perf_counter() - start
+        for label, rows in written.items():
+            self.stdout.write(f"  {label}: {rows:,} rows")
+        self.stdout.write(self.style.SUCCESS(
+            f"Generated {sum(written.values()):,} rows in {seconds:.1f}s. "
+            f"Synthetic users log in as 'synthetic<id>' with the password '{SYNTHETIC_PASSWORD}'."
+        ))
+
+#__________________________________________________________________________________________________________________________
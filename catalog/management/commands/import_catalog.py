@@ -0,0 +1,107 @@
+# catalog/management/commands/import_catalog.py
+
+#__________________________________________________________________________________________________________________________ (akn)
+
+import json
+import os
+import time
+from pathlib import Path
+from django.core.management.base import BaseCommand, CommandError
+from catalog.models import Component
+from catalog.importing import DEFAULT_BATCH_SIZE, REPORTED_REJECTIONS, ImportStats, describe_rejection, import_files, kind_for_path
+
+DATA_SUFFIXES = ('.json', '.jsonl')
+
+
+class Command(BaseCommand):
+    help = (
+        'Imports many component files at once (any mix of kinds). Files are parsed and cleaned '
+        'in parallel worker processes; one writer does the database writes.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'sources', nargs='*',
+            help="Data files and/or directories of them. The kind comes from the file name (CPU.json, gpu.jsonl, ...).",
+        )
+        parser.add_argument(
+            '--manifest',
+            help='A JSON file listing [{"kind": "CPU", "path": "cpus.json"}, ...]; paths are relative to the manifest.',
+        )
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Worker processes for parsing and cleaning.')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help='Records written per transaction.')
+
+    def handle(self, *args, **kwargs):
+        files = self.collect_files(kwargs['sources'], kwargs['manifest'])
+        if not files:
+            raise CommandError("No files to import. Pass data files, directories or --manifest.")
+
+        workers = max(1, min(kwargs['workers'], len(files)))
+        self.stdout.write(f"Importing {len(files)} files with {workers} worker(s)...")
+
+        def report_file(kind, path, stats):
+            if kwargs['verbosity'] >= 2:
+                self.stdout.write(
+                    f"  {path} ({kind}): parsed in {stats.parse_seconds:.2f}s, cleaned in {stats.clean_seconds:.2f}s, "
+                    f"{len(stats.errors)} rejected"
+                )
+
+        start = time.perf_counter()
+        totals, failures = import_files(files, workers=workers, batch_size=kwargs['batch_size'], progress=report_file)
+        seconds = time.perf_counter() - start
+
+        for path, message in failures.items():
+            self.stderr.write(self.style.ERROR(f"Could not read {path}: {message}"))
+
+        overall = ImportStats()
+        for kind, stats in sorted(totals.items()):
+            overall.merge(stats)
+            for rejection in stats.errors[:REPORTED_REJECTIONS]:
+                self.stderr.write(self.style.ERROR(f"Rejected {kind} {describe_rejection(rejection)}"))
+            if len(stats.errors) > REPORTED_REJECTIONS:
+                self.stderr.write(self.style.ERROR(f"... and {len(stats.errors) - REPORTED_REJECTIONS} more {kind} rows."))
+            self.stdout.write(
+                f"  {kind}: Created: {stats.created}, Updated: {stats.updated}, "
+                f"Unchanged: {stats.unchanged}, Rejected: {len(stats.errors)}"
+            )
+
+        # --- Where the time went ---
+        # parse and clean are summed over the workers, so they can add up to more than the total.
+        self.stdout.write(
+            f"  Stages: parse {overall.parse_seconds:.2f}s, clean {overall.clean_seconds:.2f}s, "
+            f"write {overall.write_seconds:.2f}s"
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f"Catalog import complete! {overall.rows} rows in {seconds:.2f}s ({overall.rows / seconds if seconds else 0:,.0f} rows/s)"
+        ))
+        if overall.errors:
+            self.stdout.write("Rejected rows were saved to the quarantine table. Retry them with 'manage.py reimport_quarantine'.")
+
+    def collect_files(self, sources, manifest):
+        """Returns [(kind, path)] from the given files, directories and manifest."""
+        files = []
+        for source in sources:
+            path = Path(source)
+            if path.is_dir():
+                candidates = sorted(p for p in path.iterdir() if p.suffix.lower() in DATA_SUFFIXES)
+            elif path.exists():
+                candidates = [path]
+            else:
+                raise CommandError(f"File not found: {source}")
+            for candidate in candidates:
+                try:
+                    files.append((kind_for_path(candidate), candidate))
+                except ValueError:
+                    self.stderr.write(self.style.WARNING(f"Skipping {candidate}: can't tell the component type from its name."))
+
+        if manifest:
+            manifest_path = Path(manifest)
+            try:
+                entries = json.loads(manifest_path.read_text(encoding='utf-8'))
+                for entry in entries:
+                    files.append((Component.normalize_kind(entry['kind']), manifest_path.parent / entry['path']))
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                raise CommandError(f"Bad manifest {manifest}: {e}")
+        return files
+
+#__________________________________________________________________________________________________________________________
@@ -0,0 +1,44 @@
+# catalog/management/commands/rebuild_rating_summaries.py
+
+#__________________________________________________________________________________________________________________________ (akn)
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+from catalog.models import Component, Review, empty_rating_histogram, rating_summary
+
+
+class Command(BaseCommand):
+    help = (
+        'Recomputes rating_avg, rating_count and rating_histogram on every component from its reviews '
+        '(run after loaddata or bulk edits to reviews).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Components updated per batch.')
+
+    def handle(self, *args, **kwargs):
+        batch_size = kwargs['batch_size']
+
+        with transaction.atomic():
+            # One GROUP BY over all reviews instead of one query per component.
+            histograms = {}
+            for row in Review.objects.values('component_id', 'rating').annotate(number=Count('id')):
+                histograms.setdefault(row['component_id'], empty_rating_histogram())[row['rating'] - 1] = row['number']
+
+            changed = []
+            total = 0
+            components = Component.objects.select_for_update().only('rating_avg', 'rating_count', 'rating_histogram')
+            for component in components.order_by('pk').iterator(chunk_size=batch_size):
+                total += 1
+                summary = rating_summary(histograms.get(component.pk, empty_rating_histogram()))
+                if any(getattr(component, field) != value for field, value in summary.items()):
+                    for field, value in summary.items():
+                        setattr(component, field, value)
+                    changed.append(component)
+
+            Component.objects.bulk_update(changed, ['rating_avg', 'rating_count', 'rating_histogram'], batch_size=batch_size)
+
+        self.stdout.write(self.style.SUCCESS(f"Checked {total} components, updated {len(changed)} rating summaries."))
+
+#__________________________________________________________________________________________________________________________
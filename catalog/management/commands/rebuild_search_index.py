@@ -0,0 +1,32 @@
+# catalog/management/commands/rebuild_search_index.py
+
+#__________________________________________________________________________________________________________________________ (akn)
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from catalog.models import Component, ComponentSearchTerm
+from catalog.search import index_components
+
+
+class Command(BaseCommand):
+    help = 'Rebuilds the component search index from scratch (run after loaddata or bulk edits).'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Components indexed per batch.')
+
+    def handle(self, *args, **kwargs):
+        batch_size = kwargs['batch_size']
+        total_components = 0
+        total_terms = 0
+
+        with transaction.atomic():
+            ComponentSearchTerm.objects.all().delete()
+            ids = list(Component.objects.order_by('pk').values_list('pk', flat=True))
+            for start in range(0, len(ids), batch_size):
+                batch = Component.objects.polymorphic().filter(pk__in=ids[start:start + batch_size])
+                total_terms += index_components(batch, batch_size=batch_size)
+                total_components += len(ids[start:start + batch_size])
+
+        self.stdout.write(self.style.SUCCESS(f"Indexed {total_components} components ({total_terms} search terms)."))
+
+#__________________________________________________________________________________________________________________________
@@ -0,0 +1,62 @@
+# catalog/management/commands/reimport_quarantine.py
+
+#__________________________________________________________________________________________________________________________ (akn)
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+from catalog.models import Component, KIND_MODEL_MAP, QuarantinedRow
+from catalog.importing import DEFAULT_BATCH_SIZE, REPORTED_REJECTIONS, ComponentImporter
+
+
+class Command(BaseCommand):
+    help = (
+        'Tries the rows in the import quarantine again (e.g. after fixing a cleaner). '
+        'Rows that import are removed from the quarantine; the rest keep their new error.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--kind', help='Only retry rows of this component type (e.g. GPU).')
+        parser.add_argument('--source', help='Only retry rows that came from this file.')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help='Records written per transaction.')
+
+    def handle(self, *args, **kwargs):
+        quarantined = QuarantinedRow.objects.all()
+        if kwargs['kind']:
+            quarantined = quarantined.filter(kind=Component.normalize_kind(kwargs['kind']))
+        if kwargs['source']:
+            quarantined = quarantined.filter(source=kwargs['source'])
+
+        kinds = quarantined.order_by().values_list('kind', flat=True).distinct()
+        for kind in sorted(kinds):
+            # Oldest first, so when a name is in here twice the newer row wins, like in a normal import.
+            rows = list(quarantined.filter(kind=kind).order_by('id'))
+            importer = ComponentImporter(KIND_MODEL_MAP[kind], batch_size=kwargs['batch_size'], quarantine=False)
+            stats = importer.run(row.payload for row in rows)
+
+            # A rejection's row number is its position in 'rows' (1 = first).
+            still_rejected = {rejection.row: rejection for rejection in stats.errors}
+            now = timezone.now()
+            retried = []
+            for number, row in enumerate(rows, start=1):
+                if number in still_rejected:
+                    row.error = still_rejected[number].message
+                    row.attempts += 1
+                    row.last_attempt_at = now
+                    retried.append(row)
+
+            retried_ids = {row.pk for row in retried}
+            with transaction.atomic():
+                QuarantinedRow.objects.filter(pk__in=[row.pk for row in rows if row.pk not in retried_ids]).delete()
+                QuarantinedRow.objects.bulk_update(retried, ['error', 'attempts', 'last_attempt_at'], batch_size=kwargs['batch_size'])
+
+            for row in retried[:REPORTED_REJECTIONS]:
+                self.stderr.write(self.style.ERROR(f"Still rejected: {row}"))
+            self.stdout.write(
+                f"  {kind}: Created: {stats.created}, Updated: {stats.updated}, Unchanged: {stats.unchanged}, "
+                f"Still rejected: {len(retried)}"
+            )
+
+        self.stdout.write(self.style.SUCCESS(f"Done. {QuarantinedRow.objects.count()} rows left in the quarantine."))
+
+#__________________________________________________________________________________________________________________________
@@ -0,0 +1,42 @@
+# catalog/management/commands/restore_catalog.py
+
+#__________________________________________________________________________________________________________________________ (akn)
+
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from catalog.archive import SnapshotError, read_snapshot, restore_snapshot
+from catalog.models import Component
+from .snapshot_catalog import DEFAULT_PATH
+
+
+class Command(BaseCommand):
+    help = 'Fills the catalog tables from a snapshot written by "manage.py snapshot_catalog".'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', nargs='?', default=DEFAULT_PATH, help=f'The snapshot file (default: {DEFAULT_PATH}).')
+        parser.add_argument(
+            '--replace', action='store_true',
+            help='Delete the current catalog first. This also deletes everything that points at '
+                 'components: reviews, build parts and wishlist items.',
+        )
+
+    def handle(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            document = read_snapshot(kwargs['path'])
+        except SnapshotError as e:
+            raise CommandError(str(e))
+
+        with transaction.atomic():
+            if Component.objects.exists():
+                if not kwargs['replace']:
+                    raise CommandError("The catalog isn't empty. Use --replace to delete it first.")
+                Component.objects.all().delete()
+            counts = restore_snapshot(document)
+
+        for table, rows in counts.items():
+            self.stdout.write(f"  {table}: {rows:,} rows")
+        self.stdout.write(self.style.SUCCESS(f"Catalog restored from {kwargs['path']} in {time.perf_counter() - start:.2f}s."))
+
+#__________________________________________________________________________________________________________________________
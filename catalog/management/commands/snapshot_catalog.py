@@ -0,0 +1,29 @@
+# catalog/management/commands/snapshot_catalog.py
+
+#__________________________________________________________________________________________________________________________ (akn)
+
+import os
+import time
+from django.core.management.base import BaseCommand
+from catalog.archive import write_snapshot
+
+DEFAULT_PATH = 'catalog_snapshot.json.gz'
+
+
+class Command(BaseCommand):
+    help = 'Writes the whole catalog to a compressed, column-by-column snapshot file (restore it with "manage.py restore_catalog").'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', nargs='?', default=DEFAULT_PATH, help=f'Where to write the snapshot (default: {DEFAULT_PATH}).')
+
+    def handle(self, *args, **kwargs):
+        path = kwargs['path']
+        start = time.perf_counter()
+        counts = write_snapshot(path)
+        for table, rows in counts.items():
+            self.stdout.write(f"  {table}: {rows:,} rows")
+        self.stdout.write(self.style.SUCCESS(
+            f"Snapshot written to {path} ({os.path.getsize(path):,} bytes) in {time.perf_counter() - start:.2f}s."
+        ))
+
+#__________________________________________________________________________________________________________________________
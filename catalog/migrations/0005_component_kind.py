@@ -0,0 +1,36 @@
+from django.db import migrations, models
+
+
+# Maps each child table to the value stored in Component.kind.
+CHILD_MODEL_KINDS = [
+    ('CPU', 'CPU'),
+    ('GPU', 'GPU'),
+    ('Motherboard', 'Motherboard'),
+    ('RAM', 'RAM'),
+    ('Storage', 'Storage'),
+    ('PSU', 'PSU'),
+    ('Case', 'Case'),
+]
+
+
+def backfill_component_kind(apps, schema_editor):
+    Component = apps.get_model('catalog', 'Component')
+    for model_name, kind in CHILD_MODEL_KINDS:
+        ChildModel = apps.get_model('catalog', model_name)
+        Component.objects.filter(pk__in=ChildModel.objects.values('pk')).update(kind=kind)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0004_alter_gpu_gpu_clock_speed'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='component',
+            name='kind',
+            field=models.CharField(blank=True, choices=[('CPU', 'CPU'), ('GPU', 'GPU'), ('Motherboard', 'Motherboard'), ('RAM', 'RAM'), ('Storage', 'Storage'), ('PSU', 'PSU'), ('Case', 'Case')], db_index=True, default='', editable=False, max_length=20),
+        ),
+        migrations.RunPython(backfill_component_kind, migrations.RunPython.noop),
+    ]
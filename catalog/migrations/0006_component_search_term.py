@@ -0,0 +1,26 @@
+# Generated by Django 6.0 on 2026-10-18 03:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0005_component_kind'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ComponentSearchTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=50)),
+                ('weight', models.PositiveSmallIntegerField(default=1)),
+                ('component', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_terms', to='catalog.component')),
+            ],
+            options={
+                'unique_together': {('term', 'component')},
+            },
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 6.0 on 2026-10-18 03:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0006_component_search_term'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='component',
+            index=models.Index(fields=['name', 'id'], name='component_name_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='component',
+            index=models.Index(fields=['price', 'id'], name='component_price_id_idx'),
+        ),
+    ]
@@ -0,0 +1,138 @@
+from decimal import Decimal, InvalidOperation
+from django.db import migrations, models
+from catalog.cleaning import clean_capacity_gb, clean_decimal, clean_integer
+
+
+def clean_capacity(value):
+    # Values already cleaned by import_data are plain numbers ('16'); older ones may still carry units ('1TB').
+    cleaned = clean_capacity_gb(value)
+    return cleaned if cleaned is not None else clean_integer(value)
+
+
+def clean_clock_ghz(value):
+    number = clean_decimal(value)
+    if number is None:
+        return None
+    try:
+        number = Decimal(str(number)).quantize(Decimal('0.01'))
+    except InvalidOperation:
+        return None
+    # Anything that doesn't fit DecimalField(max_digits=4, decimal_places=2) isn't a GHz value.
+    return number if number < 100 else None
+
+
+# (model, field, cleaner) for every spec column that becomes numeric.
+SPEC_COLUMNS = [
+    ('CPU', 'clock_speed', clean_clock_ghz),
+    ('GPU', 'vram_gb', clean_capacity),
+    ('GPU', 'gpu_clock_speed', clean_integer),
+    ('RAM', 'capacity_gb', clean_capacity),
+    ('RAM', 'speed_mhz', clean_integer),
+    ('Storage', 'capacity_gb', clean_capacity),
+    ('PSU', 'wattage', clean_integer),
+    ('Case', 'max_gpu_length', clean_integer),
+]
+
+
+def normalize_spec_strings(apps, schema_editor):
+    """
+    Rewrites each text value as a plain number string (or NULL when it can't be parsed),
+    so the column type change that follows can cast it on every database.
+    """
+    for model_name, field, cleaner in SPEC_COLUMNS:
+        Model = apps.get_model('catalog', model_name)
+        to_update = []
+        for obj in Model.objects.only('pk', field).iterator():
+            raw = getattr(obj, field)
+            cleaned = cleaner(raw)
+            cleaned = None if cleaned is None else str(cleaned)
+            if cleaned != raw:
+                setattr(obj, field, cleaned)
+                to_update.append(obj)
+        Model.objects.bulk_update(to_update, [field], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0007_component_keyset_indexes'),
+    ]
+
+    operations = [
+        # Step 1: allow NULL for values the cleaners can't parse ('N/A').
+        migrations.AlterField(
+            model_name='cpu',
+            name='clock_speed',
+            field=models.CharField(help_text='Clock speed in GHz', max_length=30, null=True),
+        ),
+        migrations.AlterField(
+            model_name='gpu',
+            name='vram_gb',
+            field=models.CharField(help_text='VRAM in Gigabytes', max_length=7, null=True),
+        ),
+        migrations.AlterField(
+            model_name='ram',
+            name='capacity_gb',
+            field=models.CharField(help_text='Capacity per stick in Gigabytes', max_length=20, null=True),
+        ),
+        migrations.AlterField(
+            model_name='ram',
+            name='speed_mhz',
+            field=models.CharField(help_text='Speed in MHz', max_length=20, null=True),
+        ),
+        migrations.AlterField(
+            model_name='storage',
+            name='capacity_gb',
+            field=models.CharField(help_text='Capacity in Gigabytes', max_length=10, null=True),
+        ),
+        migrations.AlterField(
+            model_name='psu',
+            name='wattage',
+            field=models.CharField(help_text='Wattage in Watts', max_length=5, null=True),
+        ),
+
+        # Step 2: clean every value with the same helpers import_data uses.
+        migrations.RunPython(normalize_spec_strings, migrations.RunPython.noop),
+
+        # Step 3: switch to numeric, indexed columns.
+        migrations.AlterField(
+            model_name='cpu',
+            name='clock_speed',
+            field=models.DecimalField(blank=True, db_index=True, decimal_places=2, help_text='Clock speed in GHz', max_digits=4, null=True),
+        ),
+        migrations.AlterField(
+            model_name='gpu',
+            name='vram_gb',
+            field=models.PositiveIntegerField(blank=True, db_index=True, help_text='VRAM in Gigabytes', null=True),
+        ),
+        migrations.AlterField(
+            model_name='gpu',
+            name='gpu_clock_speed',
+            field=models.PositiveIntegerField(blank=True, db_index=True, help_text='Clock speed in MHz', null=True),
+        ),
+        migrations.AlterField(
+            model_name='ram',
+            name='capacity_gb',
+            field=models.PositiveIntegerField(blank=True, db_index=True, help_text='Capacity per stick in Gigabytes', null=True),
+        ),
+        migrations.AlterField(
+            model_name='ram',
+            name='speed_mhz',
+            field=models.PositiveIntegerField(blank=True, db_index=True, help_text='Speed in MHz', null=True),
+        ),
+        migrations.AlterField(
+            model_name='storage',
+            name='capacity_gb',
+            field=models.PositiveIntegerField(blank=True, db_index=True, help_text='Capacity in Gigabytes', null=True),
+        ),
+        migrations.AlterField(
+            model_name='psu',
+            name='wattage',
+            field=models.PositiveIntegerField(blank=True, db_index=True, help_text='Wattage in Watts', null=True),
+        ),
+        migrations.AlterField(
+            model_name='case',
+            name='max_gpu_length',
+            field=models.PositiveIntegerField(blank=True, db_index=True, help_text='Maximum GPU length in mm', null=True),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 6.0 on 2026-10-18 03:09
+
+import catalog.models
+from decimal import Decimal
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_rating_summary(apps, schema_editor):
+    # Fills in the summary from the reviews that already exist. rating_summary() is a plain
+    # function (no model access), so it is safe to reuse in a migration.
+    Component = apps.get_model('catalog', 'Component')
+    Review = apps.get_model('catalog', 'Review')
+    histograms = {}
+    for row in Review.objects.values('component_id', 'rating').annotate(number=Count('id')):
+        histograms.setdefault(row['component_id'], [0, 0, 0, 0, 0])[row['rating'] - 1] = row['number']
+    for component_id, histogram in histograms.items():
+        Component.objects.filter(pk=component_id).update(**catalog.models.rating_summary(histogram))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0008_numeric_spec_columns'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='component',
+            name='rating_avg',
+            field=models.DecimalField(decimal_places=2, default=Decimal('0'), editable=False, max_digits=3),
+        ),
+        migrations.AddField(
+            model_name='component',
+            name='rating_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='component',
+            name='rating_histogram',
+            field=models.JSONField(default=catalog.models.empty_rating_histogram, editable=False),
+        ),
+        migrations.RunPython(backfill_rating_summary, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='component',
+            index=models.Index(fields=['-rating_avg', 'id'], name='component_rating_id_idx'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 6.0 on 2026-10-18 03:14
+
+import django.utils.timezone
+import uuid
+from django.db import migrations, models
+
+
+def create_version_row(apps, schema_editor):
+    # CatalogVersion.bump() updates this single row.
+    CatalogVersion = apps.get_model('catalog', 'CatalogVersion')
+    CatalogVersion.objects.get_or_create(pk=1, defaults={'number': 1, 'stamp': uuid.uuid4().hex})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0009_component_rating_summary'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('number', models.PositiveBigIntegerField(default=0)),
+                ('stamp', models.CharField(blank=True, default='', max_length=32)),
+                ('changed_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.RunPython(create_version_row, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-18 03:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0010_catalog_version'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='component',
+            name='source_digest',
+            field=models.CharField(blank=True, default='', editable=False, max_length=64),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 6.0 on 2026-10-18 03:28
+
+import django.core.serializers.json
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0011_component_source_digest'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='QuarantinedRow',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('CPU', 'CPU'), ('GPU', 'GPU'), ('Motherboard', 'Motherboard'), ('RAM', 'RAM'), ('Storage', 'Storage'), ('PSU', 'PSU'), ('Case', 'Case')], db_index=True, max_length=20)),
+                ('source', models.CharField(blank=True, help_text='The file the row came from', max_length=500)),
+                ('row_number', models.PositiveIntegerField(blank=True, help_text='Position of the record in the file (1 = first)', null=True)),
+                ('payload', models.JSONField(encoder=django.core.serializers.json.DjangoJSONEncoder, help_text='The record exactly as it was in the feed', null=True)),
+                ('error', models.TextField()),
+                ('attempts', models.PositiveIntegerField(default=1, help_text='How many imports rejected it')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('last_attempt_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ['id'],
+            },
+        ),
+    ]
@@ -2,14 +2,104 @@
 
 #__________________________________________________________________________________________________________________________ (akn)
 
-from django.db import models
+import uuid
+from collections import defaultdict
+from decimal import Decimal
+from django.db import models, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.db.models.query import ModelIterable
 from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+
+# ==============================================================================
+# POLYMORPHIC LOADING
+# A plain Component queryset gives us base rows. To get the concrete CPU/GPU/...
+# objects without joining all seven child tables (or lazy-loading each child one
+# by one), we fetch the base rows first and then load the children with ONE
+# query per kind present, keeping the original order.
+# ==============================================================================
+class PolymorphicComponentIterable(ModelIterable):
+    def __iter__(self):
+        base_rows = list(super().__iter__())
+
+        # Querysets on a child model (e.g. CPU.objects) are already concrete.
+        if self.queryset.model is not Component:
+            yield from base_rows
+            return
+
+        ids_by_kind = defaultdict(list)
+        for component in base_rows:
+            ids_by_kind[component.kind].append(component.pk)
+
+        children = {}
+        for kind, ids in ids_by_kind.items():
+            ChildModel = KIND_MODEL_MAP.get(kind)
+            if ChildModel is not None:
+                children.update(ChildModel._base_manager.using(self.queryset.db).in_bulk(ids))
+
+        # Carry over any .annotate() values from the base row.
+        annotation_names = list(self.queryset.query.annotation_select)
+        for component in base_rows:
+            child = children.get(component.pk, component)
+            for name in annotation_names:
+                setattr(child, name, getattr(component, name))
+            yield child
+
+
+# ==============================================================================
+# COMPONENT QUERYSET
+# Lets us filter by the stored component kind in SQL, e.g.
+# Component.objects.of_kind('GPU') or CPU.objects.of_kind('cpu').
+# ==============================================================================
+class ComponentQuerySet(models.QuerySet):
+    def of_kind(self, kind):
+        """Returns only the components of the given kind (case-insensitive)."""
+        return self.filter(kind=Component.normalize_kind(kind))
+
+    def polymorphic(self):
+        """
+        Returns the concrete child objects (CPU, GPU, ...) instead of base Components,
+        in the same order, using one extra query per kind present in the results.
+        Also works as a Prefetch() queryset, e.g.
+        Prefetch('component', queryset=Component.objects.polymorphic()).
+        """
+        clone = self._chain()
+        clone._iterable_class = PolymorphicComponentIterable
+        return clone
+
+
+def empty_rating_histogram():
+    """Review counts for 1, 2, 3, 4 and 5 stars."""
+    return [0, 0, 0, 0, 0]
+
 
 # ==============================================================================
 # BASE COMPONENT MODEL
 # This is the parent class containing all the common fields for every component.
 # ==============================================================================
 class Component(models.Model):
+    # The discriminator. Each child model sets KIND below, and it is written to
+    # this column on save, so finding out "what is this component?" never needs
+    # to probe the seven child tables.
+    KIND = ''
+    # Numeric spec fields that component_list_view can range-filter, as
+    # {url name: field name}. Child models fill this in.
+    RANGE_FILTERS = {}
+    # Fields shown as checkbox facets in the catalog sidebar (see catalog/facets.py).
+    # 'price_band' is not a field; it groups the price into the bands in facets.PRICE_BANDS.
+    FACETS = ('manufacturer', 'price_band')
+    KIND_CHOICES = [
+        ('CPU', 'CPU'),
+        ('GPU', 'GPU'),
+        ('Motherboard', 'Motherboard'),
+        ('RAM', 'RAM'),
+        ('Storage', 'Storage'),
+        ('PSU', 'PSU'),
+        ('Case', 'Case'),
+    ]
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES, blank=True, default='', db_index=True, editable=False)
+
     name = models.CharField(max_length=500)
     manufacturer = models.CharField(max_length=255)
     image = models.URLField(max_length=1500, null=True, blank=True)
@@ -31,19 +121,56 @@ class Component(models.Model):
     )
     # =================================
 
+    # === REVIEW SUMMARY ===
+    # Stored on the component and kept in step with its reviews (see update_rating_summary()
+    # below), so grid cards and the "Top Rated" sort never aggregate catalog_review.
+    rating_avg = models.DecimalField(max_digits=3, decimal_places=2, default=Decimal('0'), editable=False)
+    rating_count = models.PositiveIntegerField(default=0, editable=False)
+    rating_histogram = models.JSONField(default=empty_rating_histogram, editable=False)
+
+    # === IMPORT CHANGE DETECTION ===
+    # SHA-256 of the cleaned feed record this row was last imported from (see
+    # catalog/importing.py). If a re-import brings the same digest, the row is skipped.
+    source_digest = models.CharField(max_length=64, blank=True, default='', editable=False)
+
+    objects = ComponentQuerySet.as_manager()
+
+    class Meta:
+        # Used by the keyset pagination in catalog/pagination.py (sort value + id tie-breaker).
+        indexes = [
+            models.Index(fields=['name', 'id'], name='component_name_id_idx'),
+            models.Index(fields=['price', 'id'], name='component_price_id_idx'),
+            # sort=rating: best average first.
+            models.Index(fields=['-rating_avg', 'id'], name='component_rating_id_idx'),
+        ]
+
     def __str__(self):
         return f"{self.manufacturer} {self.name}"
-    
+
+    def save(self, *args, **kwargs):
+        # Child models (CPU, GPU, ...) stamp their own kind on the parent row.
+        if type(self).KIND:
+            self.kind = type(self).KIND
+        # Saved outside the importer (e.g. edited in the admin), so the row no longer
+        # matches its feed record. Clearing the digest makes the next import rewrite it.
+        self.source_digest = ''
+        super().save(*args, **kwargs)
+
     def get_type(self):
-        """Returns the specific type of component (CPU, GPU, etc.)"""
-        if hasattr(self, 'cpu'): return "CPU"
-        if hasattr(self, 'gpu'): return "GPU"
-        if hasattr(self, 'motherboard'): return "Motherboard"
-        if hasattr(self, 'ram'): return "RAM"
-        if hasattr(self, 'storage'): return "Storage"
-        if hasattr(self, 'psu'): return "PSU"
-        if hasattr(self, 'case'): return "Case"
-        return "Component"
+        """Returns the specific type of component (CPU, GPU, etc.) without touching the database."""
+        return self.kind or type(self).KIND or "Component"
+
+    def get_specs(self):
+        """Returns the type-specific specifications as a {label: value} dict. Child models fill this in."""
+        return {}
+
+    @classmethod
+    def normalize_kind(cls, kind):
+        """Maps 'gpu', 'Gpu', 'GPU' etc. onto the stored value 'GPU'. Raises ValueError if unknown."""
+        for value, _label in cls.KIND_CHOICES:
+            if value.lower() == str(kind).lower():
+                return value
+        raise ValueError(f"Unknown component kind: {kind!r}")
 
 
 # ==============================================================================
@@ -55,15 +182,34 @@ class Component(models.Model):
 # ==============================================================================
 
 class CPU(Component):
+    KIND = 'CPU'
+    # URL filter name -> numeric field, e.g. ?clock_min=3.5 (see component_list_view).
+    RANGE_FILTERS = {'clock': 'clock_speed', 'cores': 'core_count'}
+    FACETS = ('manufacturer', 'socket', 'performance_tier', 'price_band')
+
     core_count = models.PositiveIntegerField()
-    clock_speed = models.CharField(max_length=30, help_text="Clock speed in GHz")
+    clock_speed = models.DecimalField(max_digits=4, decimal_places=2, null=True, blank=True, db_index=True, help_text="Clock speed in GHz")
     socket = models.CharField(max_length=50)
 
+    def get_specs(self):
+        return {"Socket": self.socket, "Core Count": self.core_count, "Clock Speed (GHz)": self.clock_speed}
+
 class GPU(Component):
-    vram_gb = models.CharField(max_length=7,help_text="VRAM in Gigabytes")
-    gpu_clock_speed = models.CharField(max_length=20, null=True,help_text="Clock speed in MHz")
+    KIND = 'GPU'
+    RANGE_FILTERS = {'vram': 'vram_gb', 'gpu_clock': 'gpu_clock_speed'}
+    FACETS = ('manufacturer', 'performance_tier', 'price_band')
+
+    vram_gb = models.PositiveIntegerField(null=True, blank=True, db_index=True, help_text="VRAM in Gigabytes")
+    gpu_clock_speed = models.PositiveIntegerField(null=True, blank=True, db_index=True, help_text="Clock speed in MHz")
+
+    def get_specs(self):
+        return {"VRAM (GB)": self.vram_gb, "Clock Speed (MHz)": self.gpu_clock_speed}
 
 class Motherboard(Component):
+    KIND = 'Motherboard'
+    RANGE_FILTERS = {'ram_slots': 'ram_slots'}
+    FACETS = ('manufacturer', 'socket', 'form_factor', 'price_band')
+
     # Using 'choices' creates a dropdown menu in forms and the admin panel, ensuring data consistency.
     FORM_FACTOR_CHOICES = [
         ('ATX', 'ATX'),
@@ -74,20 +220,40 @@ class Motherboard(Component):
     form_factor = models.CharField(max_length=20, choices=FORM_FACTOR_CHOICES)
     ram_slots = models.PositiveIntegerField()
 
+    def get_specs(self):
+        return {"Socket": self.socket, "Form Factor": self.form_factor, "RAM Slots": self.ram_slots}
+
 class RAM(Component):
-    capacity_gb = models.CharField(max_length=20, help_text="Capacity per stick in Gigabytes")
-    speed_mhz = models.CharField(max_length=20,help_text="Speed in MHz")
+    KIND = 'RAM'
+    RANGE_FILTERS = {'capacity': 'capacity_gb', 'speed': 'speed_mhz'}
+
+    capacity_gb = models.PositiveIntegerField(null=True, blank=True, db_index=True, help_text="Capacity per stick in Gigabytes")
+    speed_mhz = models.PositiveIntegerField(null=True, blank=True, db_index=True, help_text="Speed in MHz")
+
+    def get_specs(self):
+        return {"Capacity": self.capacity_gb, "Speed": self.speed_mhz}
 
 class Storage(Component):
+    KIND = 'Storage'
+    RANGE_FILTERS = {'capacity': 'capacity_gb'}
+    FACETS = ('manufacturer', 'storage_type', 'price_band')
+
     STORAGE_TYPE_CHOICES = [
         ('SSD', 'Solid State Drive'),
         ('NVMe', 'NVMe SSD'),
         ('HDD', 'Hard Disk Drive'),
     ]
-    capacity_gb = models.CharField(max_length=10, help_text="Capacity in Gigabytes")
+    capacity_gb = models.PositiveIntegerField(null=True, blank=True, db_index=True, help_text="Capacity in Gigabytes")
     storage_type = models.CharField(max_length=10, choices=STORAGE_TYPE_CHOICES)
 
+    def get_specs(self):
+        return {"Storage type": self.storage_type, "Capacity (GB)": self.capacity_gb}
+
 class PSU(Component):
+    KIND = 'PSU'
+    RANGE_FILTERS = {'wattage': 'wattage'}
+    FACETS = ('manufacturer', 'efficiency_rating', 'price_band')
+
     EFFICIENCY_CHOICES = [
         ('80+', '80+'),
         ('Bronze', '80+ Bronze'),
@@ -96,13 +262,48 @@ class PSU(Component):
         ('Platinum', '80+ Platinum'),
         ('Titanium', '80+ Titanium'),
     ]
-    wattage = models.CharField(max_length=5, help_text="Wattage in Watts")
+    wattage = models.PositiveIntegerField(null=True, blank=True, db_index=True, help_text="Wattage in Watts")
     efficiency_rating = models.CharField(max_length=20, choices=EFFICIENCY_CHOICES)
 
+    def get_specs(self):
+        return {"Wattage": self.wattage, "Efficiency": self.efficiency_rating}
+
 class Case(Component):
+    KIND = 'Case'
+    RANGE_FILTERS = {'gpu_length': 'max_gpu_length'}
+    FACETS = ('manufacturer', 'form_factor', 'price_band')
+
     # We can reuse the choices from the Motherboard model.
     form_factor = models.CharField(max_length=20, choices=Motherboard.FORM_FACTOR_CHOICES)
-    max_gpu_length = models.CharField(max_length=5,help_text="Maximum GPU length in mm", null=True, blank=True)
+    max_gpu_length = models.PositiveIntegerField(null=True, blank=True, db_index=True, help_text="Maximum GPU length in mm")
+
+    def get_specs(self):
+        return {"Form Factor": self.form_factor, "Max GPU Length": self.max_gpu_length}
+
+# Maps each stored Component.kind value to its child model.
+KIND_MODEL_MAP = {model.KIND: model for model in (CPU, GPU, Motherboard, RAM, Storage, PSU, Case)}
+
+# ==============================================================================
+# SEARCH INDEX
+# An inverted index for the search boxes: one row per (word, component).
+# Searching becomes an indexed prefix lookup on 'term' ("ryz" -> "ryzen")
+# instead of a leading-wildcard LIKE over every component name.
+# The rows are written by catalog/search.py and kept up to date by the
+# save signals in catalog/signals.py. Deleting a component cascades here.
+# ==============================================================================
+class ComponentSearchTerm(models.Model):
+    component = models.ForeignKey(Component, on_delete=models.CASCADE, related_name='search_terms')
+    term = models.CharField(max_length=50)
+    # How much a match on this word counts towards ranking (name > manufacturer > specs).
+    weight = models.PositiveSmallIntegerField(default=1)
+
+    class Meta:
+        # The (term, component) index answers "which components have a word starting
+        # with 'ryz'?" on its own, without reading the table rows.
+        unique_together = ('term', 'component')
+
+    def __str__(self):
+        return f"'{self.term}' -> {self.component_id}"
 
 # ==============================================================================
 # REVIEW MODEL
@@ -150,6 +351,117 @@ class Review(models.Model):
         username = self.user.username if self.user else "Deleted User"
         return f"{self.rating} Stars for {self.component.name} by {username}"
 
+    def save(self, *args, **kwargs):
+        # The review and the component's rating summary are written in one transaction.
+        # (Deletes are handled by the post_delete signal in catalog/signals.py.)
+        with transaction.atomic():
+            old = None
+            if self.pk:
+                old = Review.objects.filter(pk=self.pk).values_list('component_id', 'rating').first()
+            super().save(*args, **kwargs)
+            if old is None:
+                update_rating_summary(self.component_id, added=self.rating)
+            elif old[0] == self.component_id:
+                # Same component, new rating: one locked read and one write, not two of each.
+                if old[1] != self.rating:
+                    update_rating_summary(self.component_id, removed=old[1], added=self.rating)
+            else:
+                update_rating_summary(old[0], removed=old[1])
+                update_rating_summary(self.component_id, added=self.rating)
+
+
+def rating_summary(histogram):
+    """The rating_* field values for a [1-star, ..., 5-star] count list."""
+    count = sum(histogram)
+    total = sum(star * number for star, number in enumerate(histogram, start=1))
+    average = (Decimal(total) / count).quantize(Decimal('0.01')) if count else Decimal('0')
+    return {'rating_avg': average, 'rating_count': count, 'rating_histogram': list(histogram)}
+
+
+def update_rating_summary(component_id, removed=None, added=None):
+    """
+    Takes one rating out of and/or adds one rating to a component's review summary.
+    Must run inside a transaction: the component row stays locked until it commits,
+    so two reviews posted at the same moment can't overwrite each other's counts.
+    """
+    histogram = (
+        Component.objects.select_for_update()
+        .filter(pk=component_id)
+        .values_list('rating_histogram', flat=True)
+        .first()
+    )
+    if histogram is None:
+        return  # The component is being deleted along with its reviews.
+    histogram = list(histogram)
+    if removed:
+        histogram[removed - 1] = max(histogram[removed - 1] - 1, 0)
+    if added:
+        histogram[added - 1] += 1
+    # update() instead of save(): the rating doesn't change anything the save signals look at.
+    # No CatalogVersion.bump() either: a review would make every worker reload the whole
+    # catalog. The in-memory snapshot re-reads the ratings on its own (catalog/snapshot.py).
+    Component.objects.filter(pk=component_id).update(**rating_summary(histogram))
+
+
+# ==============================================================================
+# CATALOG VERSION
+# ==============================================================================
+class CatalogVersion(models.Model):
+    """
+    A single row that changes whenever anything in the catalog changes (a component
+    is saved or deleted, an import finishes). Rating summaries don't count: reviews
+    come in far more often, and the snapshot refreshes them separately. Each worker
+    compares it with the version of its in-memory catalog (catalog/snapshot.py) to
+    know when to reload.
+    """
+    # Counts the changes, for people reading the table.
+    number = models.PositiveBigIntegerField(default=0)
+    # A new random value on every change. Unlike the number, it can't come back to a
+    # value a worker has already seen when a transaction that bumped it is rolled back.
+    stamp = models.CharField(max_length=32, blank=True, default='')
+    changed_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f"Catalog version {self.number} ({self.changed_at:%Y-%m-%d %H:%M})"
+
+    @classmethod
+    def current(cls):
+        """Returns (number, stamp) of the catalog in the database. One primary key lookup."""
+        return cls.objects.filter(pk=1).values_list('number', 'stamp').first() or (0, '')
+
+    @classmethod
+    def bump(cls):
+        """Marks the catalog as changed. Inside a transaction this only becomes visible on commit."""
+        stamp = uuid.uuid4().hex
+        updated = cls.objects.filter(pk=1).update(number=F('number') + 1, stamp=stamp, changed_at=timezone.now())
+        if not updated:
+            cls.objects.get_or_create(pk=1, defaults={'number': 1, 'stamp': stamp})
+
+
+# ==============================================================================
+# IMPORT QUARANTINE
+# ==============================================================================
+class QuarantinedRow(models.Model):
+    """
+    A feed record the importer rejected (no name, a value that doesn't fit the field,
+    ...), kept with the reason so it isn't lost. After fixing the cleaners,
+    'manage.py reimport_quarantine' tries these rows again and deletes the ones that go in.
+    """
+    kind = models.CharField(max_length=20, choices=Component.KIND_CHOICES, db_index=True)
+    source = models.CharField(max_length=500, blank=True, help_text="The file the row came from")
+    row_number = models.PositiveIntegerField(null=True, blank=True, help_text="Position of the record in the file (1 = first)")
+    payload = models.JSONField(null=True, encoder=DjangoJSONEncoder, help_text="The record exactly as it was in the feed")
+    error = models.TextField()
+    attempts = models.PositiveIntegerField(default=1, help_text="How many imports rejected it")
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_attempt_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['id']
+
+    def __str__(self):
+        return f"{self.kind} row {self.row_number} of {self.source}: {self.error}"
+
 # builds/models.py
 
 
@@ -0,0 +1,107 @@
+# catalog/pagination.py
+
+#__________________________________________________________________________________________________________________________ (akn)
+
+"""
+Keyset ("cursor") pagination for the component grids and the workbench parts picker.
+
+Instead of OFFSET (which makes the database walk past every earlier row), each page
+remembers the sort value and id of its last row. The next page asks for rows that
+come AFTER that position, e.g. "name > 'Ryzen 5' OR (name = 'Ryzen 5' AND id > 42)".
+With the (name, id) and (price, id) indexes this costs the same on page 1 and page 500.
+The id is the tie-breaker, so components with the same name or price are never
+skipped or shown twice.
+"""
+
+import base64
+import json
+from decimal import Decimal, InvalidOperation
+from django.db.models import F, Q
+
+PAGE_SIZE = 24
+
+# sort option -> (field, descending?)
+SORT_FIELDS = {
+    'name': ('name', False),
+    'price_asc': ('price', False),
+    'price_desc': ('price', True),
+    # Best average review first (Component.rating_avg is kept up to date by the reviews).
+    'rating': ('rating_avg', True),
+    # Only available when the queryset was annotated by search_queryset(..., rank=True).
+    'relevance': ('search_score', True),
+}
+
+# Sort fields whose cursor value is sent as a string and read back as a Decimal.
+DECIMAL_FIELDS = {'price', 'rating_avg'}
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(value, pk):
+    """Packs the last row's sort value and id into a URL-safe string."""
+    if isinstance(value, Decimal):
+        value = str(value)
+    payload = json.dumps([value, pk], separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip('=')
+
+
+def decode_cursor(cursor, field):
+    """Reverses encode_cursor(). Raises InvalidCursor for anything we didn't produce."""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        value, pk = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        pk = int(pk)
+        if field in DECIMAL_FIELDS and value is not None:
+            value = Decimal(value)
+    except (ValueError, TypeError, InvalidOperation):
+        raise InvalidCursor(cursor)
+    return value, pk
+
+
+def order_for(sort_order):
+    """Returns the order_by() arguments for a sort option (unknown options sort by name)."""
+    field, descending = SORT_FIELDS.get(sort_order, SORT_FIELDS['name'])
+    if field != 'price':
+        return [f'-{field}' if descending else field, 'id']
+    # Components without a price go last in both directions.
+    sort_expression = F(field).desc(nulls_last=True) if descending else F(field).asc(nulls_last=True)
+    return [sort_expression, 'id']
+
+
+def _after(field, descending, value, pk):
+    """The filter for 'rows that come after (value, pk)' in order_for() order."""
+    if value is None:
+        # We are already in the NULLs at the end; only the id tie-breaker is left.
+        return Q(**{f'{field}__isnull': True, 'id__gt': pk})
+    beyond = Q(**{f'{field}__lt' if descending else f'{field}__gt': value})
+    return beyond | Q(**{field: value, 'id__gt': pk}) | Q(**{f'{field}__isnull': True})
+
+
+def keyset_page(queryset, sort_order, cursor=None, page_size=PAGE_SIZE):
+    """
+    Returns (items, next_cursor) for one page of the queryset in the given sort order.
+    next_cursor is None on the last page. A bad cursor restarts from the first page.
+    """
+    field, descending = SORT_FIELDS.get(sort_order, SORT_FIELDS['name'])
+    queryset = queryset.order_by(*order_for(sort_order))
+
+    if cursor:
+        try:
+            value, pk = decode_cursor(cursor, field)
+        except InvalidCursor:
+            pass
+        else:
+            queryset = queryset.filter(_after(field, descending, value, pk))
+
+    # Fetch one extra row to find out whether there is a next page.
+    items = list(queryset[:page_size + 1])
+    next_cursor = None
+    if len(items) > page_size:
+        items = items[:page_size]
+        last = items[-1]
+        next_cursor = encode_cursor(getattr(last, field), last.pk)
+    return items, next_cursor
+
+#__________________________________________________________________________________________________________________________
@@ -0,0 +1,107 @@
+# catalog/query.py
+
+#__________________________________________________________________________________________________________________________ (akn)
+
+"""
+The small query language of the search boxes (catalog, workbench and guides).
+
+A query is free text plus any number of price constraints:
+
+    <50000   <=50000   >30000   >=30000        compared with the price
+    30k-60k   30000 - 60000   30k to 60k       a range (both ends included)
+    under 80000   below 80k   up to 80k        at most
+    over 20000   above 20k   from 20k          at least
+
+'k' means thousands, and '50,000' or '৳50000' are fine too. The constraints become
+price__lt / price__gte / ... filters, which the database answers from the price index.
+Everything else is left as the text for the normal search. A number on its own
+('4070', '13600') stays text: it's far more likely a model number than a budget.
+"""
+
+import re
+from decimal import Decimal, InvalidOperation
+
+# A price: digits (with optional thousands commas and decimals) and an optional 'k'.
+# The lookarounds stop it matching inside words like 'i5-13600k' or 'DDR4-3200'.
+PRICE = r"(?<![\w.])[৳$]?(\d{1,3}(?:,\d{3})+|\d+)(\.\d+)?\s*(k)?(?![\w.])"
+
+COMPARISON_RE = re.compile(r"(<=|>=|<|>)\s*" + PRICE, re.IGNORECASE)
+RANGE_RE = re.compile(PRICE + r"\s*(?:-|–|\bto\b)\s*" + PRICE, re.IGNORECASE)
+AT_MOST_RE = re.compile(r"\b(?:under|below|less than|up to|upto|max)\s+" + PRICE, re.IGNORECASE)
+AT_LEAST_RE = re.compile(r"\b(?:over|above|more than|from|min)\s+" + PRICE, re.IGNORECASE)
+
+COMPARISON_LOOKUPS = {'<': 'lt', '<=': 'lte', '>': 'gt', '>=': 'gte'}
+
+
+def _price(digits, decimals, thousands):
+    """The Decimal of one PRICE match, e.g. ('30', None, 'k') -> 30000."""
+    try:
+        value = Decimal(digits.replace(',', '') + (decimals or ''))
+    except InvalidOperation:
+        return None
+    return value * 1000 if thousands else value
+
+
+class SearchQuery:
+    """A parsed search box query: .text for the text search, .price_filters for the price."""
+
+    __slots__ = ('text', 'price_filters')
+
+    def __init__(self, text, price_filters):
+        self.text = text
+        self.price_filters = price_filters  # [(lookup, Decimal)], e.g. [('gte', 30000), ('lte', 60000)]
+
+    def __bool__(self):
+        return bool(self.text or self.price_filters)
+
+    def filter_price(self, queryset, field='price'):
+        """Applies the price constraints to a queryset, on 'field' (e.g. 'total_price' for builds)."""
+        for lookup, value in self.price_filters:
+            queryset = queryset.filter(**{f'{field}__{lookup}': value})
+        return queryset
+
+
+def parse_search_query(query):
+    """
+    '30k-60k ryzen' -> SearchQuery(text='ryzen', price_filters=[('gte', 30000), ('lte', 60000)]).
+    Price constraints are taken out of the text; what's left is collapsed into single spaces.
+    """
+    text = query or ''
+    price_filters = []
+
+    def take(pattern, to_filters):
+        nonlocal text
+
+        def replace(match):
+            filters = to_filters(match)
+            if filters is None:
+                return match.group(0)  # not a usable number: leave it in the text
+            price_filters.extend(filters)
+            return ' '
+        text = pattern.sub(replace, text)
+
+    def comparison(match):
+        value = _price(*match.group(2, 3, 4))
+        return None if value is None else [(COMPARISON_LOOKUPS[match.group(1)], value)]
+
+    def price_range(match):
+        low, high = _price(*match.group(1, 2, 3)), _price(*match.group(4, 5, 6))
+        if low is None or high is None:
+            return None
+        low, high = min(low, high), max(low, high)  # '60k-30k' means the same as '30k-60k'
+        return [('gte', low), ('lte', high)]
+
+    def bound(lookup):
+        def to_filters(match):
+            value = _price(*match.group(1, 2, 3))
+            return None if value is None else [(lookup, value)]
+        return to_filters
+
+    # Ranges first, so '30k-60k' isn't read as two separate numbers.
+    take(RANGE_RE, price_range)
+    take(COMPARISON_RE, comparison)
+    take(AT_MOST_RE, bound('lte'))
+    take(AT_LEAST_RE, bound('gte'))
+    return SearchQuery(' '.join(text.split()), price_filters)
+
+#__________________________________________________________________________________________________________________________
@@ -0,0 +1,187 @@
+# catalog/search.py
+
+#__________________________________________________________________________________________________________________________ (akn)
+
+"""
+The component search engine used by the catalog and workbench search boxes.
+
+Every component is broken into lowercase words ("terms") taken from its name,
+manufacturer, kind and text specs (socket, form factor, ...). These are stored
+in the ComponentSearchTerm table. A search then:
+  1. splits the query into words,
+  2. finds every indexed term that STARTS WITH each word (an indexed range scan),
+  3. keeps components that matched ALL the words, and
+  4. optionally ranks them by the weights of the terms they matched (exact words count double).
+"""
+
+import re
+from django.db.models import Case, F, IntegerField, Max, OuterRef, Q, Subquery, Sum, Value, When
+from .models import Component, ComponentSearchTerm
+
+# How much a match in each field counts towards the ranking.
+NAME_WEIGHT = 3
+MANUFACTURER_WEIGHT = 2
+SPEC_WEIGHT = 1
+
+# Extra words in a query beyond this are ignored, which keeps the SQL small.
+MAX_QUERY_TERMS = 6
+
+MAX_TERM_LENGTH = ComponentSearchTerm._meta.get_field('term').max_length
+
+TERM_ALPHABET = '0123456789abcdefghijklmnopqrstuvwxyz'
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+LETTER_RE = re.compile(r"[a-z]")
+
+
+def tokenize(text):
+    """Splits text into lowercase words, e.g. 'Core i5-13600K' -> ['core', 'i5', '13600k']."""
+    if not text:
+        return []
+    return [token[:MAX_TERM_LENGTH] for token in TOKEN_RE.findall(str(text).lower())]
+
+
+def get_component_terms(component):
+    """
+    Returns {term: weight} for one component. Pass the concrete child (CPU, GPU, ...)
+    to include its text specs; a plain Component only contributes its base fields.
+    """
+    terms = {}
+
+    def add(text, weight):
+        for token in tokenize(text):
+            terms[token] = max(terms.get(token, 0), weight)
+
+    add(component.name, NAME_WEIGHT)
+    add(component.manufacturer, MANUFACTURER_WEIGHT)
+    add(component.kind, SPEC_WEIGHT)
+    for value in component.get_specs().values():
+        # Only text specs like 'AM4' or 'Micro-ATX'. Plain numbers would match almost anything.
+        if isinstance(value, str) and LETTER_RE.search(value.lower()):
+            add(value, SPEC_WEIGHT)
+    return terms
+
+
+def index_components(components, batch_size=1000):
+    """
+    (Re)builds the search terms for the given components. Used by the save signal
+    for single components and by bulk paths (imports, rebuild_search_index) for many.
+    """
+    components = list(components)
+    if not components:
+        return 0
+
+    ComponentSearchTerm.objects.filter(component__in=[c.pk for c in components]).delete()
+    rows = [
+        ComponentSearchTerm(component_id=component.pk, term=term, weight=weight)
+        for component in components
+        for term, weight in get_component_terms(component).items()
+    ]
+    ComponentSearchTerm.objects.bulk_create(rows, batch_size=batch_size)
+    return len(rows)
+
+
+def _prefix_filter(token):
+    """
+    'term starts with token', written as a range: 'ryz' -> term >= 'ryz' AND term < 'rz'.
+    Terms only contain [a-z0-9], so this matches exactly the same rows as LIKE 'ryz%',
+    but every database can answer it from the index on 'term' (SQLite can't use an
+    index for LIKE). The bound only uses letters and digits, so it sorts the same way
+    under any collation.
+    """
+    upper = _next_prefix(token)
+    if upper is None:
+        return Q(term__gte=token)
+    return Q(term__gte=token, term__lt=upper)
+
+
+def _next_prefix(token):
+    """The smallest word that sorts after every word starting with token, e.g. 'ryz' -> 'rz'."""
+    chars = list(token)
+    while chars:
+        position = TERM_ALPHABET.index(chars.pop())
+        if position + 1 < len(TERM_ALPHABET):
+            return ''.join(chars) + TERM_ALPHABET[position + 1]
+    return None  # e.g. 'zzz': nothing sorts after it.
+
+
+def _score(tokens):
+    """Sum of the weights of the matched terms. Terms equal to a query word count double."""
+    return Sum(
+        Case(When(term__in=tokens, then=F('weight') * 2), default=F('weight'), output_field=IntegerField())
+    )
+
+
+def _query_tokens(query):
+    # Remove duplicates but keep the order the user typed them in.
+    return list(dict.fromkeys(tokenize(query)))[:MAX_QUERY_TERMS]
+
+
+def search_queryset(queryset, query, rank=False):
+    """
+    Narrows a Component (or CPU, GPU, ...) queryset down to the components that match
+    every word of the query. With rank=True each row is also annotated with
+    'search_score' so the view can order by relevance.
+    A query with no searchable words matches nothing.
+    """
+    tokens = _query_tokens(query)
+    if not tokens:
+        return queryset.none()
+
+    match_any = Q()
+    for token in tokens:
+        match_any |= _prefix_filter(token)
+        # One indexed range scan per word; the database intersects them.
+        queryset = queryset.filter(
+            pk__in=ComponentSearchTerm.objects.filter(_prefix_filter(token)).values('component_id')
+        )
+
+    if rank:
+        scores = (
+            ComponentSearchTerm.objects.filter(match_any, component_id=OuterRef('pk'))
+            .values('component_id')
+            .annotate(score=_score(tokens))
+            .values('score')
+        )
+        queryset = queryset.annotate(search_score=Subquery(scores[:1]))
+    return queryset
+
+
+def top_k(query, k=10, kind=None):
+    """
+    Returns the k best matching components (as concrete CPU/GPU/... objects), best first.
+    Each result has a 'search_score' attribute. 'kind' limits results to one component type.
+    """
+    tokens = _query_tokens(query)
+    if not tokens or k <= 0:
+        return []
+
+    match_any = Q()
+    per_token_matches = {}
+    for i, token in enumerate(tokens):
+        match_any |= _prefix_filter(token)
+        per_token_matches[f'matched_{i}'] = Max(
+            Case(When(_prefix_filter(token), then=Value(1)), default=Value(0), output_field=IntegerField())
+        )
+
+    # Group the matched terms per component, keep components that matched every
+    # word, and let the database sort by score and cut the list at k.
+    matches = (
+        ComponentSearchTerm.objects.filter(match_any)
+        .values('component_id')
+        .annotate(score=_score(tokens), **per_token_matches)
+        .filter(**{name: 1 for name in per_token_matches})
+    )
+    if kind:
+        matches = matches.filter(component__kind=Component.normalize_kind(kind))
+    ranked = list(matches.order_by('-score', 'component_id')[:k])
+
+    components = Component.objects.polymorphic().in_bulk([row['component_id'] for row in ranked])
+    results = []
+    for row in ranked:
+        component = components.get(row['component_id'])
+        if component is not None:
+            component.search_score = row['score']
+            results.append(component)
+    return results
+
+#__________________________________________________________________________________________________________________________
@@ -0,0 +1,91 @@
+# catalog/signals.py
+
+#__________________________________________________________________________________________________________________________ (akn)
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
+from .models import CatalogVersion, Component, CPU, GPU, Motherboard, RAM, Storage, PSU, Case, Review, update_rating_summary
+from .search import index_components
+
+# Sent with component_ids=[...] after components were changed by a bulk write that
+# skips save() and its signals (the importer's bulk_update), inside that write's
+# transaction. Other apps that copy component data (builds' price totals) listen to it.
+components_updated = Signal()
+
+
+@receiver(post_save, sender=CPU)
+@receiver(post_save, sender=GPU)
+@receiver(post_save, sender=Motherboard)
+@receiver(post_save, sender=RAM)
+@receiver(post_save, sender=Storage)
+@receiver(post_save, sender=PSU)
+@receiver(post_save, sender=Case)
+def stamp_component_kind_on_raw_save(sender, instance, raw, **kwargs):
+    """
+    Component.save() stamps the kind for normal saves. 'loaddata' uses raw saves,
+    which skip save() and never write the parent row, so we fix the kind here.
+    """
+    if raw:
+        Component.objects.filter(pk=instance.pk).exclude(kind=sender.KIND).update(kind=sender.KIND)
+
+
+@receiver(post_save, sender=Component)
+@receiver(post_save, sender=CPU)
+@receiver(post_save, sender=GPU)
+@receiver(post_save, sender=Motherboard)
+@receiver(post_save, sender=RAM)
+@receiver(post_save, sender=Storage)
+@receiver(post_save, sender=PSU)
+@receiver(post_save, sender=Case)
+def update_search_index(sender, instance, raw, **kwargs):
+    """
+    Re-indexes a component for search whenever it is saved.
+    (Deleted components lose their search terms through the CASCADE foreign key.)
+    Not for raw (loaddata) saves: a 'dumpdata catalog' fixture carries its own
+    ComponentSearchTerm rows, which would collide with the ones written here.
+    Fixtures without them need 'manage.py rebuild_search_index' after loading.
+    """
+    if raw:
+        return
+    if sender is Component:
+        # Plain Component saves don't carry all the fields we index,
+        # so we load the full concrete object first.
+        instance = Component.objects.polymorphic().filter(pk=instance.pk).first()
+        if instance is None:
+            return
+    index_components([instance])
+
+
+@receiver(post_save, sender=Component)
+@receiver(post_save, sender=CPU)
+@receiver(post_save, sender=GPU)
+@receiver(post_save, sender=Motherboard)
+@receiver(post_save, sender=RAM)
+@receiver(post_save, sender=Storage)
+@receiver(post_save, sender=PSU)
+@receiver(post_save, sender=Case)
+@receiver(post_delete, sender=Component)
+@receiver(post_delete, sender=CPU)
+@receiver(post_delete, sender=GPU)
+@receiver(post_delete, sender=Motherboard)
+@receiver(post_delete, sender=RAM)
+@receiver(post_delete, sender=Storage)
+@receiver(post_delete, sender=PSU)
+@receiver(post_delete, sender=Case)
+def bump_catalog_version(sender, instance, **kwargs):
+    """
+    Any saved or deleted component changes the catalog, so every worker reloads its
+    in-memory snapshot (catalog/snapshot.py) and the facet bitmaps built from it.
+    """
+    CatalogVersion.bump()
+
+
+@receiver(post_delete, sender=Review)
+def remove_rating_from_summary(sender, instance, **kwargs):
+    """
+    Takes a deleted review out of its component's rating summary. Django runs every
+    delete (also cascading ones) in a transaction, and this update is part of it.
+    """
+    update_rating_summary(instance.component_id, removed=instance.rating)
+
+#__________________________________________________________________________________________________________________________
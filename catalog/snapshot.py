@@ -0,0 +1,246 @@
+# catalog/snapshot.py
+
+#__________________________________________________________________________________________________________________________ (akn)
+
+"""
+A read-only copy of the whole catalog, kept in memory by each worker process.
+
+The catalog only changes on imports and admin edits, but the catalog grid, the
+workbench parts picker and the build checks read it on every request. Instead of
+querying and building full model objects each time, they can read this snapshot:
+
+  * every component is a small read-only record (CPURecord, GPURecord, ...) with
+    the same attribute names as the model, so templates and builds/logic.py work
+    on it unchanged,
+  * records are grouped by kind and kept pre-sorted by name, price and rating,
+    so a page of the grid is a binary search and a slice.
+
+get_snapshot() loads it on first use. On every call it compares the stored version
+with the CatalogVersion row (one primary key lookup) and, if the catalog changed,
+builds a new snapshot and swaps it in. Code holding the old snapshot keeps a
+consistent view until it is done with it.
+
+The rating summaries (rating_avg, rating_count, rating_histogram) are the exception:
+reviews don't change the catalog version. Instead the ratings are re-read on their
+own, one query at most every RATINGS_MAX_AGE seconds, and put into a copy of the
+snapshot with the same version (so the facet bitmaps and the cached build statuses,
+which depend on the version, stay as they are).
+"""
+
+import threading
+import time
+from bisect import bisect_right
+from itertools import islice
+from .models import CatalogVersion, Component, KIND_MODEL_MAP
+from .pagination import PAGE_SIZE, SORT_FIELDS, InvalidCursor, decode_cursor, encode_cursor
+
+
+# ==============================================================================
+# RECORDS
+# ==============================================================================
+# Everything except the import bookkeeping, which no page reads.
+BASE_FIELDS = tuple(field.attname for field in Component._meta.concrete_fields if field.name != 'source_digest')
+# Kept up to date by the reviews, without a catalog version bump (see above).
+RATING_FIELDS = ('rating_avg', 'rating_count', 'rating_histogram')
+# How stale the ratings in a snapshot may get, in seconds.
+RATINGS_MAX_AGE = 60
+
+
+class ComponentRecord:
+    """
+    One component in the snapshot. Attributes match the model fields (id, name,
+    price, ... plus the kind's own fields like socket or wattage) and can't be changed.
+    """
+    __slots__ = BASE_FIELDS
+    model = Component
+    fields = BASE_FIELDS
+
+    def __init__(self, values):
+        for name, value in zip(self.fields, values):
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Catalog snapshot records are read-only.")
+
+    @property
+    def pk(self):
+        return self.id
+
+    def __str__(self):
+        return f"{self.manufacturer} {self.name}"
+
+    def __repr__(self):
+        return f"<{type(self).__name__} {self.id}: {self.name}>"
+
+    def get_type(self):
+        return self.kind
+
+    def get_specs(self):
+        # The model's get_specs() only reads attributes, so the records can share it.
+        return self.model.get_specs(self)
+
+
+def _record_class(ModelClass):
+    """Builds the record class for one kind, e.g. CPURecord with socket, core_count and clock_speed."""
+    own_fields = tuple(field.attname for field in ModelClass._meta.local_concrete_fields if not field.primary_key)
+    return type(f'{ModelClass.__name__}Record', (ComponentRecord,), {
+        '__slots__': own_fields,
+        'model': ModelClass,
+        'fields': BASE_FIELDS + own_fields,
+    })
+
+
+RECORD_CLASSES = {kind: _record_class(ModelClass) for kind, ModelClass in KIND_MODEL_MAP.items()}
+
+
+# ==============================================================================
+# SORT ORDERS
+# The keys sort the same way as catalog/pagination.py: missing prices go last
+# and the id breaks ties. Names are compared without case.
+# ==============================================================================
+def _name_key(value, pk):
+    return (value.casefold(), value, pk)
+
+
+def _ascending_key(value, pk):
+    return (value is None, value if value is not None else 0, pk)
+
+
+def _descending_key(value, pk):
+    return (value is None, -value if value is not None else 0, pk)
+
+
+SORT_KEYS = {
+    'name': _name_key,
+    'price_asc': _ascending_key,
+    'price_desc': _descending_key,
+    'rating': _descending_key,
+}
+
+
+class CatalogSnapshot:
+    """All components at one catalog version. Never changed after it is built."""
+
+    __slots__ = ('version', 'ratings_read_at', 'by_id', '_orders')
+
+    def __init__(self, version, records):
+        self.version = version
+        self.ratings_read_at = time.monotonic()
+        self.by_id = {record.id: record for record in records}
+        # (kind or None for everything, sort order) -> (records, their sort keys)
+        self._orders = {}
+        for sort_order, key in SORT_KEYS.items():
+            field = SORT_FIELDS[sort_order][0]
+            ordered = sorted(records, key=lambda record: key(getattr(record, field), record.id))
+            groups = {None: ordered}
+            for record in ordered:
+                groups.setdefault(record.kind, []).append(record)
+            for kind, group in groups.items():
+                keys = [key(getattr(record, field), record.id) for record in group]
+                self._orders[kind, sort_order] = (tuple(group), keys)
+
+    @classmethod
+    def load(cls, version=None):
+        """Reads the catalog: one query per kind, returning plain tuples instead of model objects."""
+        # Read the version first. If the catalog changes while we load, the snapshot is
+        # labelled with the older version and gets replaced on the next call.
+        if version is None:
+            version = CatalogVersion.current()
+        records = []
+        for kind, ModelClass in KIND_MODEL_MAP.items():
+            Record = RECORD_CLASSES[kind]
+            records.extend(Record(values) for values in ModelClass.objects.values_list(*Record.fields))
+        return cls(version, records)
+
+    def with_fresh_ratings(self):
+        """A copy of this snapshot (same version) with the ratings read again: one query."""
+        ratings = {row[0]: row[1:] for row in Component.objects.values_list('id', *RATING_FIELDS)}
+        positions = [BASE_FIELDS.index(field) for field in RATING_FIELDS]
+        records = []
+        for record in self.by_id.values():
+            values = [getattr(record, field) for field in record.fields]
+            for position, value in zip(positions, ratings.get(record.id, ())):
+                values[position] = value
+            records.append(type(record)(values))
+        return type(self)(self.version, records)
+
+    def __len__(self):
+        return len(self.by_id)
+
+    def get(self, pk):
+        """The record for one component id, or None."""
+        try:
+            return self.by_id.get(int(pk))
+        except (TypeError, ValueError):
+            return None
+
+    def of_kind(self, kind, sort_order='name'):
+        """All records of one kind ('CPU', 'GPU', ...), sorted. None means every kind."""
+        return self._orders.get((kind, sort_order), ((), []))[0]
+
+    def page(self, sort_order='name', cursor=None, page_size=PAGE_SIZE, kind=None, exclude=()):
+        """
+        Same contract as pagination.keyset_page(): returns (records, next_cursor) using
+        the same cursor format, but without touching the database. 'exclude' is a set
+        of component ids to leave out (e.g. the parts already in a build).
+        """
+        if sort_order not in SORT_KEYS:
+            sort_order = 'name'
+        field = SORT_FIELDS[sort_order][0]
+        records, keys = self._orders.get((kind, sort_order), ((), []))
+
+        start = 0
+        if cursor:
+            try:
+                value, pk = decode_cursor(cursor, field)
+                start = bisect_right(keys, SORT_KEYS[sort_order](value, pk))
+            except (InvalidCursor, TypeError, AttributeError):
+                start = 0  # A bad cursor restarts from the first page, like keyset_page().
+
+        page = []
+        for record in islice(records, start, None):
+            if record.id in exclude:
+                continue
+            page.append(record)
+            if len(page) > page_size:
+                break
+
+        next_cursor = None
+        if len(page) > page_size:
+            page = page[:page_size]
+            last = page[-1]
+            next_cursor = encode_cursor(getattr(last, field), last.id)
+        return page, next_cursor
+
+
+# ==============================================================================
+# THE PER-PROCESS SNAPSHOT
+# ==============================================================================
+_snapshot = None
+_lock = threading.Lock()
+
+
+def get_snapshot():
+    """
+    Returns the current catalog snapshot, loading or replacing it if the catalog
+    version in the database changed. Costs one small query when nothing changed.
+    """
+    global _snapshot
+    version = CatalogVersion.current()
+    snapshot = _snapshot
+    if snapshot is not None and snapshot.version == version and not _ratings_stale(snapshot):
+        return snapshot
+
+    with _lock:
+        # Another thread may have reloaded it while we waited for the lock.
+        if _snapshot is None or _snapshot.version != version:
+            _snapshot = CatalogSnapshot.load(version)
+        elif _ratings_stale(_snapshot):
+            _snapshot = _snapshot.with_fresh_ratings()
+        return _snapshot
+
+
+def _ratings_stale(snapshot):
+    return time.monotonic() - snapshot.ratings_read_at > RATINGS_MAX_AGE
+
+#__________________________________________________________________________________________________________________________
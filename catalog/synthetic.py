@@ -0,0 +1,456 @@
+# catalog/synthetic.py
+
+#__________________________________________________________________________________________________________________________ (akn)
+
+"""
+Synthetic, production-sized data for load and performance testing
+('manage.py generate_dataset').
+
+seed_data makes ~35 hand-written components with one save() each. This module
+makes as many components, users, builds (with their parts), reviews, wishlist
+items, listings and comments as asked for, with:
+
+  * plausible data: CPUs and motherboards share sockets, every build's motherboard
+    fits its CPU, prices / core counts / VRAM follow the performance tier;
+  * the same data for the same seed (and the same starting database): one
+    random.Random(seed) drives everything, and dates are spread back from a fixed
+    day instead of "now";
+  * speed: ids are handed out here (max id + 1, ...), so nothing has to be read
+    back after an INSERT, and every table is written with one executemany per
+    INSERT_BATCH_SIZE rows. No save(), so no signals: the search terms and the
+    review summaries (rating_avg, ...) are worked out here and written along
+    with the rows.
+
+Builds and their parts are generated and written in slices, so a million
+BuildComponent rows never sit in memory at once.
+"""
+
+import random
+from datetime import datetime, timedelta, timezone as dt_timezone
+from decimal import Decimal
+from itertools import islice
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.color import no_style
+from django.db import connection, models, transaction
+from django.db.models import Max
+from builds.models import Build, BuildComponent, WishlistItem
+from marketplace.models import Comment, MarketplaceListing
+from .models import CatalogVersion, Component, ComponentSearchTerm, KIND_MODEL_MAP, Review, rating_summary
+from .search import get_component_terms
+
+INSERT_BATCH_SIZE = 5000
+BUILD_SLICE = 10_000  # builds generated (and written, with their parts) at a time
+
+# Sizes at --scale 1. About 7 parts per build, so --scale 15 gives ~1M BuildComponent rows.
+DEFAULT_COUNTS = {
+    'components': 7000,
+    'users': 1000,
+    'builds': 10_000,
+    'reviews': 20_000,
+    'wishlist_items': 5000,
+    'listings': 2000,
+    'comments': 6000,
+}
+
+# Share of the components per kind.
+KIND_WEIGHTS = {'CPU': 12, 'GPU': 15, 'Motherboard': 15, 'RAM': 15, 'Storage': 15, 'PSU': 13, 'Case': 15}
+
+# Every generated date lies in the year before this day.
+END_DATE = datetime(2025, 1, 1, tzinfo=dt_timezone.utc)
+SYNTHETIC_PASSWORD = 'synthetic-password'
+# One user in STAFF_EVERY is staff, so their builds show up as curated guides.
+STAFF_EVERY = 100
+
+TIERS = ['Entry', 'Mid', 'High']
+TIER_WEIGHTS = [40, 40, 20]
+
+
+# ==============================================================================
+# 1. COMPONENTS, ONE MAKER PER KIND
+# ==============================================================================
+# Each maker takes (rng, tier) and returns (name, manufacturer, price, tdp, {own field: value}).
+# The price ranges per tier follow the real catalog (catalog/data/*.json, in Taka): roughly
+# its cheapest, middle and dearest thirds of each kind, so the price bands, the price
+# search ('30k-60k') and the sort by price see the same spread as on the live site.
+
+CPU_SOCKETS = {'AMD': ['AM4', 'AM5'], 'Intel': ['LGA1200', 'LGA1700']}
+CHIPSETS = {'AM4': ['A520', 'B550', 'X570'], 'AM5': ['B650', 'X670E'], 'LGA1200': ['H510', 'B560', 'Z590'], 'LGA1700': ['H610', 'B760', 'Z790']}
+SOCKETS = [socket for sockets in CPU_SOCKETS.values() for socket in sockets]
+
+
+def _price(rng, tier, entry, mid, high):
+    """A price in Taka inside the (low, high) range of the tier, in steps of ৳10 like the shops'."""
+    low, top = {'Entry': entry, 'Mid': mid, 'High': high}[tier]
+    return Decimal(rng.randint(low // 10, top // 10) * 10)
+
+
+def make_cpu(rng, tier):
+    manufacturer = rng.choice(['AMD', 'Intel'])
+    socket = rng.choice(CPU_SOCKETS[manufacturer])
+    level = {'Entry': rng.choice([3, 5]), 'Mid': rng.choice([5, 7]), 'High': rng.choice([7, 9])}[tier]
+    if manufacturer == 'AMD':
+        series = 5 if socket == 'AM4' else rng.choice([7, 9])
+        name = f"Ryzen {level} {series}{rng.randint(5, 9)}{rng.choice(['00', '50'])}{rng.choice(['', 'X', 'X3D', 'G'])}"
+    else:
+        generation = rng.choice([10, 11]) if socket == 'LGA1200' else rng.choice([12, 13, 14])
+        name = f"Core i{level}-{generation}{rng.randint(1, 9)}00{rng.choice(['', 'K', 'F', 'KF'])}"
+    cores = {'Entry': rng.choice([4, 6]), 'Mid': rng.choice([6, 8, 12]), 'High': rng.choice([12, 16, 24])}[tier]
+    return name, manufacturer, _price(rng, tier, (7000, 17000), (17000, 35000), (35000, 82000)), rng.choice([65, 105, 125, 170]), {
+        'core_count': cores,
+        'clock_speed': Decimal(rng.randint(280, 480)) / 100,
+        'socket': socket,
+    }
+
+
+def make_gpu(rng, tier):
+    manufacturer = rng.choice(['NVIDIA', 'NVIDIA', 'AMD', 'Intel'])
+    level = TIERS.index(tier)  # 0, 1, 2
+    if manufacturer == 'NVIDIA':
+        model = [50, rng.choice([60, 70]), rng.choice([80, 90])][level]
+        name = f"GeForce RTX {rng.choice([30, 40, 50])}{model}{rng.choice(['', ' Ti', ' Super'])}"
+    elif manufacturer == 'AMD':
+        model = [5, rng.choice([6, 7]), rng.choice([8, 9])][level]
+        name = f"Radeon RX {rng.choice([6, 7, 9])}{model}00{rng.choice(['', ' XT', ' XTX'])}"
+    else:
+        name = f"Arc {rng.choice(['A', 'B'])}{[380, 580, 770][level]}"
+    return name, manufacturer, _price(rng, tier, (15000, 41000), (41000, 75000), (75000, 270000)), {'Entry': 120, 'Mid': 200, 'High': 320}[tier], {
+        'vram_gb': {'Entry': rng.choice([4, 6, 8]), 'Mid': rng.choice([8, 12]), 'High': rng.choice([16, 20, 24])}[tier],
+        'gpu_clock_speed': rng.randint(1400, 2700),
+    }
+
+
+def make_motherboard(rng, tier):
+    socket = rng.choice(SOCKETS)
+    chipsets = CHIPSETS[socket]
+    chipset = chipsets[min(TIERS.index(tier), len(chipsets) - 1)]
+    form_factor = rng.choice(['ATX', 'ATX', 'Micro-ATX', 'Mini-ITX'])
+    suffix = {'ATX': '', 'Micro-ATX': 'M', 'Mini-ITX': 'I'}[form_factor]
+    name = f"{chipset}{suffix} {rng.choice(['Tomahawk', 'Gaming Plus', 'Aorus Elite', 'Strix', 'Prime', 'Steel Legend', 'Pro'])}{rng.choice(['', ' WiFi', ' DDR4'])}"
+    return name, rng.choice(['ASUS', 'MSI', 'Gigabyte', 'ASRock']), _price(rng, tier, (7500, 11500), (11500, 24000), (24000, 75000)), None, {
+        'socket': socket,
+        'form_factor': form_factor,
+        'ram_slots': 2 if form_factor == 'Mini-ITX' else 4,
+    }
+
+
+def make_ram(rng, tier):
+    capacity = {'Entry': 8, 'Mid': 16, 'High': rng.choice([16, 32])}[tier]
+    ddr = rng.choice([4, 5])
+    speed = rng.choice([3200, 3600]) if ddr == 4 else rng.choice([5600, 6000, 6400])
+    manufacturer = rng.choice(['Corsair', 'G.Skill', 'Kingston', 'Crucial', 'TeamGroup'])
+    line = {'Corsair': 'Vengeance', 'G.Skill': 'Trident Z', 'Kingston': 'Fury Beast', 'Crucial': 'Pro', 'TeamGroup': 'T-Force Delta'}[manufacturer]
+    return f"{line} {capacity * 2}GB (2 x {capacity}GB) DDR{ddr}-{speed}", manufacturer, _price(rng, tier, (2500, 7800), (7800, 17500), (17500, 70000)), None, {
+        'capacity_gb': capacity,
+        'speed_mhz': speed,
+    }
+
+
+def make_storage(rng, tier):
+    storage_type = rng.choice(['NVMe', 'NVMe', 'SSD', 'HDD'])
+    capacity = {'Entry': rng.choice([500, 1000]), 'Mid': rng.choice([1000, 2000]), 'High': rng.choice([2000, 4000])}[tier]
+    if storage_type == 'HDD':
+        capacity *= 2
+    manufacturer = rng.choice(['Samsung', 'Western Digital', 'Crucial', 'Seagate', 'Kingston'])
+    size = f"{capacity // 1000}TB" if capacity >= 1000 else f"{capacity}GB"
+    return f"{rng.choice(['Evo', 'Black', 'Blue', 'Barracuda', 'FireCuda', 'P3', 'KC3000'])} {size} {storage_type}", manufacturer, _price(rng, tier, (1750, 12800), (12800, 35000), (35000, 220000)), None, {
+        'capacity_gb': capacity,
+        'storage_type': storage_type,
+    }
+
+
+def make_psu(rng, tier):
+    wattage = {'Entry': rng.choice([450, 550]), 'Mid': rng.choice([650, 750]), 'High': rng.choice([850, 1000, 1200])}[tier]
+    efficiency = {'Entry': rng.choice(['80+', 'Bronze']), 'Mid': rng.choice(['Bronze', 'Gold']), 'High': rng.choice(['Gold', 'Platinum', 'Titanium'])}[tier]
+    manufacturer = rng.choice(['Corsair', 'Seasonic', 'EVGA', 'be quiet!', 'Cooler Master'])
+    return f"{rng.choice(['RM', 'Focus', 'SuperNOVA', 'Pure Power', 'MWE'])} {wattage}W", manufacturer, _price(rng, tier, (3200, 8200), (8200, 17000), (17000, 65000)), None, {
+        'wattage': wattage,
+        'efficiency_rating': efficiency,
+    }
+
+
+def make_case(rng, tier):
+    form_factor = rng.choice(['ATX', 'ATX', 'Micro-ATX', 'Mini-ITX'])
+    manufacturer = rng.choice(['Fractal Design', 'NZXT', 'Lian Li', 'Corsair', 'Phanteks'])
+    return f"{rng.choice(['Meshify', 'H5 Flow', 'Lancool', '4000D', 'Eclipse', 'North'])} {rng.choice(['', 'Compact', 'XL', 'RGB'])}".strip(), manufacturer, _price(rng, tier, (1450, 3600), (3600, 5200), (5200, 35000)), None, {
+        'form_factor': form_factor,
+        'max_gpu_length': rng.randint(280, 420) if form_factor != 'Mini-ITX' else rng.randint(200, 330),
+    }
+
+
+COMPONENT_MAKERS = {
+    'CPU': make_cpu,
+    'GPU': make_gpu,
+    'Motherboard': make_motherboard,
+    'RAM': make_ram,
+    'Storage': make_storage,
+    'PSU': make_psu,
+    'Case': make_case,
+}
+
+
+# ==============================================================================
+# 2. WRITING ROWS
+# ==============================================================================
+def _next_id(model):
+    return (model._base_manager.aggregate(last=Max('pk'))['last'] or 0) + 1
+
+
+def _insert(model, columns, rows):
+    """
+    Writes rows (tuples in the order of 'columns', attnames) into the model's own
+    table with one executemany per INSERT_BATCH_SIZE rows. Fields not in 'columns'
+    get their default. 'rows' can be any iterable. Returns the number of rows.
+    """
+    fields = model._meta.local_concrete_fields
+    given = {column: position for position, column in enumerate(columns)}
+    defaults = {field.attname: field.get_db_prep_save(field.get_default(), connection) for field in fields if field.attname not in given}
+    # Only these need converting (Decimal -> text on SQLite, dates -> the backend's format, JSON -> text);
+    # ints and strings go in as they are, which keeps a million-row table fast.
+    converted = {
+        field.attname for field in fields
+        if field.attname in given and isinstance(field, (models.DecimalField, models.DateTimeField, models.JSONField))
+    }
+    plan = [(field, given.get(field.attname), field.attname in converted) for field in fields]
+
+    def row_values(row):
+        values = []
+        for field, position, convert in plan:
+            if position is None:
+                values.append(defaults[field.attname])
+            elif convert:
+                values.append(field.get_db_prep_save(row[position], connection))
+            else:
+                values.append(row[position])
+        return values
+
+    quote = connection.ops.quote_name
+    sql = 'INSERT INTO {} ({}) VALUES ({})'.format(
+        quote(model._meta.db_table),
+        ', '.join(quote(field.column) for field in fields),
+        ', '.join(['%s'] * len(fields)),
+    )
+    total = 0
+    rows = iter(rows)
+    with connection.cursor() as cursor:
+        while True:
+            batch = [row_values(row) for row in islice(rows, INSERT_BATCH_SIZE)]
+            if not batch:
+                return total
+            cursor.executemany(sql, batch)
+            total += len(batch)
+
+
+# ==============================================================================
+# 3. THE GENERATOR
+# ==============================================================================
+class DatasetGenerator:
+    """
+    Usage: DatasetGenerator(seed=42, components=70_000, builds=100_000).run()
+    Counts that aren't given come from DEFAULT_COUNTS. run() returns {model label: rows written}.
+    """
+
+    def __init__(self, seed=42, progress=None, **counts):
+        self.rng = random.Random(seed)
+        self.counts = dict(DEFAULT_COUNTS, **{name: value for name, value in counts.items() if value is not None})
+        self.progress = progress or (lambda message: None)
+        self.written = {}
+
+    def _date(self, days=365):
+        """A date in the 'days' days before END_DATE."""
+        return END_DATE - timedelta(seconds=self.rng.randint(0, days * 86400))
+
+    def _pairs(self, count, first_ids, second_ids):
+        """'count' distinct (first, second) id pairs, e.g. (user, component) for unique_together tables."""
+        count = min(count, len(set(first_ids)) * len(set(second_ids)))
+        pairs = set()
+        while len(pairs) < count:
+            pairs.add((self.rng.choice(first_ids), self.rng.choice(second_ids)))
+        # Sorted, so the result doesn't depend on set order.
+        return self.rng.sample(sorted(pairs), len(pairs))
+
+    def _written(self, model, rows):
+        self.written[model._meta.label] = self.written.get(model._meta.label, 0) + rows
+
+    def run(self):
+        with transaction.atomic():
+            user_ids = self.make_users()
+            components = self.make_components()
+            component_ids = [component_id for ids in components.values() for component_id, _ in ids]
+            self.make_reviews_and_components(components, user_ids)
+            self.make_wishlist_items(user_ids, component_ids)
+            self.make_builds(user_ids, components)
+            self.make_listings(user_ids, components)
+
+            # The rows came with their ids, so move the id sequences past them (PostgreSQL, Oracle).
+            models_written = [Component, ComponentSearchTerm, Review, get_user_model(), Build, BuildComponent, WishlistItem, MarketplaceListing, Comment]
+            with connection.cursor() as cursor:
+                for sql in connection.ops.sequence_reset_sql(no_style(), models_written):
+                    cursor.execute(sql)
+            CatalogVersion.bump()
+        return self.written
+
+    # --- users -------------------------------------------------------------
+    def make_users(self):
+        User = get_user_model()
+        first_id = _next_id(User)
+        user_ids = list(range(first_id, first_id + self.counts['users']))
+        password = make_password(SYNTHETIC_PASSWORD)  # hashed once: every synthetic user can log in with it
+        self.progress(f"Users: {len(user_ids):,}")
+        rows = (
+            # The username has the id in it, so it can't clash with an existing account.
+            (pk, f"synthetic{pk}", f"synthetic{pk}@example.com", password, number % STAFF_EVERY == 0, self._date(730))
+            for number, pk in enumerate(user_ids)
+        )
+        self._written(User, _insert(User, ['id', 'username', 'email', 'password', 'is_staff', 'date_joined'], rows))
+        return user_ids
+
+    # --- components --------------------------------------------------------
+    def make_components(self):
+        """
+        Works out every component in memory (nothing written yet: their review
+        summaries come from make_reviews_and_components()). Returns
+        {kind: [(id, (name, manufacturer, price, tdp, tier, specs)), ...]}.
+        """
+        next_id = _next_id(Component)
+        total = self.counts['components']
+        weight_sum = sum(KIND_WEIGHTS.values())
+        numbers = {kind: total * weight // weight_sum for kind, weight in KIND_WEIGHTS.items()}
+        numbers['GPU'] += total - sum(numbers.values())  # what the rounding left over
+        components = {}
+        for kind, number in numbers.items():
+            make = COMPONENT_MAKERS[kind]
+            rows = []
+            for pk in range(next_id, next_id + number):
+                tier = self.rng.choices(TIERS, TIER_WEIGHTS)[0]
+                name, manufacturer, price, tdp, specs = make(self.rng, tier)
+                rows.append((pk, (name, manufacturer, price, tdp, tier, specs)))
+            components[kind] = rows
+            next_id += number
+            self.progress(f"{kind}: {number:,}")
+        return components
+
+    def make_reviews_and_components(self, components, user_ids):
+        review_ids = _next_id(Review)
+        component_ids = [component_id for ids in components.values() for component_id, _ in ids]
+        # Skewed: a few components get most of the reviews, like on the real site.
+        popular = component_ids[:max(1, len(component_ids) // 5)]
+        histograms = {}
+        reviews = []
+        for number, (user_id, component_id) in enumerate(self._pairs(self.counts['reviews'], user_ids, popular + component_ids)):
+            rating = self.rng.choices([1, 2, 3, 4, 5], [5, 8, 17, 35, 35])[0]
+            histograms.setdefault(component_id, [0, 0, 0, 0, 0])[rating - 1] += 1
+            text = self.rng.choice(['Great value.', 'Runs cool and quiet.', 'Does the job.', 'Arrived DOA, replacement works.', 'Would buy again.', 'A bit overpriced.'])
+            reviews.append((review_ids + number, user_id, component_id, rating, text, self._date()))
+
+        self.progress(f"Search terms and rating summaries for {len(component_ids):,} components")
+        parent_columns = ['id', 'kind', 'name', 'manufacturer', 'tdp', 'price', 'performance_tier', 'rating_avg', 'rating_count', 'rating_histogram']
+        for kind, rows in components.items():
+            ModelClass = KIND_MODEL_MAP[kind]
+            spec_names = list(rows[0][1][5]) if rows else []
+            parents = []
+            children = []
+            terms = []
+            for pk, (name, manufacturer, price, tdp, tier, specs) in rows:
+                summary = rating_summary(histograms.get(pk, [0, 0, 0, 0, 0]))
+                parents.append((pk, kind, name, manufacturer, tdp, price, tier, summary['rating_avg'], summary['rating_count'], summary['rating_histogram']))
+                children.append((pk, *specs.values()))
+                # The same terms the save signal would index (an unsaved instance is enough).
+                instance = ModelClass(kind=kind, name=name, manufacturer=manufacturer, **specs)
+                terms.extend((pk, term, weight) for term, weight in get_component_terms(instance).items())
+            self._written(Component, _insert(Component, parent_columns, parents))
+            self._written(ModelClass, _insert(ModelClass, ['component_ptr_id', *spec_names], children))
+            self._written(ComponentSearchTerm, _insert(ComponentSearchTerm, ['component_id', 'term', 'weight'], terms))
+
+        self._written(Review, _insert(Review, ['id', 'user_id', 'component_id', 'rating', 'review_text', 'date_posted'], reviews))
+
+    def make_wishlist_items(self, user_ids, component_ids):
+        first_id = _next_id(WishlistItem)
+        rows = [
+            (first_id + number, user_id, component_id, self._date())
+            for number, (user_id, component_id) in enumerate(self._pairs(self.counts['wishlist_items'], user_ids, component_ids))
+        ]
+        self._written(WishlistItem, _insert(WishlistItem, ['id', 'user_id', 'component_id', 'date_added'], rows))
+
+    # --- builds ------------------------------------------------------------
+    def make_builds(self, user_ids, components):
+        ids = {kind: [pk for pk, _ in rows] for kind, rows in components.items()}
+        # (price, tdp) per component, for the builds' denormalized total_price / total_tdp.
+        prices = {pk: (values[2], values[3] or 0) for rows in components.values() for pk, values in rows}
+        cpus = [(pk, values[5]['socket']) for pk, values in components['CPU']]
+        boards_by_socket = {}
+        for pk, values in components['Motherboard']:
+            boards_by_socket.setdefault(values[5]['socket'], []).append(pk)
+        if not user_ids or not cpus:
+            return
+
+        build_id = _next_id(Build)
+        part_id = _next_id(BuildComponent)
+        remaining = self.counts['builds']
+        self.progress(f"Builds: {remaining:,}")
+        while remaining > 0:
+            builds = []
+            parts = []
+            for _ in range(min(BUILD_SLICE, remaining)):
+                build = [
+                    build_id,
+                    self.rng.choice(user_ids),
+                    f"{self.rng.choice(['Budget', 'Mid-range', 'High-end', 'Streaming', 'Office', 'Gaming', 'Workstation'])} build {build_id}",
+                    self.rng.choice([None, '', 'Upgrade planned next year.', 'For 1440p gaming.']),
+                    self._date(),
+                ]
+                cpu_id, socket = self.rng.choice(cpus)
+                chosen = [(cpu_id, 1)]
+                # The motherboard always fits the CPU (if there is one for that socket).
+                if boards_by_socket.get(socket):
+                    chosen.append((self.rng.choice(boards_by_socket[socket]), 1))
+                for kind, quantity in (('RAM', self.rng.choice([1, 2])), ('Storage', 1), ('PSU', 1), ('Case', 1)):
+                    if ids[kind]:
+                        chosen.append((self.rng.choice(ids[kind]), quantity))
+                if ids['GPU'] and self.rng.random() < 0.85:
+                    chosen.append((self.rng.choice(ids['GPU']), 1))
+                for component_id, quantity in chosen:
+                    parts.append((part_id, build_id, component_id, quantity))
+                    part_id += 1
+                build.append(sum((prices[component_id][0] or 0) * quantity for component_id, quantity in chosen))
+                build.append(sum(prices[component_id][1] * quantity for component_id, quantity in chosen))
+                builds.append(build)
+                build_id += 1
+            self._written(Build, _insert(Build, ['id', 'user_id', 'name', 'description', 'date_created', 'total_price', 'total_tdp'], builds))
+            self._written(BuildComponent, _insert(BuildComponent, ['id', 'build_id', 'component_id', 'quantity'], parts))
+            remaining -= len(builds)
+
+    # --- marketplace -------------------------------------------------------
+    def make_listings(self, user_ids, components):
+        if not user_ids:
+            return
+        # People sell the parts they upgraded away from.
+        titles = [values[0] for rows in components.values() for _, values in rows] or ['PC parts']
+        listing_id = _next_id(MarketplaceListing)
+        listings = [
+            (
+                listing_id + number,
+                f"Used {self.rng.choice(titles)}",
+                self.rng.choice(['Barely used, original box included.', 'Works perfectly, selling after an upgrade.', 'Pickup only.']),
+                Decimal(self.rng.randint(100, 15000) * 10),
+                f"+1 555 {self.rng.randint(1000000, 9999999)}",
+                self._date(),
+                self.rng.choices(['Available', 'Sold'], [80, 20])[0],
+                self.rng.choice(user_ids),
+            )
+            for number in range(self.counts['listings'])
+        ]
+        self._written(MarketplaceListing, _insert(
+            MarketplaceListing, ['id', 'title', 'description', 'price', 'contact_info', 'date_listed', 'status', 'seller_id'], listings,
+        ))
+        if not listings:
+            return
+
+        comment_id = _next_id(Comment)
+        comments = (
+            (comment_id + number, self.rng.choice(listings)[0], self.rng.choice(user_ids), self.rng.choice(['Still available?', 'Would you take less?', 'Can you ship?', 'Sold to me!']), self._date())
+            for number in range(self.counts['comments'])
+        )
+        self._written(Comment, _insert(Comment, ['id', 'listing_id', 'author_id', 'body', 'created_at'], comments))
+
+#__________________________________________________________________________________________________________________________
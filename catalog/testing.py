@@ -0,0 +1,119 @@
+# catalog/testing.py
+
+#__________________________________________________________________________________________________________________________ (akn)
+
+"""
+Shared base for the query-budget tests (the QueryBudget* tests in each app's tests.py).
+
+Each app pins the MOST queries every one of its views and HTMX endpoints may make,
+and runs those tests twice: on a small dataset (ITEMS = 3) and on one ten times
+bigger (ITEMS = 30). Everything the pages list grows with ITEMS: the user's builds,
+wishlist and listings, the guides, a component's reviews, a listing's comments, and
+the synthetic catalog around them. A view that makes one more query per row fails
+the big run even if it squeaks through the small one.
+
+The catalog snapshot is loaded before each measured request (it's loaded once per
+process and catalog change, not per request), and GET pages are requested once
+before they're measured, like a warm server.
+"""
+
+from types import SimpleNamespace
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from builds.models import Build, BuildComponent, WishlistItem, refresh_build_totals
+from marketplace.models import Comment, MarketplaceListing
+from .models import Component, CPU, Motherboard, Review
+from .snapshot import get_snapshot
+from .synthetic import DatasetGenerator
+
+SMALL = 3
+LARGE = 30
+
+
+def _add_parts(build, parts):
+    BuildComponent.objects.bulk_create([BuildComponent(build=build, component=component, quantity=quantity) for component, quantity in parts])
+    refresh_build_totals(Build.objects.filter(pk=build.pk))
+
+
+def make_budget_dataset(items):
+    """A synthetic catalog plus the objects the budget tests point at, 'items' of everything."""
+    DatasetGenerator(
+        seed=items, components=40 * items, users=2 * items, builds=items, reviews=5 * items,
+        wishlist_items=items, listings=items, comments=items,
+    ).run()
+    User = get_user_model()
+    owner = User.objects.create_user('budget_owner', password='x')
+    curator = User.objects.create_user('budget_curator', password='x', is_staff=True)
+    others = list(User.objects.exclude(pk__in=[owner.pk, curator.pk]).order_by('pk')[:items])
+
+    # A complete build: CPU + fitting motherboard, two kinds of RAM, two drives, GPU, PSU, case.
+    # Four RAM slots, so adding a third stick really adds it (the budget covers the insert).
+    cpu = CPU.objects.filter(socket__in=Motherboard.objects.filter(ram_slots__gte=4).values('socket')).order_by('pk').first()
+    motherboard = Motherboard.objects.filter(socket=cpu.socket, ram_slots__gte=4).order_by('pk').first()
+    by_kind = {kind: list(Component.objects.filter(kind=kind).order_by('pk')[:items + 2]) for kind in ('RAM', 'Storage', 'GPU', 'PSU', 'Case')}
+    parts = [
+        (cpu, 1), (motherboard, 1), (by_kind['RAM'][0], 1), (by_kind['RAM'][1], 1),
+        (by_kind['Storage'][0], 1), (by_kind['Storage'][1], 1), (by_kind['GPU'][0], 1), (by_kind['PSU'][0], 1), (by_kind['Case'][0], 1),
+    ]
+    build = Build.objects.create(user=owner, name='Budget build', description='Complete build')
+    _add_parts(build, parts)
+    for number in range(items):
+        _add_parts(Build.objects.create(user=owner, name=f'Owner build {number}'), parts[:3])
+        _add_parts(Build.objects.create(user=curator, name=f'Guide {number}', description='Curated'), parts)
+
+    WishlistItem.objects.bulk_create([WishlistItem(user=owner, component=component) for component in by_kind['GPU'][:items]])
+
+    reviewed = by_kind['PSU'][1]
+    Review.objects.bulk_create([Review(user=user, component=reviewed, rating=4, review_text='Solid') for user in others])
+    review = Review.objects.create(user=owner, component=reviewed, rating=5, review_text='Mine')
+
+    listing = MarketplaceListing.objects.create(title='Budget listing', description='For sale', price=100, seller=owner)
+    MarketplaceListing.objects.bulk_create([
+        MarketplaceListing(title=f'Owner listing {number}', description='For sale', price=50, seller=owner) for number in range(items)
+    ])
+    Comment.objects.bulk_create([Comment(listing=listing, author=user, body='Still available?') for user in others])
+
+    return SimpleNamespace(
+        owner=owner, curator=curator, build=build, cpu=cpu, motherboard=motherboard,
+        ram=by_kind['RAM'][2], gpu=by_kind['GPU'][-1], wished=by_kind['GPU'][0],
+        reviewed=reviewed, review=review, listing=listing,
+    )
+
+
+@override_settings(SQL_PROFILE_SAMPLE_RATE=0)
+class QueryBudgetTestCase(TestCase):
+    """
+    Base class: set ITEMS, log in as data.owner, and use assertQueryBudget().
+    Put the test methods in a mixin and combine it with this class twice
+    (ITEMS = SMALL and ITEMS = LARGE).
+    """
+    ITEMS = SMALL
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.data = make_budget_dataset(cls.ITEMS)
+
+    def setUp(self):
+        # Cached build statuses would outlive the rolled-back test data.
+        cache.clear()
+        self.client.force_login(self.data.owner)
+
+    def assertQueryBudget(self, budget, method, url, data=None, status=200, htmx=False):
+        """Makes the request and fails if it took more than 'budget' queries. Returns the response."""
+        extra = {'HTTP_HX_REQUEST': 'true'} if htmx else {}
+        send = getattr(self.client, method)
+        get_snapshot()
+        if method == 'get':
+            send(url, data, **extra)
+        with CaptureQueriesContext(connection) as captured:
+            response = send(url, data, **extra)
+        self.assertEqual(response.status_code, status)
+        if len(captured) > budget:
+            queries = '\n'.join(f"  {number}. {query['sql']}" for number, query in enumerate(captured.captured_queries, start=1))
+            self.fail(f"{method.upper()} {url} made {len(captured)} queries (budget {budget}, ITEMS={self.ITEMS}):\n{queries}")
+        return response
+
+#__________________________________________________________________________________________________________________________
@@ -1,3 +1,842 @@
-from django.test import TestCase
+import json
+import os
+import random
+import shutil
+import tempfile
+from decimal import Decimal
+from importlib import import_module
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection, transaction
+from django.http import HttpResponse
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from .models import Case, CatalogVersion, Component, ComponentSearchTerm, CPU, GPU, Motherboard, PSU, QuarantinedRow, RAM, Review, Storage
+from .search import search_queryset, top_k
+from .query import parse_search_query
+from .pagination import keyset_page
+from .facets import get_index
+from .snapshot import get_snapshot
+from .importing import FIELD_CLEANERS, ComponentImporter, iter_json_records
+from .cleaning import COLUMN_CLEANERS, clean_decimal
+from .archive import SnapshotError, read_snapshot
+from .synthetic import DatasetGenerator
+from .benchmarks import VIEWS, compare, read_results
+from .instrumentation import SQLProfileMiddleware, recent, statement_shape
+from .testing import LARGE, QueryBudgetTestCase
+
+
+def make_cpu(name):
+    return CPU.objects.create(name=name, manufacturer='AMD', price=100, core_count=6, clock_speed='3.70', socket='AM4')
+
+
+def make_gpu(name):
+    return GPU.objects.create(name=name, manufacturer='NVIDIA', price=300, vram_gb=8, gpu_clock_speed=1800)
+
+
+def make_ram(name):
+    return RAM.objects.create(name=name, manufacturer='Corsair', price=50, capacity_gb=16, speed_mhz=3200)
+
+
+class ComponentKindTests(TestCase):
+    def test_child_save_stamps_kind(self):
+        cpu = make_cpu('Ryzen 5 5600X')
+        self.assertEqual(Component.objects.get(pk=cpu.pk).kind, 'CPU')
+
+    def test_get_type_does_not_query(self):
+        make_gpu('RTX 4070')
+        component = Component.objects.get()
+        with self.assertNumQueries(0):
+            self.assertEqual(component.get_type(), 'GPU')
+
+    def test_of_kind_filters_in_sql(self):
+        make_cpu('Ryzen 5 5600X')
+        make_gpu('RTX 4070')
+        self.assertEqual(list(Component.objects.of_kind('gpu').values_list('name', flat=True)), ['RTX 4070'])
+        with self.assertRaises(ValueError):
+            Component.objects.of_kind('Toaster')
+
+    def test_migration_backfills_kind_from_the_child_tables(self):
+        backfill = import_module('catalog.migrations.0005_component_kind').backfill_component_kind
+        made = [
+            make_cpu('Ryzen 5 5600X'),
+            make_gpu('RTX 4070'),
+            Motherboard.objects.create(name='B650', manufacturer='MSI', price=20000, ram_slots=4),
+            make_ram('Vengeance'),
+            Storage.objects.create(name='980 Pro', manufacturer='Samsung', price=12000),
+            PSU.objects.create(name='RM750', manufacturer='Corsair', price=11000),
+            Case.objects.create(name='H5 Flow', manufacturer='NZXT', price=9000),
+        ]
+        Component.objects.update(kind='')  # the rows as they were before the migration
+
+        backfill(apps, None)
+
+        kinds = dict(Component.objects.values_list('pk', 'kind'))
+        self.assertEqual([kinds[component.pk] for component in made], ['CPU', 'GPU', 'Motherboard', 'RAM', 'Storage', 'PSU', 'Case'])
+
+
+class PolymorphicQuerySetTests(TestCase):
+    def test_returns_concrete_children_in_order(self):
+        make_ram('A RAM')
+        make_cpu('B CPU')
+        make_gpu('C GPU')
+        make_cpu('D CPU')
+
+        components = list(Component.objects.polymorphic().order_by('name'))
+
+        self.assertEqual([c.name for c in components], ['A RAM', 'B CPU', 'C GPU', 'D CPU'])
+        self.assertEqual([type(c) for c in components], [RAM, CPU, GPU, CPU])
+        # Child fields are already loaded.
+        with self.assertNumQueries(0):
+            self.assertEqual(components[1].socket, 'AM4')
+
+    def test_query_count_grows_with_kinds_not_rows(self):
+        for i in range(3):
+            make_cpu(f'CPU {i}')
+            make_gpu(f'GPU {i}')
+        # One base query plus one per kind present.
+        with self.assertNumQueries(3):
+            list(Component.objects.polymorphic())
+
+        for i in range(3, 30):
+            make_cpu(f'CPU {i}')
+            make_gpu(f'GPU {i}')
+        with self.assertNumQueries(3):
+            self.assertEqual(len(list(Component.objects.polymorphic())), 60)
+
+        make_ram('RAM 0')
+        with self.assertNumQueries(4):
+            list(Component.objects.polymorphic())
+
+
+class SearchIndexTests(TestCase):
+    def test_saving_a_component_indexes_it(self):
+        cpu = make_cpu('Ryzen 5 5600X')
+        terms = set(ComponentSearchTerm.objects.filter(component=cpu).values_list('term', flat=True))
+        self.assertTrue({'ryzen', '5', '5600x', 'amd', 'cpu', 'am4'} <= terms)
+
+        cpu.name = 'Ryzen 7 5800X'
+        cpu.save()
+        terms = set(ComponentSearchTerm.objects.filter(component=cpu).values_list('term', flat=True))
+        self.assertIn('5800x', terms)
+        self.assertNotIn('5600x', terms)
+
+    def test_search_matches_word_prefixes_of_every_query_word(self):
+        make_cpu('Ryzen 5 5600X')
+        make_cpu('Ryzen 7 5800X')
+        make_gpu('GeForce RTX 4070')
+
+        def names(query):
+            return sorted(search_queryset(Component.objects.all(), query).values_list('name', flat=True))
+
+        self.assertEqual(names('ryz'), ['Ryzen 5 5600X', 'Ryzen 7 5800X'])
+        self.assertEqual(names('ryzen 58'), ['Ryzen 7 5800X'])
+        self.assertEqual(names('nvidia rtx'), ['GeForce RTX 4070'])
+        self.assertEqual(names('zen'), [])
+        self.assertEqual(names('--'), [])
+
+    def test_top_k_ranks_name_matches_first(self):
+        make_gpu('Corsair Edition GPU')  # 'corsair' only in the name
+        make_ram('Vengeance 16GB')  # 'corsair' only as the manufacturer
+
+        results = top_k('corsair', k=1)
+
+        self.assertEqual([c.name for c in results], ['Corsair Edition GPU'])
+        self.assertIsInstance(results[0], GPU)
+
+    def test_dumpdata_loaddata_round_trip(self):
+        make_cpu('Ryzen 5 5600X')
+        make_gpu('GeForce RTX 4070')
+        terms = list(ComponentSearchTerm.objects.order_by('component_id', 'term').values_list('component_id', 'term', 'weight'))
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        fixture = os.path.join(directory, 'catalog.json')
+        call_command('dumpdata', 'catalog', output=fixture, stdout=StringIO())
+        Component.objects.all().delete()
+
+        # The fixture carries the search terms, so loading must not write them twice.
+        call_command('loaddata', fixture, stdout=StringIO())
+
+        self.assertEqual(list(ComponentSearchTerm.objects.order_by('component_id', 'term').values_list('component_id', 'term', 'weight')), terms)
+        self.assertEqual([c.name for c in search_queryset(Component.objects.all(), 'rtx')], ['GeForce RTX 4070'])
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        # Duplicate names and prices, plus a missing price, to exercise the id tie-breaker.
+        for i in range(7):
+            make_cpu(f'CPU {i % 3}')
+        Component.objects.filter(pk=Component.objects.order_by('pk').first().pk).update(price=None)
+        Component.objects.filter(pk__in=Component.objects.order_by('-pk').values_list('pk', flat=True)[:3]).update(price=250)
+
+    def walk(self, sort_order):
+        ids, cursor = [], None
+        while True:
+            page, cursor = keyset_page(Component.objects.all(), sort_order, cursor, page_size=2)
+            ids.extend(c.pk for c in page)
+            if cursor is None:
+                return ids
+
+    def test_pages_cover_every_row_once_in_order(self):
+        expected = {
+            'name': list(Component.objects.order_by('name', 'id').values_list('pk', flat=True)),
+            'price_asc': [c.pk for c in sorted(Component.objects.all(), key=lambda c: (c.price is None, c.price or 0, c.pk))],
+            'price_desc': [c.pk for c in sorted(Component.objects.all(), key=lambda c: (c.price is None, -(c.price or 0), c.pk))],
+        }
+        for sort_order, ids in expected.items():
+            with self.subTest(sort_order=sort_order):
+                self.assertEqual(self.walk(sort_order), ids)
+
+    def test_bad_cursor_restarts_from_first_page(self):
+        first_page, _ = keyset_page(Component.objects.all(), 'name', None, page_size=2)
+        page, _ = keyset_page(Component.objects.all(), 'name', 'not-a-cursor', page_size=2)
+        self.assertEqual(page, first_page)
+
+
+@override_settings(SQL_PROFILE_SAMPLE_RATE=0)
+class RangeFilterTests(TestCase):
+    def setUp(self):
+        for name, vram in [('GPU 4GB', 4), ('GPU 8GB', 8), ('GPU 12GB', 12), ('GPU 24GB', 24)]:
+            GPU.objects.create(name=name, manufacturer='NVIDIA', price=300, vram_gb=vram, gpu_clock_speed=1800)
+
+    def names(self, **params):
+        response = self.client.get(reverse('catalog:component_list', args=['gpu']), params)
+        return [c.name for c in response.context['components']]
+
+    def test_min_and_max_filter_numerically(self):
+        # Compared as numbers, so 12 and 24 are not "smaller" than 8.
+        self.assertEqual(self.names(vram_min=8), ['GPU 12GB', 'GPU 24GB', 'GPU 8GB'])
+        self.assertEqual(self.names(vram_min=8, vram_max=12), ['GPU 12GB', 'GPU 8GB'])
+
+    def test_invalid_values_are_ignored(self):
+        self.assertEqual(len(self.names(vram_min='lots')), 4)
+
+
+@override_settings(SQL_PROFILE_SAMPLE_RATE=0)
+class FacetTests(TestCase):
+    def setUp(self):
+        for name, manufacturer, socket, price in [
+            ('Ryzen 5 5600X', 'AMD', 'AM4', 15000),
+            ('Ryzen 7 7700X', 'AMD', 'AM5', 35000),
+            ('Ryzen 9 7950X', 'AMD', 'AM5', 60000),
+            ('Core i5-13600K', 'Intel', 'LGA1700', 32000),
+        ]:
+            CPU.objects.create(name=name, manufacturer=manufacturer, socket=socket, price=price, core_count=8)
+
+    def groups(self, **params):
+        response = self.client.get(reverse('catalog:component_list', args=['cpu']), params)
+        counts = {g['name']: {o['value']: o['count'] for o in g['options']} for g in response.context['facet_groups']}
+        return [c.name for c in response.context['components']], counts
+
+    def test_counts_ignore_their_own_facet(self):
+        names, counts = self.groups(manufacturer='AMD')
+        self.assertEqual(len(names), 3)
+        # Intel stays selectable, while the other facets only count AMD CPUs.
+        self.assertEqual(counts['manufacturer'], {'AMD': 3, 'Intel': 1})
+        self.assertEqual(counts['socket'], {'AM4': 1, 'AM5': 2, 'LGA1700': 0})
+        self.assertEqual(counts['price_band'], {'10k-20k': 1, '20k-50k': 1, '50k+': 1})
+
+    def test_values_in_one_facet_are_ored_and_facets_are_anded(self):
+        names, counts = self.groups(socket=['AM4', 'LGA1700'], price_band='20k-50k')
+        self.assertEqual(names, ['Core i5-13600K'])
+        self.assertEqual(counts['manufacturer'], {'AMD': 0, 'Intel': 1})
+
+    def test_counts_follow_the_search(self):
+        _names, counts = self.groups(q='ryzen 77')
+        self.assertEqual(counts['socket'], {'AM4': 0, 'AM5': 1, 'LGA1700': 0})
+
+    def test_saving_a_component_rebuilds_the_bitmaps(self):
+        before = get_index(CPU)
+        CPU.objects.create(name='Core i9-14900K', manufacturer='Intel', socket='LGA1700', price=70000, core_count=24)
+        self.assertIsNot(get_index(CPU), before)
+        _names, counts = self.groups()
+        self.assertEqual(counts['manufacturer'], {'AMD': 3, 'Intel': 2})
+
+
+@override_settings(SQL_PROFILE_SAMPLE_RATE=0)
+class RatingSummaryTests(TestCase):
+    def setUp(self):
+        self.cpu = make_cpu('Ryzen 5 5600X')
+        self.users = [get_user_model().objects.create_user(username=f'user{i}', password='x') for i in range(3)]
+
+    def summary(self, component=None):
+        component = Component.objects.get(pk=(component or self.cpu).pk)
+        return component.rating_avg, component.rating_count, component.rating_histogram
+
+    def review(self, user, rating, component=None):
+        return Review.objects.create(user=user, component=component or self.cpu, rating=rating, review_text='ok')
+
+    def test_create_edit_and_delete_keep_the_summary_in_step(self):
+        first = self.review(self.users[0], 5)
+        self.review(self.users[1], 4)
+        self.assertEqual(self.summary(), (Decimal('4.50'), 2, [0, 0, 0, 1, 1]))
+
+        first.rating = 1
+        first.save()
+        self.assertEqual(self.summary(), (Decimal('2.50'), 2, [1, 0, 0, 1, 0]))
+
+        self.client.force_login(self.users[0])
+        self.client.post(reverse('catalog:delete_review', args=[first.pk]))
+        self.assertEqual(self.summary(), (Decimal('4.00'), 1, [0, 0, 0, 1, 0]))
+
+    def test_rebuild_command_recomputes_from_reviews(self):
+        self.review(self.users[0], 3)
+        self.review(self.users[1], 4)
+        Component.objects.update(rating_avg=0, rating_count=0, rating_histogram=[0, 0, 0, 0, 0])
+
+        call_command('rebuild_rating_summaries', stdout=StringIO())
+
+        self.assertEqual(self.summary(), (Decimal('3.50'), 2, [0, 0, 1, 1, 0]))
+
+    def test_sort_by_rating(self):
+        other = make_cpu('Ryzen 7 5800X')
+        make_cpu('Ryzen 9 5900X')  # no reviews
+        self.review(self.users[0], 3)
+        self.review(self.users[0], 5, component=other)
+
+        page, _cursor = keyset_page(Component.objects.all(), 'rating')
+
+        self.assertEqual([c.name for c in page], ['Ryzen 7 5800X', 'Ryzen 5 5600X', 'Ryzen 9 5900X'])
+
+
+class CatalogSnapshotTests(TestCase):
+    def setUp(self):
+        for i in range(5):
+            make_cpu(f'CPU {i % 2}')
+        make_gpu('rtx 4070')  # lower case, still sorted among the R's
+        make_ram('RAM 0')
+
+    def test_records_look_like_the_models_and_are_read_only(self):
+        snapshot = get_snapshot()
+        cpu = CPU.objects.first()
+        record = snapshot.get(cpu.pk)
+
+        self.assertEqual((record.name, record.socket, record.get_type()), (cpu.name, 'AM4', 'CPU'))
+        self.assertEqual(record.get_specs(), cpu.get_specs())
+        with self.assertRaises(AttributeError):
+            record.price = 1
+
+    def test_only_one_query_while_the_catalog_is_unchanged(self):
+        get_snapshot()
+        with self.assertNumQueries(1):
+            snapshot = get_snapshot()
+            snapshot.page('price_desc')
+
+    def test_saving_a_component_swaps_in_a_new_snapshot(self):
+        old = get_snapshot()
+        make_gpu('RTX 4080')
+        new = get_snapshot()
+        self.assertIsNot(new, old)
+        self.assertEqual(len(new), len(old) + 1)
+
+    def test_reviews_refresh_the_ratings_without_a_new_catalog_version(self):
+        snapshot, index, version = get_snapshot(), get_index(CPU), CatalogVersion.current()
+        cpu = CPU.objects.first()
+        user = get_user_model().objects.create_user('reviewer', password='x')
+        Review.objects.create(user=user, component=cpu, rating=4, review_text='Good')
+
+        # No reload for every worker: the version stays, and the ratings wait for RATINGS_MAX_AGE.
+        self.assertEqual(CatalogVersion.current(), version)
+        self.assertIs(get_snapshot(), snapshot)
+        with mock.patch('catalog.snapshot.RATINGS_MAX_AGE', 0), self.assertNumQueries(2):  # version, ratings
+            fresh = get_snapshot()
+
+        self.assertEqual(fresh.version, version)
+        self.assertEqual(fresh.get(cpu.pk).rating_count, 1)
+        self.assertEqual(fresh.page('rating')[0][0].id, cpu.pk)
+        self.assertIs(get_index(CPU), index)
+
+    def test_pages_cover_every_record_once(self):
+        snapshot = get_snapshot()
+        names, cursor = [], None
+        while True:
+            page, cursor = snapshot.page('name', cursor, page_size=2, exclude={CPU.objects.first().pk})
+            names.extend(record.name for record in page)
+            if cursor is None:
+                break
+        self.assertEqual(names, ['CPU 0', 'CPU 0', 'CPU 1', 'CPU 1', 'RAM 0', 'rtx 4070'])
+
+
+class ImportPipelineTests(TestCase):
+    def write_file(self, text):
+        handle, path = tempfile.mkstemp(suffix='.json')
+        with os.fdopen(handle, 'w', encoding='utf-8') as f:
+            f.write(text)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def test_reads_json_arrays_and_json_lines_in_small_chunks(self):
+        records = [{'name': f'GPU {i}', 'note': 'x' * i} for i in range(50)]
+        array_path = self.write_file(json.dumps(records, indent=2))
+        lines_path = self.write_file('\n'.join(json.dumps(record) for record in records))
+
+        self.assertEqual(list(iter_json_records(array_path, chunk_size=16)), records)
+        self.assertEqual(list(iter_json_records(lines_path)), records)
+
+    def test_creates_updates_and_reports_bad_rows(self):
+        existing = make_gpu('RTX 4070')
+        records = [
+            {'name': 'RTX 4070', 'manufacturer': 'NVIDIA', 'price': '65000', 'vram_gb': '12GB', 'gpu_clock_speed': '1920 MHz'},
+            {'name': 'RX 7800 XT', 'manufacturer': 'AMD', 'price': '60000', 'vram_gb': '16GB', 'gpu_clock_speed': 'N/A'},
+            {'name': 'Broken', 'manufacturer': 'AMD', 'price': 'call us'},
+            {'manufacturer': 'No name'},
+        ]
+
+        # A fixed number of bulk queries, not one set per row
+        # (15 includes the update of the builds' price totals for the updated GPU).
+        with self.assertNumQueries(15):
+            stats = ComponentImporter(GPU, batch_size=2).run(records)
+
+        self.assertEqual((stats.created, stats.updated, len(stats.errors)), (1, 1, 2))
+        existing = GPU.objects.get(pk=existing.pk)
+        self.assertEqual((existing.price, existing.vram_gb, existing.gpu_clock_speed), (Decimal('65000'), 12, 1920))
+        new = GPU.objects.get(name='RX 7800 XT')
+        self.assertEqual((new.kind, new.vram_gb, new.gpu_clock_speed), ('GPU', 16, None))
+        # Bulk writes skip the save signals, so the importer indexes the rows itself.
+        self.assertEqual([c.name for c in search_queryset(Component.objects.all(), 'rx 7800')], ['RX 7800 XT'])
+
+    def test_reimport_skips_unchanged_rows(self):
+        records = [
+            {'name': 'RTX 4060', 'manufacturer': 'NVIDIA', 'price': '35000', 'vram_gb': '8GB'},
+            {'name': 'RX 7600', 'manufacturer': 'AMD', 'price': '30000', 'vram_gb': '8 GB'},
+        ]
+        ComponentImporter(GPU).run(records)
+        version = CatalogVersion.current()
+
+        # Same feed again, just formatted differently: nothing is written, the version stays.
+        reformatted = [dict(reversed(list(record.items())), vram_gb='8 gb') for record in records]
+        with self.assertNumQueries(1):
+            stats = ComponentImporter(GPU).run(reformatted)
+        self.assertEqual((stats.created, stats.updated, stats.unchanged), (0, 0, 2))
+        self.assertEqual(CatalogVersion.current(), version)
+
+        # One price changed: only that row is written.
+        records[1]['price'] = '28000'
+        stats = ComponentImporter(GPU).run(records)
+        self.assertEqual((stats.updated, stats.unchanged), (1, 1))
+        self.assertEqual(GPU.objects.get(name='RX 7600').price, Decimal('28000'))
+        self.assertNotEqual(CatalogVersion.current(), version)
+
+    def test_saving_outside_the_importer_clears_the_digest(self):
+        record = {'name': 'RTX 4060', 'manufacturer': 'NVIDIA', 'price': '35000', 'vram_gb': '8GB'}
+        ComponentImporter(GPU).run([record])
+        gpu = GPU.objects.get(name='RTX 4060')
+        gpu.price = Decimal('1')
+        gpu.save()
+
+        # The admin edit is undone by the next import even though the feed didn't change.
+        stats = ComponentImporter(GPU).run([record])
+        self.assertEqual(stats.updated, 1)
+        self.assertEqual(GPU.objects.get(pk=gpu.pk).price, Decimal('35000'))
+
+    def test_without_returned_ids_children_go_to_their_own_parents(self):
+        records = [
+            {'name': 'RX 7800 XT', 'manufacturer': 'AMD', 'price': '60000', 'vram_gb': '16GB'},
+            {'name': 'RTX 4070', 'manufacturer': 'NVIDIA', 'price': '65000', 'vram_gb': '12GB'},
+        ]
+        insert_parent_rows = ComponentImporter._insert_parent_rows
+        rivals = []
+
+        def insert_then_add_a_rival(importer, parents):
+            insert_parent_rows(importer, parents)
+            # An admin saves a GPU of the same name before the child rows go in.
+            rivals.append(GPU.objects.create(name='RX 7800 XT', manufacturer='Sapphire', price=Decimal('1')))
+
+        # What MySQL does: bulk_create() doesn't hand back the ids.
+        with mock.patch.object(type(connection.features), 'can_return_rows_from_bulk_insert', False), \
+                mock.patch.object(ComponentImporter, '_insert_parent_rows', autospec=True, side_effect=insert_then_add_a_rival):
+            stats = ComponentImporter(GPU).run(records)
+
+        self.assertEqual(stats.created, 2)
+        imported = GPU.objects.exclude(pk=rivals[0].pk)
+        self.assertEqual(sorted(imported.values_list('name', 'vram_gb')), [('RTX 4070', 12), ('RX 7800 XT', 16)])
+        self.assertEqual(set(imported.values_list('kind', flat=True)), {'GPU'})
+        self.assertIsNone(GPU.objects.get(pk=rivals[0].pk).vram_gb)
+
+    def test_import_catalog_cleans_files_in_worker_processes(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        with open(os.path.join(directory, 'CPU.json'), 'w') as f:
+            json.dump([{'name': 'Ryzen 5 7600', 'manufacturer': 'AMD', 'socket': 'AM5', 'core_count': '6 Cores', 'clock_speed': '3.8 GHz'}], f)
+        with open(os.path.join(directory, 'gpu_daily.jsonl'), 'w') as f:
+            f.write(json.dumps({'name': 'RX 7600', 'manufacturer': 'AMD', 'vram_gb': '8GB'}) + '\n')
+            f.write(json.dumps({'manufacturer': 'No name'}) + '\n')
+        version = CatalogVersion.current()[0]
+
+        out = StringIO()
+        call_command('import_catalog', directory, workers=2, stdout=out, stderr=StringIO())
+
+        self.assertEqual(CPU.objects.get(name='Ryzen 5 7600').core_count, 6)
+        self.assertEqual(GPU.objects.get(name='RX 7600').vram_gb, 8)
+        self.assertIn('GPU: Created: 1, Updated: 0, Unchanged: 0, Rejected: 1', out.getvalue())
+        self.assertIn('Stages: parse', out.getvalue())
+        # Both files are written, but the catalog version moves once.
+        self.assertEqual(CatalogVersion.current()[0], version + 1)
+
+    def test_rows_the_database_would_refuse_are_quarantined_without_splitting_the_batch(self):
+        records = [
+            {'name': 'RX 7600', 'manufacturer': 'AMD', 'price': '30000'},
+            {'name': 'X' * 501, 'manufacturer': 'AMD'},
+            {'name': 'RX 7700', 'manufacturer': 'AMD', 'price': '123456789'},
+            {'name': 'RX 7800', 'manufacturer': 'AMD', 'gpu_clock_speed': '99999999999999999999 MHz'},
+            {'name': 'RX 7900', 'manufacturer': 'AMD', 'price': '45000.555'},
+        ]
+        importer = ComponentImporter(GPU, source='feeds/gpu.json')
+        with mock.patch.object(importer, '_write_batch', wraps=importer._write_batch) as write_batch:
+            stats = importer.run(records)
+
+        # One transaction for the good rows; nothing is retried row by row.
+        self.assertEqual(write_batch.call_count, 1)
+        self.assertEqual((stats.created, len(stats.errors)), (2, 3))
+        self.assertEqual(GPU.objects.get(name='RX 7900').price, Decimal('45000.56'))
+
+        quarantined = list(QuarantinedRow.objects.order_by('row_number'))
+        self.assertEqual([row.row_number for row in quarantined], [2, 3, 4])
+        self.assertEqual(quarantined[1].payload, records[2])
+        self.assertEqual((quarantined[1].kind, quarantined[1].source), ('GPU', 'feeds/gpu.json'))
+        self.assertIn('price', quarantined[1].error)
+
+    def test_reimport_quarantine_retries_rows_after_a_cleaner_fix(self):
+        records = [
+            {'name': 'RX 7600', 'manufacturer': 'AMD', 'price': 'call us'},
+            {'manufacturer': 'AMD'},
+        ]
+        ComponentImporter(GPU).run(records)
+        self.assertEqual(QuarantinedRow.objects.count(), 2)
+
+        # "Fix" the cleaner: unreadable prices become empty instead of failing.
+        with mock.patch.dict(FIELD_CLEANERS['GPU'], {'price': clean_decimal}):
+            call_command('reimport_quarantine', stdout=StringIO(), stderr=StringIO())
+
+        self.assertIsNone(GPU.objects.get(name='RX 7600').price)
+        left = QuarantinedRow.objects.get()
+        self.assertEqual((left.payload, left.attempts), ({'manufacturer': 'AMD'}, 2))
+
+class ColumnCleaningTests(SimpleTestCase):
+    """The column cleaners must give exactly what the scalar helpers give, value for value."""
+
+    PIECES = [
+        '8', '16', '1.5', '.', '..', '3.70', '4.20', '007', '٣', ' ', '  ', '-', ' - ', 'x', '2 x ',
+        'GB', 'gb', 'Gb', 'TB', 'tb', 'GHz', 'MHz', 'W', 'Cores', 'N/A', 'n/a', 'ß', 'ﬃ', '\x00',
+        'Gold', '80 Plus', 'Platinum', 'Mid Tower', 'mini tower', '\ud800',
+    ]
+
+    def random_value(self, rng):
+        roll = rng.random()
+        if roll < 0.05:
+            return rng.choice([None, True, False, [], {'a': 1}, 3.5, float('nan')])
+        if roll < 0.12:
+            return rng.randint(-5, 5000)
+        return ''.join(rng.choice(self.PIECES) for _ in range(rng.randint(0, 6)))
+
+    def test_column_cleaners_match_the_scalar_helpers(self):
+        for seed in range(30):
+            rng = random.Random(seed)
+            # Draw from a small pool so the column has repeats, like a real feed.
+            pool = [self.random_value(rng) for _ in range(rng.randint(1, 60))]
+            column = [rng.choice(pool) for _ in range(rng.randint(0, 300))]
+            if seed % 3 == 0:
+                column = [value for value in column if value is None or isinstance(value, str)]  # the fast path
+
+            for clean, clean_column in COLUMN_CLEANERS.items():
+                with self.subTest(seed=seed, cleaner=clean.__name__):
+                    expected = [clean(value) for value in column]
+                    result = clean_column(column)
+                    self.assertEqual(
+                        [(type(value), value) for value in result],
+                        [(type(value), value) for value in expected],
+                    )
+
+
+class DataFileTests(TestCase):
+    def test_export_and_load_round_trip(self):
+        user = get_user_model().objects.create_user('reviewer', password='x')
+        cpu = make_cpu('Ryzen 5 7600')
+        make_gpu('RTX 4060')
+        Review.objects.create(component=cpu, user=user, rating=4, review_text='Good')
+        before = list(Component.objects.order_by('pk').values())
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+
+        call_command('export_data', 'users', 'catalog', output_dir=directory, chunk_size=2, stdout=StringIO())
+        Component.objects.all().delete()
+        get_user_model().objects.all().delete()
+        call_command('load_data', *(os.path.join(directory, f'{app}_data.jsonl.gz') for app in ('users', 'catalog')), stdout=StringIO())
+
+        self.assertEqual(list(Component.objects.order_by('pk').values()), before)
+        self.assertEqual(CPU.objects.get(pk=cpu.pk).socket, cpu.socket)
+        self.assertEqual(Review.objects.get().user.username, 'reviewer')
+        self.assertEqual([c.name for c in search_queryset(Component.objects.all(), 'rtx')], ['RTX 4060'])
+
+
+class CatalogArchiveTests(TestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.path = os.path.join(directory, 'catalog.json.gz')
+
+    def test_snapshot_and_restore_round_trip(self):
+        cpu = make_cpu('Ryzen 5 7600')
+        make_gpu('RTX 4060')
+        make_ram('Vengeance 16GB')
+        before = list(Component.objects.order_by('pk').values())
+        terms = list(ComponentSearchTerm.objects.order_by('component_id', 'term').values_list('component_id', 'term', 'weight'))
+        call_command('snapshot_catalog', self.path, stdout=StringIO())
+
+        with self.assertRaises(CommandError):
+            call_command('restore_catalog', self.path, stdout=StringIO())
+        version = CatalogVersion.current()
+        call_command('restore_catalog', self.path, replace=True, stdout=StringIO())
+
+        self.assertEqual(list(Component.objects.order_by('pk').values()), before)
+        self.assertEqual(CPU.objects.get(pk=cpu.pk).socket, 'AM4')
+        self.assertEqual(GPU.objects.get().vram_gb, 8)
+        self.assertEqual(
+            list(ComponentSearchTerm.objects.order_by('component_id', 'term').values_list('component_id', 'term', 'weight')),
+            terms,
+        )
+        self.assertEqual([c.name for c in search_queryset(Component.objects.all(), 'rtx')], ['RTX 4060'])
+        self.assertNotEqual(CatalogVersion.current(), version)
+
+    def test_restored_components_have_no_ratings_without_their_reviews(self):
+        cpu = make_cpu('Ryzen 5 7600')
+        user = get_user_model().objects.create_user('reviewer', password='x')
+        Review.objects.create(component=cpu, user=user, rating=4, review_text='Good')
+        call_command('snapshot_catalog', self.path, stdout=StringIO())
+
+        # --replace deletes the reviews with the old components; the snapshot doesn't have them.
+        call_command('restore_catalog', self.path, replace=True, stdout=StringIO())
+
+        restored = Component.objects.get(pk=cpu.pk)
+        self.assertFalse(Review.objects.exists())
+        self.assertEqual((restored.rating_avg, restored.rating_count), (0, 0))
+        self.assertEqual(restored.rating_histogram, [0, 0, 0, 0, 0])
+
+    def test_rejects_other_files_and_versions(self):
+        with open(self.path, 'w') as f:
+            f.write('not gzip')
+        with self.assertRaises(SnapshotError):
+            read_snapshot(self.path)
+
+        call_command('snapshot_catalog', self.path, stdout=StringIO())
+        with mock.patch('catalog.archive.VERSION', 2), self.assertRaises(SnapshotError):
+            read_snapshot(self.path)
+
+
+class SyntheticDatasetTests(TestCase):
+    SIZES = {'components': 140, 'users': 12, 'builds': 30, 'reviews': 60, 'wishlist_items': 20, 'listings': 5, 'comments': 10}
+
+    def test_generates_consistent_data(self):
+        from builds.models import Build, BuildComponent
+        from marketplace.models import Comment
+
+        call_command('generate_dataset', seed=7, stdout=StringIO(), **self.SIZES)
+
+        self.assertEqual(Component.objects.count(), 140)
+        self.assertEqual(set(Component.objects.values_list('kind', flat=True)), set(dict(Component.KIND_CHOICES)))
+        self.assertEqual(Build.objects.count(), 30)
+        self.assertEqual(Review.objects.count(), 60)
+        self.assertEqual(Comment.objects.count(), 10)
+        for build in Build.objects.all():
+            parts = {part.component.kind: part.component_id for part in BuildComponent.objects.filter(build=build).select_related('component')}
+            self.assertTrue({'CPU', 'Motherboard', 'RAM', 'Storage', 'PSU', 'Case'} <= set(parts))
+            self.assertEqual(CPU.objects.get(pk=parts['CPU']).socket, Motherboard.objects.get(pk=parts['Motherboard']).socket)
+            # The denormalized totals were written with the rows.
+            self.assertEqual(build.total_price, build.calculate_total_price())
+        # The summaries written with the rows match the reviews.
+        reviewed = Component.objects.filter(rating_count__gt=0)
+        self.assertEqual(sum(reviewed.values_list('rating_count', flat=True)), 60)
+        for component in reviewed:
+            self.assertEqual(component.rating_count, component.reviews.count())
+        # The search index was filled too.
+        cpu = CPU.objects.first()
+        self.assertIn(cpu.pk, [c.pk for c in search_queryset(Component.objects.all(), cpu.name)])
+
+    def test_same_seed_gives_same_data(self):
+        def generate(seed):
+            with transaction.atomic():
+                DatasetGenerator(seed=seed, **self.SIZES).run()
+                data = list(Component.objects.order_by('pk').values_list('name', 'price', 'rating_count'))
+                transaction.set_rollback(True)
+            return data
+
+        self.assertEqual(generate(1), generate(1))
+        self.assertNotEqual(generate(1), generate(2))
+
+
+@override_settings(SQL_PROFILE_SAMPLE_RATE=0)
+class ViewBenchmarkTests(TestCase):
+    def test_benchmarks_every_view_and_checks_the_baseline(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        output = os.path.join(directory, 'results.json')
+        baseline = os.path.join(directory, 'baseline.json')
+        options = {'scale': 0.01, 'iterations': 2, 'warmup': 1, 'output': output, 'baseline': baseline, 'stdout': StringIO()}
+
+        call_command('benchmark_views', update_baseline=True, **options)
+        results = read_results(output)
+        self.assertEqual(set(results['views']), {view.name for view in VIEWS})
+        self.assertTrue(all(metrics['bytes'] > 0 and metrics['p50_ms'] <= metrics['p99_ms'] for metrics in results['views'].values()))
+        # Nothing the benchmark generated or changed is kept.
+        self.assertFalse(Component.objects.exists())
+
+        # A view that suddenly makes more queries fails the run.
+        stored = read_results(baseline)
+        stored['views']['workbench_view']['queries'] -= 1
+        with open(baseline, 'w') as f:
+            json.dump(stored, f)
+        with self.assertRaises(CommandError):
+            call_command('benchmark_views', latency_tolerance=100, stderr=StringIO(), **options)
+
+    def test_compare_tolerates_small_latency_changes(self):
+        old = {'views': {'v': {'queries': 3, 'bytes': 1000, 'p50_ms': 10.0, 'p95_ms': 20.0}}}
+        same = {'views': {'v': {'queries': 3, 'bytes': 1050, 'p50_ms': 11.5, 'p95_ms': 21.0}}}
+        slower = {'views': {'v': {'queries': 3, 'bytes': 1000, 'p50_ms': 30.0, 'p95_ms': 20.0}, 'new': {}}}
+        self.assertEqual(compare(same, old), [])
+        self.assertEqual(len(compare(slower, old)), 1)
+
+
+@override_settings(SQL_PROFILE_SAMPLE_RATE=0)
+class SQLProfileTests(TestCase):
+    def setUp(self):
+        recent.clear()
+        self.addCleanup(recent.clear)
+
+    def test_statement_shape_ignores_values(self):
+        self.assertEqual(
+            statement_shape("SELECT * FROM t WHERE id IN (%s, %s, %s) AND name = 'x' LIMIT 21"),
+            statement_shape("SELECT * FROM t WHERE id IN (%s)  AND name = 'yy' LIMIT 5"),
+        )
+
+    def test_every_response_gets_server_timing(self):
+        make_cpu('Ryzen 5 7600')
+        response = self.client.get(reverse('catalog:chooser'))
+        self.assertRegex(response['Server-Timing'], r'^db;dur=[\d.]+;desc="\d+ queries", app;dur=')
+        self.assertEqual(recent.records()[-1]['view'], 'catalog:chooser')
+
+    def test_repeated_statements_are_flagged_with_their_caller(self):
+        ids = [make_cpu(f'CPU {number}').pk for number in range(6)]
+
+        def loop_view(request):
+            for pk in ids:
+                Component.objects.get(pk=pk)  # one query per item
+            return HttpResponse('ok')
+
+        with override_settings(SQL_PROFILE_SAMPLE_RATE=1), self.assertLogs('buildforge.sql', 'WARNING') as logs:
+            response = SQLProfileMiddleware(loop_view)(RequestFactory().get('/loop/'))
+
+        self.assertIn('nplus1', response['Server-Timing'])
+        [repeated] = recent.records()[-1]['repeated']
+        self.assertEqual(repeated['count'], 6)
+        self.assertIn('catalog/tests.py', repeated['caller'])
+        self.assertEqual(json.loads(logs.records[0].getMessage())['queries'], 6)
+
+        with override_settings(SQL_PROFILE_REPEAT_THRESHOLD=10):
+            response = SQLProfileMiddleware(loop_view)(RequestFactory().get('/loop/'))
+        self.assertNotIn('nplus1', response['Server-Timing'])
+        self.assertEqual(recent.records()[-1]['repeated'], [])
+
+    def test_profile_page_is_staff_only(self):
+        user = get_user_model().objects.create_user('member', password='x')
+        self.client.force_login(user)
+        self.assertEqual(self.client.get(reverse('catalog:sql_profile')).status_code, 302)
+
+        user.is_staff = True
+        user.save()
+        self.client.get(reverse('catalog:chooser'))
+        response = self.client.get(reverse('catalog:sql_profile'))
+        self.assertContains(response, 'catalog:chooser')
+        with override_settings(SQL_PROFILE_REPEAT_THRESHOLD=8):
+            response = self.client.get(reverse('catalog:sql_profile'))
+        self.assertEqual(response.context['repeat_threshold'], 8)
+
+
+class SearchQueryParserTests(SimpleTestCase):
+    def test_price_constraints(self):
+        cases = {
+            '<50000': [('lt', 50000)],
+            '>= 20,000': [('gte', 20000)],
+            '30k-60k': [('gte', 30000), ('lte', 60000)],
+            '৳60000 to ৳30000': [('gte', 30000), ('lte', 60000)],
+            'under 8.5k': [('lte', 8500)],
+            'over 20k': [('gte', 20000)],
+        }
+        for query, filters in cases.items():
+            with self.subTest(query=query):
+                parsed = parse_search_query(query)
+                self.assertEqual(parsed.text, '')
+                self.assertEqual(parsed.price_filters, [(lookup, Decimal(value)) for lookup, value in filters])
+
+    def test_model_numbers_stay_text(self):
+        for query in ['4070', 'ryzen 5 5600x', 'i5-13600k', 'DDR4-3200']:
+            with self.subTest(query=query):
+                parsed = parse_search_query(query)
+                self.assertEqual((parsed.text, parsed.price_filters), (query, []))
+
+    def test_text_and_price_together(self):
+        parsed = parse_search_query('rtx  4070 under 80k ti')
+        self.assertEqual(parsed.text, 'rtx 4070 ti')
+        self.assertEqual(parsed.price_filters, [('lte', Decimal(80000))])
+
+    def test_blank_query_is_empty(self):
+        self.assertFalse(parse_search_query('   '))
+
+
+@override_settings(SQL_PROFILE_SAMPLE_RATE=0)
+class PriceSearchViewTests(TestCase):
+    def test_chooser_and_list_filter_by_price(self):
+        cheap, dear = make_cpu('Ryzen 5 5600'), make_cpu('Ryzen 9 7950X')
+        dear.price = 60000
+        dear.save()
+
+        response = self.client.get(reverse('catalog:chooser'), {'q': 'ryzen <1000'})
+        self.assertEqual([c.pk for c in response.context['components']], [cheap.pk])
+        response = self.client.get(reverse('catalog:component_list', args=['cpu']), {'q': '50k-70k'})
+        self.assertEqual([c.pk for c in response.context['components']], [dear.pk])
+
+
+class CatalogQueryBudgets:
+    """The most queries each catalog view may make (see catalog/testing.py)."""
+
+    def test_chooser(self):
+        self.assertQueryBudget(3, 'get', reverse('catalog:chooser'))
+        self.assertQueryBudget(4, 'get', reverse('catalog:chooser'), {'q': 'ryzen'})
+        self.assertQueryBudget(4, 'get', reverse('catalog:chooser'), {'q': 'ryzen'}, htmx=True)
+
+    def test_component_list(self):
+        url = reverse('catalog:component_list', args=['cpu'])
+        self.assertQueryBudget(4, 'get', url)
+        self.assertQueryBudget(5, 'get', url, {'q': 'ryzen', 'manufacturer': 'AMD'}, htmx=True)
+
+    def test_component_detail(self):
+        self.assertQueryBudget(6, 'get', reverse('catalog:component_detail', args=[self.data.reviewed.pk]))
+
+    def test_post_review(self):
+        url = reverse('catalog:component_detail', args=[self.data.wished.pk])
+        self.assertQueryBudget(10, 'post', url, {'rating': 4, 'review_text': 'Runs cool'}, status=302)
+
+    def test_edit_review(self):
+        review_id = self.data.review.pk
+        self.assertQueryBudget(4, 'get', reverse('catalog:get_review_edit_form', args=[review_id]), htmx=True)
+        self.assertQueryBudget(9, 'post', reverse('catalog:save_review_changes', args=[review_id]), {'rating': 3, 'review_text': 'Louder than I hoped'}, htmx=True)
+
+    def test_delete_review(self):
+        self.assertQueryBudget(6, 'post', reverse('catalog:delete_review', args=[self.data.review.pk]), status=302)
+
+    def test_sql_profile_page(self):
+        self.client.force_login(self.data.curator)
+        self.assertQueryBudget(2, 'get', reverse('catalog:sql_profile'))
+
+
+class SmallCatalogQueryBudgetTests(CatalogQueryBudgets, QueryBudgetTestCase):
+    pass
+
+
+class LargeCatalogQueryBudgetTests(CatalogQueryBudgets, QueryBudgetTestCase):
+    ITEMS = LARGE
@@ -13,6 +13,9 @@ urlpatterns = [
     # This is the dynamic URL for the component list page.
     # It captures the component type from the URL (e.g., /catalog/cpu/)
  
+    # Staff-only query profile (must come before the catch-all component_type pattern below).
+    path('sql-profile/', views.sql_profile_view, name='sql_profile'),
+
     path('<str:component_type>/', views.component_list_view, name='component_list'),
     path('component/<int:component_id>/', views.component_detail_view, name='component_detail'),
     path('review/delete/<int:review_id>/', views.delete_review, name='delete_review'),
@@ -1,12 +1,21 @@
 # catalog/views.py
 
+from django.conf import settings
 from django.shortcuts import render, get_object_or_404, redirect
 from django.http import Http404, HttpResponse, HttpResponseForbidden
 from .models import Component, CPU, GPU, Motherboard, RAM, Storage, PSU, Case
 from django.db.models import Q
 from .models import Component, Review
 from .forms import ReviewForm 
+from .search import search_queryset
+from .query import parse_search_query
+from .pagination import keyset_page
+from .facets import apply_facets, facet_groups, get_index, selected_facets
+from .snapshot import get_snapshot
+from .instrumentation import REPEAT_THRESHOLD, recent
 from django.contrib.auth.decorators import login_required
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core.exceptions import ValidationError
 # This map is our secure way of translating a URL part into a database model.
 # The keys MUST be lowercase.
 COMPONENT_MODEL_MAP = {
@@ -21,6 +30,59 @@ COMPONENT_MODEL_MAP = {
 
 # catalog/views.py
 
+def _component_page(request, components, search_query, sort_order):
+    """
+    Cuts one keyset page out of a filtered component queryset (see catalog/pagination.py).
+    Returns the context entries the grid partials need: the page of components and
+    the URL that loads the next page (None on the last page).
+    """
+    # 'Best Match' only means something while searching.
+    if sort_order == 'relevance' and not search_query:
+        sort_order = 'name'
+
+    page, next_cursor = keyset_page(components, sort_order, request.GET.get('cursor'))
+    return {'components': page, 'next_page_url': _next_page_url(request, sort_order, next_cursor)}
+
+
+def _next_page_url(request, sort_order, next_cursor):
+    """The "load more" URL: every filter from this request (search, ranges) with the cursor moved on."""
+    if not next_cursor:
+        return None
+    params = request.GET.copy()
+    params['sort'] = sort_order
+    params['cursor'] = next_cursor
+    return request.path + '?' + params.urlencode()
+
+
+def _apply_range_filters(request, ModelClass, components):
+    """
+    Applies <name>_min / <name>_max GET parameters for the model's RANGE_FILTERS.
+    Returns the filtered queryset and a list of the filters (with the current values)
+    for the filter bar. Values that aren't numbers are ignored.
+    """
+    range_filters = []
+    for name, field_name in ModelClass.RANGE_FILTERS.items():
+        field = ModelClass._meta.get_field(field_name)
+        current = {}
+        for bound, lookup in (('min', 'gte'), ('max', 'lte')):
+            raw_value = request.GET.get(f'{name}_{bound}', '').strip()
+            if not raw_value:
+                continue
+            try:
+                value = field.to_python(raw_value)
+            except ValidationError:
+                continue
+            components = components.filter(**{f'{field_name}__{lookup}': value})
+            current[bound] = raw_value
+        range_filters.append({
+            'name': name,
+            'label': field.help_text or field.verbose_name,
+            'min': current.get('min', ''),
+            'max': current.get('max', ''),
+        })
+    return components, range_filters
+
+
 def catalog_chooser_view(request):
     """
     Displays component categories AND a searchable/sortable list of ALL components.
@@ -28,36 +90,43 @@ def catalog_chooser_view(request):
     # Part 1: Get the categories for the top grid.
     component_types = COMPONENT_MODEL_MAP.keys()
 
-    # Part 2: Get the queryset for ALL components.
-    all_components = Component.objects.all()
-
-    # Part 3: Apply filtering and sorting from the request's GET parameters.
+    # Part 2: Read the filtering and sorting from the request's GET parameters.
     search_query = request.GET.get('q', '')
     sort_order = request.GET.get('sort', 'name')
 
+    # Part 3: Get one page of components.
+    # Only one page is rendered; the grid loads the rest as the user scrolls.
     if search_query:
-        all_components = all_components.filter(
-            Q(name__icontains=search_query) | 
-            Q(manufacturer__icontains=search_query)
-        )
-
-    if sort_order == 'price_asc':
-        all_components = all_components.order_by('price')
-    elif sort_order == 'price_desc':
-        all_components = all_components.order_by('-price')
+        # polymorphic() gives the grid the concrete CPU/GPU/... objects so each card
+        # can show its key specs, at one query per component type on the page.
+        # Price constraints in the query ('<50000', '30k-60k') are indexed price filters
+        # (catalog/query.py); the words use the search index (catalog/search.py), not a LIKE scan.
+        parsed = parse_search_query(search_query)
+        all_components = parsed.filter_price(Component.objects.polymorphic())
+        if parsed.text:
+            all_components = search_queryset(all_components, parsed.text, rank=(sort_order == 'relevance'))
+        page_context = _component_page(request, all_components, parsed.text, sort_order)
     else:
-        all_components = all_components.order_by('name')
+        # Plain browsing reads the in-memory catalog snapshot (catalog/snapshot.py),
+        # which is already sorted by name, price and rating. No component queries at all.
+        if sort_order == 'relevance':
+            sort_order = 'name'
+        page, next_cursor = get_snapshot().page(sort_order, request.GET.get('cursor'))
+        page_context = {'components': page, 'next_page_url': _next_page_url(request, sort_order, next_cursor)}
 
     # Part 4: Create the final context dictionary.
     context = {
         'component_types': component_types,
-        # THE FIX: We name the variable 'components' to match what the partial expects.
-        'components': all_components, 
         'search_query': search_query,
         'sort_order': sort_order,
+        # THE FIX: We name the variable 'components' to match what the partial expects.
+        **page_context,
     }
 
-    # Part 5: Handle HTMX requests from the filter bar.
+    # Part 5: Handle HTMX requests.
+    # "Load more" requests (they carry a cursor) only need the next batch of cards.
+    if request.htmx and 'cursor' in request.GET:
+        return render(request, 'catalog/partials/component_cards.html', context)
     if request.htmx:
         # When filtering, we only need to re-render the grid part.
         # The partial 'component_grid.html' will correctly use the 'components' variable.
@@ -82,29 +151,41 @@ def component_list_view(request, component_type):
     search_query = request.GET.get('q', '')
     sort_order = request.GET.get('sort', 'name')
 
-    if search_query:
-        components = components.filter(
-            Q(name__icontains=search_query) | 
-            Q(manufacturer__icontains=search_query)
-        )
-
-    if sort_order == 'price_asc':
-        components = components.order_by('price')
-    elif sort_order == 'price_desc':
-        components = components.order_by('-price')
-    else:
-        components = components.order_by('name')
-        
+    # Price constraints in the query ('<50000', '30k-60k') become indexed price filters
+    # (catalog/query.py); the words use the search index (catalog/search.py), not a LIKE scan.
+    parsed = parse_search_query(search_query)
+    components = parsed.filter_price(components)
+    if parsed.text:
+        components = search_queryset(components, parsed.text, rank=(sort_order == 'relevance'))
+
+    # Numeric spec ranges, e.g. /catalog/psu/?wattage_min=650 or /catalog/gpu/?vram_min=8.
+    # These are plain indexed comparisons in SQL.
+    components, range_filters = _apply_range_filters(request, ModelClass, components)
+
+    # Sidebar facets, e.g. /catalog/cpu/?manufacturer=AMD&socket=AM5&price_band=10k-20k.
+    facet_index = get_index(ModelClass)
+    selected = selected_facets(request, facet_index)
+    filtered_components = apply_facets(components, selected)
+
     context = {
-        'components': components,
         'component_type_display': component_type_slug.replace('_', ' ').title(),
         'component_type_slug': component_type_slug,
         'search_query': search_query,
         'sort_order': sort_order,
+        'range_filters': range_filters,
+        **_component_page(request, filtered_components, parsed.text, sort_order),
     }
 
+    if request.htmx and 'cursor' in request.GET:
+        # "Load more" keeps the same filters, so the sidebar doesn't change.
+        return render(request, 'catalog/partials/component_cards.html', context)
+
+    # The counts are read from precomputed bitmaps (catalog/facets.py), not GROUP BY queries.
+    context['facet_groups'] = facet_groups(facet_index, components, selected)
+
     if request.htmx:
-        return render(request, 'catalog/partials/component_grid.html', context)
+        # The new grid, plus the sidebar with updated counts (swapped in out-of-band).
+        return render(request, 'catalog/partials/component_list_results.html', context)
     
     return render(request, 'catalog/component_list.html', context)
 
@@ -114,10 +195,8 @@ def component_detail_view(request, component_id):
     Handles displaying component details, showing reviews, AND processing new review submissions.
     """
     # --- Part 1: Fetch all necessary data from the database ---
-    component = get_object_or_404(
-        Component.objects.select_related('cpu', 'gpu', 'motherboard', 'ram', 'storage', 'psu', 'case'), 
-        pk=component_id
-    )
+    # polymorphic() hands us the concrete CPU/GPU/... object in two queries.
+    component = get_object_or_404(Component.objects.polymorphic(), pk=component_id)
     reviews = Review.objects.filter(component=component).select_related('user').order_by('-date_posted')
     
     user_review = None
@@ -142,31 +221,20 @@ def component_detail_view(request, component_id):
         # For a GET request, create an empty form
         form = ReviewForm()
 
-    # --- Part 3: Build the specifications dictionary (This is the part that was missing) ---
-    specs = {}
+    # --- Part 3: Build the specifications dictionary ---
+    # Each child model knows its own specs (see get_specs() in catalog/models.py).
+    specs = component.get_specs()
     component_type = component.get_type()
 
-    if component_type == "CPU":
-        child = component.cpu
-        specs = {"Socket": child.socket, "Core Count": child.core_count, "Clock Speed (GHz)": child.clock_speed}
-    elif component_type == "GPU":
-        child = component.gpu
-        specs = {"VRAM (GB)": child.vram_gb, "Clock Speed (MHz)": child.gpu_clock_speed}
-    elif component_type == "Motherboard":
-        child = component.motherboard
-        specs = {"Socket": child.socket, "Form Factor": child.form_factor, "RAM Slots": child.ram_slots}
-    elif component_type == "RAM":
-        child = component.ram
-        specs = {"Capacity": child.capacity_gb, "Speed": child.speed_mhz}
-    elif component_type == "Storage":
-        child = component.storage
-        specs = {"Storage type": child.storage_type, "Capacity (GB)": child.capacity_gb }
-    elif component_type == "PSU":
-        child = component.psu
-        specs = {"Wattage": child.wattage, "Efficiency": child.efficiency_rating}
-    elif component_type == "Case":
-        child = component.case
-        specs = {"Form Factor": child.form_factor, "Max GPU Length": child.max_gpu_length}
+    # 5 stars down to 1 star, from the histogram stored on the component.
+    rating_breakdown = [
+        {
+            'stars': stars,
+            'count': component.rating_histogram[stars - 1],
+            'percent': round(100 * component.rating_histogram[stars - 1] / component.rating_count) if component.rating_count else 0,
+        }
+        for stars in range(5, 0, -1)
+    ]
 
     # --- Part 4: Assemble the final context for the template ---
     context = {
@@ -174,6 +242,7 @@ def component_detail_view(request, component_id):
         'specs': specs,
         'component_type': component_type,
         'reviews': reviews,
+        'rating_breakdown': rating_breakdown,
         'form': form,
         'user_review': user_review,
     }
@@ -190,12 +259,13 @@ def delete_review(request, review_id):
     # This prevents accidental deletion from search engine crawlers or simple links.
     if request.method == 'POST':
         # Find the specific review we want to delete.
-        review = get_object_or_404(Review, pk=review_id)
+        review = get_object_or_404(Review.objects.select_related('user'), pk=review_id)
         
         # Security Check: The person making the request must be the review's author OR a staff member (admin).
         if request.user == review.user or request.user.is_staff:
             # Get the component ID *before* deleting the review, so we know where to redirect back to.
-            component_id = review.component.id
+            # (component_id is already on the review row; review.component.id would load the component.)
+            component_id = review.component_id
             
             # This is the database operation that removes the row.
             review.delete()
@@ -232,7 +302,8 @@ def save_review_changes(request, review_id):
     Saves the edited review data submitted via POST and returns the updated
     review display fragment.
     """
-    review = get_object_or_404(Review, pk=review_id, user=request.user)
+    # select_related: the display fragment shows review.user.username.
+    review = get_object_or_404(Review.objects.select_related('user'), pk=review_id, user=request.user)
     if request.method == 'POST':
         # Populate the form with the submitted data and the original review instance.
         form = ReviewForm(request.POST, instance=review)
@@ -246,4 +317,25 @@ def save_review_changes(request, review_id):
             return render(request, 'catalog/partials/review_edit_form.html', {'form': form, 'review': review})
     
     # If it's not a POST request, do nothing.
-    return redirect('catalog:component_detail', component_id=review.component.id)
\ No newline at end of file
+    return redirect('catalog:component_detail', component_id=review.component_id)
+
+
+@staff_member_required
+def sql_profile_view(request):
+    """
+    Staff-only page with the query behaviour of the last requests this process
+    served, recorded by SQLProfileMiddleware (catalog/instrumentation.py).
+    """
+    if request.method == 'POST':
+        recent.clear()
+        return redirect('catalog:sql_profile')
+
+    views, repeated, slowest = recent.summary()
+    context = {
+        'views': views,
+        'repeated': repeated,
+        'slowest': slowest,
+        'request_count': sum(view['requests'] for view in views),
+        'repeat_threshold': getattr(settings, 'SQL_PROFILE_REPEAT_THRESHOLD', REPEAT_THRESHOLD),
+    }
+    return render(request, 'catalog/sql_profile.html', context)
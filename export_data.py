@@ -1,58 +1,42 @@
 #!/usr/bin/env python
 """
-Export all data from the database to JSON fixtures for migration.
+Export all data from the database to compressed JSON Lines files for migration.
 This will export data from users, catalog, builds, and marketplace apps.
 
-Usage: python export_data.py
+Everything runs in this one process (no 'manage.py dumpdata' per app) and streams
+the rows to users_data.jsonl.gz, catalog_data.jsonl.gz, ... Load them on the new
+server with 'python manage.py load_data'.
+
+Usage: python export_data.py [--parallel]
 """
 import os
 import sys
-import subprocess
+
+import django
+
 
 def main():
-    # Apps to export (in dependency order)
-    apps_to_export = ['users', 'catalog', 'builds', 'marketplace']
-    
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'buildforge_project.settings')
+    django.setup()
+    from django.core.management import call_command
+    from catalog.datafiles import DEFAULT_APPS, data_file_name
+
     print("=" * 60)
     print("BuildForge Data Export Tool")
     print("=" * 60)
-    print("\nThis will export all your data to JSON files.\n")
-    
-    exported_files = []
-    
-    for app in apps_to_export:
-        output_file = f'{app}_data.json'
-        cmd = ['python', 'manage.py', 'dumpdata', app, '--indent', '2', '-o', output_file]
-        
-        print(f"📦 Exporting {app}...", end=' ')
-        
-        try:
-            result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-            
-            # Check if file was created and has content
-            if os.path.exists(output_file):
-                file_size = os.path.getsize(output_file)
-                if file_size > 10:  # More than just empty array
-                    print(f"✓ ({file_size:,} bytes)")
-                    exported_files.append(output_file)
-                else:
-                    print(f"⚠️  (empty)")
-            else:
-                print(f"❌ (failed)")
-                
-        except subprocess.CalledProcessError as e:
-            print(f"❌ Error: {e.stderr}")
-            continue
-    
+    print("\nThis will export all your data to compressed JSON Lines files.\n")
+
+    call_command('export_data', parallel='--parallel' in sys.argv[1:])
+
     print("\n" + "=" * 60)
     print("✅ Export Complete!")
     print("=" * 60)
     print("\nFiles created:")
-    for file in exported_files:
-        print(f"  📄 {file}")
-    
+    for app in DEFAULT_APPS:
+        print(f"  📄 {data_file_name(app)}")
+
     print("\n⚠️  IMPORTANT: Keep these files safe!")
-    print("   You'll need them to import data on Render.com")
+    print("   You'll need them to import data on Render.com (python manage.py load_data)")
     print("\n" + "=" * 60)
 
 if __name__ == '__main__':
@@ -1,3 +1,40 @@
-from django.test import TestCase
+from django.urls import reverse
 
-# Create your tests here.
+from catalog.testing import LARGE, QueryBudgetTestCase
+
+
+LISTING = {'title': 'GPU for sale', 'description': 'Barely used', 'price': '250', 'contact_info': 'me@example.com', 'status': 'Available'}
+
+
+class MarketplaceQueryBudgets:
+    """The most queries each marketplace view may make (see catalog/testing.py)."""
+
+    def test_list_and_detail(self):
+        self.assertQueryBudget(3, 'get', reverse('marketplace:list'))
+        self.assertQueryBudget(5, 'get', reverse('marketplace:detail', args=[self.data.listing.pk]))
+
+    def test_create(self):
+        self.assertQueryBudget(2, 'get', reverse('marketplace:create'))
+        self.assertQueryBudget(3, 'post', reverse('marketplace:create'), LISTING, status=302)
+
+    def test_edit(self):
+        url = reverse('marketplace:edit', args=[self.data.listing.pk])
+        self.assertQueryBudget(4, 'get', url)
+        self.assertQueryBudget(5, 'post', url, LISTING, status=302)
+
+    def test_delete(self):
+        url = reverse('marketplace:delete', args=[self.data.listing.pk])
+        self.assertQueryBudget(4, 'get', url)
+        self.assertQueryBudget(6, 'post', url, status=302)
+
+    def test_comment(self):
+        url = reverse('marketplace:add_comment', args=[self.data.listing.pk])
+        self.assertQueryBudget(4, 'post', url, {'body': 'Is it still available?'}, status=302)
+
+
+class SmallMarketplaceQueryBudgetTests(MarketplaceQueryBudgets, QueryBudgetTestCase):
+    pass
+
+
+class LargeMarketplaceQueryBudgetTests(MarketplaceQueryBudgets, QueryBudgetTestCase):
+    ITEMS = LARGE
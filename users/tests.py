@@ -1,3 +1,28 @@
-from django.test import TestCase
+from django.urls import reverse
 
-# Create your tests here.
+from catalog.testing import LARGE, QueryBudgetTestCase
+
+
+class UsersQueryBudgets:
+    """The most queries each users view may make (see catalog/testing.py)."""
+
+    def test_profile(self):
+        self.assertQueryBudget(4, 'get', reverse('users:profile', args=[self.data.owner.username]))
+
+    def test_profile_edit(self):
+        self.assertQueryBudget(2, 'get', reverse('users:profile_edit'))
+        data = {'username': self.data.owner.username, 'email': 'owner@example.com', 'bio': 'Builds PCs'}
+        self.assertQueryBudget(5, 'post', reverse('users:profile_edit'), data, status=302)
+
+    def test_register_and_login_pages(self):
+        self.client.logout()
+        self.assertQueryBudget(0, 'get', reverse('users:register'))
+        self.assertQueryBudget(0, 'get', reverse('users:login'))
+
+
+class SmallUsersQueryBudgetTests(UsersQueryBudgets, QueryBudgetTestCase):
+    pass
+
+
+class LargeUsersQueryBudgetTests(UsersQueryBudgets, QueryBudgetTestCase):
+    ITEMS = LARGE